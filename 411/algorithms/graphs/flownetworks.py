@@ -116,4 +116,337 @@ f(s,a)=3 (now saturated), f(a,b)=1, f(b,t)=3 (now saturated).
 
 No more s→t path exists in residual. Total max flow = f out of s = 3 + 2 = 5.
 
-Check cut {s, a, b} / {t}: capacity = c(a,t)+c(b,t) = 2 + 3 = 5 ⇒ matches max flow."""
\ No newline at end of file
+Check cut {s, a, b} / {t}: capacity = c(a,t)+c(b,t) = 2 + 3 = 5 ⇒ matches max flow."""
+
+"""
+IMPLEMENTATION: warm-start (incremental) max flow
+-------------------------------------------------
+FlowNetwork below keeps the residual graph G_f and the current flow between
+calls instead of starting from zero flow every time.
+
+- Edges live in parallel lists (to[], nxt[], cap[]); edge e and its reverse
+  edge e ^ 1 are stored next to each other, so c_f of the reverse edge is just
+  cap[e ^ 1] (= flow on e).
+- max_flow(s, t) runs Dinic (BFS level graph + blocking flow) starting from
+  whatever flow is already there.
+- set_capacity(e, c):
+    * increase (or decrease that stays >= current flow): only the residual
+      capacity changes, the old flow is still feasible.
+    * decrease below the current flow f: cut the edge's flow down to c, then
+      repair the excess at u and the deficit at v locally:
+        1) reroute u -> v around the edge in G_f (value unchanged),
+        2) whatever could not be rerouted is cancelled: push it back u -> s
+           and pull it back t -> v (value drops by that amount).
+  The next max_flow(s, t) then only augments the difference.
+
+Repair paths never pass through s or t as intermediate nodes and never put
+flow on edges leaving t or entering s, so flow only ever runs s -> ... -> t
+and the value stays "flow out of s".
+
+min_cut() reads the max-flow min-cut certificate straight off G_f: S is the
+set of nodes reachable from s, and the cut edges are the (saturated) original
+edges from S to T = V - S.
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+INF = float('inf')
+
+
+class FlowNetwork:
+    """
+    Residual graph on nodes 0..n-1 with a Dinic max-flow solver that can be
+    re-run after capacities change.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.head: List[int] = [-1] * n   # first edge id out of each node
+        self.nxt: List[int] = []          # next edge id in the same list
+        self.to: List[int] = []           # edge head
+        self.cap: List[float] = []        # residual capacity c_f(e)
+        self.capacity: List[float] = []   # original capacity c(e) (0 on reverse edges)
+        self.source: Optional[int] = None
+        self.sink: Optional[int] = None
+        self.flow_value: float = 0
+
+    def add_edge(self, u: int, v: int, c: float) -> int:
+        """
+        Add edge u -> v with capacity c (and its reverse residual edge).
+        Returns the edge id, used by set_capacity() and edge_flow().
+        """
+        e = len(self.to)
+        # forward edge u -> v
+        self.to.append(v)
+        self.nxt.append(self.head[u])
+        self.head[u] = e
+        self.cap.append(c)
+        self.capacity.append(c)
+        # reverse edge v -> u (starts with 0 residual capacity)
+        self.to.append(u)
+        self.nxt.append(self.head[v])
+        self.head[v] = e + 1
+        self.cap.append(0)
+        self.capacity.append(0)
+        return e
+
+    def edge_flow(self, e: int) -> float:
+        """
+        Current flow on edge e: the residual capacity of its reverse edge, which
+        stays exact for INF capacities (capacity − c_f would be INF − INF).
+        """
+        if e % 2 == 0:
+            return self.cap[e ^ 1]
+        return -self.cap[e]
+
+    def reset(self) -> None:
+        """Drop all flow (back to f = 0)."""
+        i = 0
+        m = len(self.cap)
+        while i < m:
+            self.cap[i] = self.capacity[i]
+            i += 1
+        self.flow_value = 0
+
+    def max_flow(self, s: int, t: int) -> float:
+        """
+        Maximum s -> t flow value.
+        If the previous call used the same (s, t), the existing flow is reused
+        and only the missing amount is augmented.
+        """
+        if s != self.source or t != self.sink:
+            self.reset()
+            self.source = s
+            self.sink = t
+        self.flow_value += self._augment(s, t, INF)
+        return self.flow_value
+
+    def set_capacity(self, e: int, c: float) -> None:
+        """
+        Change the capacity of edge e to c, keeping the current flow feasible.
+        Call max_flow(s, t) again afterwards to re-optimize.
+        """
+        f = self.edge_flow(e)
+        self.capacity[e] = c
+        if f <= c:
+            self.cap[e] = c - f
+            return
+
+        # flow on e is now too large: cut it down to c
+        excess = f - c
+        self.cap[e] = 0
+        self.cap[e ^ 1] = c
+        u = self.to[e ^ 1]
+        v = self.to[e]
+
+        # 1) reroute the excess around e
+        rest = excess - self._augment(u, v, excess)
+        if rest <= 0:
+            return
+
+        # 2) cancel what could not be rerouted
+        if u != self.source:
+            self._augment(u, self.source, rest)
+        if v != self.sink:
+            self._augment(self.sink, v, rest)
+        self.flow_value -= rest
+
+    def _augment(self, src: int, dst: int, limit: float) -> float:
+        """
+        Dinic from src to dst in the residual graph, pushing at most limit.
+        Returns the amount pushed.
+        """
+        pushed: float = 0
+        while pushed < limit:
+            level = self._bfs_levels(src, dst)
+            if level[dst] < 0:
+                break
+            it = self.head[:]   # current-arc pointers
+            while pushed < limit:
+                f = self._push_path(src, dst, limit - pushed, level, it)
+                if f == 0:
+                    break
+                pushed += f
+        return pushed
+
+    def _bfs_levels(self, src: int, dst: int) -> List[int]:
+        """BFS distances (in edges) from src over edges with c_f > 0."""
+        level: List[int] = [-1] * self.n
+        level[src] = 0
+        q = deque([src])
+        while len(q) > 0:
+            u = q.popleft()
+            # s and t are never used as intermediate nodes
+            if u != src and (u == self.source or u == self.sink):
+                continue
+            e = self.head[u]
+            while e != -1:
+                v = self.to[e]
+                if self.cap[e] > 0 and level[v] < 0 and self._usable(e, u, v):
+                    level[v] = level[u] + 1
+                    if v == dst:
+                        return level
+                    q.append(v)
+                e = self.nxt[e]
+        return level
+
+    def _usable(self, e: int, u: int, v: int) -> bool:
+        """
+        Original edges out of t or into s never get flow; only their reverse
+        (cancelling) edges may be used there.
+        """
+        return (e & 1) == 1 or (u != self.sink and v != self.source)
+
+    def _push_path(self, src: int, dst: int, limit: float, level: List[int], it: List[int]) -> float:
+        """
+        Find one src -> dst path in the level graph (iterative DFS with
+        current-arc pointers) and push its bottleneck (capped by limit).
+        Returns 0 when the level graph is blocked.
+        """
+        path: List[int] = []   # edge ids from src to u
+        u = src
+        while True:
+            if u == dst:
+                b = limit
+                for e in path:
+                    if self.cap[e] < b:
+                        b = self.cap[e]
+                for e in path:
+                    self.cap[e] -= b
+                    self.cap[e ^ 1] += b
+                return b
+
+            # advance along the first admissible edge
+            e = it[u]
+            while e != -1:
+                v = self.to[e]
+                if self.cap[e] > 0 and level[v] == level[u] + 1 and self._usable(e, u, v):
+                    break
+                e = self.nxt[e]
+            it[u] = e
+
+            if e != -1 and (u == src or (u != self.source and u != self.sink)):
+                path.append(e)
+                u = self.to[e]
+                continue
+
+            # dead end: retreat and skip the edge that led here
+            level[u] = -1
+            if len(path) == 0:
+                return 0
+            e = path.pop()
+            u = self.to[e ^ 1]
+            it[u] = self.nxt[it[u]]
+
+
+    def min_cut(self) -> Tuple[List[int], List[Tuple[int, int, float]]]:
+        """
+        Minimum s-t cut read off the finished residual graph (call max_flow first).
+        S = nodes reachable from s in G_f; cut edges = original edges S -> T.
+        Returns (S as a sorted node list, [(u, v, capacity), ...]).
+        """
+        if self.source is None:
+            raise ValueError("min_cut() needs a finished max_flow(s, t) first")
+
+        seen: List[bool] = [False] * self.n
+        seen[self.source] = True
+        q = deque([self.source])
+        while len(q) > 0:
+            u = q.popleft()
+            e = self.head[u]
+            while e != -1:
+                v = self.to[e]
+                if self.cap[e] > 0 and not seen[v]:
+                    seen[v] = True
+                    q.append(v)
+                e = self.nxt[e]
+
+        S: List[int] = []
+        cut_edges: List[Tuple[int, int, float]] = []
+        u = 0
+        while u < self.n:
+            if seen[u]:
+                S.append(u)
+                e = self.head[u]
+                while e != -1:
+                    # forward edges only; each one crossing S -> T is saturated
+                    if (e & 1) == 0 and not seen[self.to[e]]:
+                        cut_edges.append((u, self.to[e], self.capacity[e]))
+                    e = self.nxt[e]
+            u += 1
+        return S, cut_edges
+
+
+def _random_network(n: int, m: int, max_cap: int, seed: int) -> Tuple[FlowNetwork, List[int]]:
+    """Random flow network on n nodes with m edges; source 0, sink n-1."""
+    import random
+    rng = random.Random(seed)
+    g = FlowNetwork(n)
+    edge_ids: List[int] = []
+    i = 0
+    while i < m:
+        u = rng.randrange(n)
+        v = rng.randrange(n)
+        if u != v:
+            edge_ids.append(g.add_edge(u, v, rng.randint(1, max_cap)))
+            i += 1
+    return g, edge_ids
+
+
+def _tiny_demo():
+    """
+    The worked example above: s=0, a=1, b=2, t=3
+      s->a(3), s->b(2), a->b(1), a->t(2), b->t(3)  -> max flow 5
+    Then change a few capacities and re-solve from the previous flow.
+    """
+    g = FlowNetwork(4)
+    g.add_edge(0, 1, 3)
+    g.add_edge(0, 2, 2)
+    g.add_edge(1, 2, 1)
+    at = g.add_edge(1, 3, 2)
+    bt = g.add_edge(2, 3, 3)
+    print("max flow:", g.max_flow(0, 3))                 # 5
+    print("min cut:", g.min_cut())                       # S=[0]: s->a + s->b = 5
+
+    g.set_capacity(bt, 1)
+    print("after b->t = 1:", g.max_flow(0, 3))           # 3
+    g.set_capacity(at, 4)
+    print("after a->t = 4:", g.max_flow(0, 3))           # 4
+
+
+def _benchmark():
+    """Cold solve vs warm re-solve after changing a handful of capacities."""
+    import random
+    import time
+    n, m = 2000, 20000
+    rng = random.Random(1)
+    g, edge_ids = _random_network(n, m, 100, seed=1)
+    changes = [(edge_ids[rng.randrange(m)], rng.randint(1, 100)) for _ in range(5)]
+
+    t0 = time.perf_counter()
+    g.max_flow(0, n - 1)
+    cold_first = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for e, c in changes:
+        g.set_capacity(e, c)
+    warm_value = g.max_flow(0, n - 1)
+    warm = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    g.reset()
+    cold_value = g.max_flow(0, n - 1)
+    cold = time.perf_counter() - t0
+
+    print("initial cold solve: %.3fs" % cold_first)
+    print("warm re-solve:      %.3fs  value=%s" % (warm, warm_value))
+    print("cold re-solve:      %.3fs  value=%s" % (cold, cold_value))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
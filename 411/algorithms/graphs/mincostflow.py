@@ -0,0 +1,335 @@
+"""
+Min-Cost Max-Flow (Successive Shortest Paths with Johnson Potentials)
+=====================================================================
+
+Problem:
+Every edge (u, v) has a capacity c(u, v) and a cost w(u, v) per unit of flow.
+Among all maximum s→t flows (or all flows of a required value F), find one with
+minimum total cost ∑ w(u, v) · f(u, v).
+
+Residual costs:
+Forward residual edge u→v costs w(u, v); reverse residual edge v→u costs −w(u, v)
+(undoing a unit of flow gives its cost back). So G_f has negative edges even when
+all w ≥ 0.
+
+Successive Shortest Paths (SSP):
+Start with zero flow. Repeat: find a CHEAPEST s→t path in G_f, augment its bottleneck.
+If the initial graph has no negative cycles, G_f never gets one, and the final flow is
+min-cost among flows of its value.
+
+Johnson potentials (why Dijkstra is allowed):
+Keep a potential π(v) per node and use the reduced cost
+    w_π(u, v) = w(u, v) + π(u) − π(v).
+Any path's reduced cost differs from its real cost by π(s) − π(t), so shortest paths are
+the same. If w_π ≥ 0 on every residual edge, Dijkstra (greedyDijkstras.py) works.
+After each Dijkstra with distances d, set π(v) += d(v): every edge on the shortest path
+gets w_π = 0, so the new reverse edges are also non-negative. Only the very first
+potentials need Bellman–Ford (and only if some cost is negative).
+
+Capacity scaling (optional, for large integer capacities):
+Phases Δ = 2^k, …, 2, 1. In phase Δ only residual edges with c_f ≥ Δ are used and
+every augmentation pushes exactly Δ units, so the number of Dijkstra runs is
+O(E log U) instead of O(F).
+Scaling needs INTEGER capacities and max_flow (Δ stops at 1, so a fractional
+remainder would never be routed). INF capacities are clamped to the flow value F
+first: with no negative cycles some min-cost flow is a sum of s→t paths, so no edge
+needs more than F. Plain SSP takes any real capacities, INF too,
+as long as the flow value itself is finite.
+
+Complexity:
+SSP:      O(F · E log V) with a binary heap.
+Scaling:  O(E log U · E log V).
+"""
+
+import heapq
+from typing import List, Tuple
+
+from flownetworks import FlowNetwork, INF
+
+
+class CostFlowNetwork(FlowNetwork):
+    """
+    FlowNetwork (same array-based residual graph) with a cost per edge.
+    Edge e costs cost[e]; its reverse edge e ^ 1 costs -cost[e].
+    """
+
+    def __init__(self, n: int):
+        FlowNetwork.__init__(self, n)
+        self.cost: List[float] = []
+
+    def add_edge(self, u: int, v: int, c: float, w: float = 0) -> int:
+        """Add edge u -> v with capacity c and per-unit cost w. Returns the edge id."""
+        e = FlowNetwork.add_edge(self, u, v, c)
+        self.cost.append(w)
+        self.cost.append(-w)
+        return e
+
+    def min_cost_flow(self, s: int, t: int, max_flow: float = INF, scaling: bool = False) -> Tuple[float, float]:
+        """
+        Send as much flow as possible from s to t (at most max_flow) at minimum cost.
+        scaling=True uses capacity scaling (finite capacities and max_flow must be integers).
+        Returns (flow value, total cost). Raises ValueError if the flow is unbounded
+        (an s -> t path of INF capacity and max_flow = INF).
+        """
+        if scaling:
+            for c in self.capacity + [max_flow]:
+                if c != INF and c != int(c):
+                    raise ValueError("scaling=True needs integer capacities and max_flow")
+            # the value to route is the max flow (Dinic), capped by max_flow
+            target = min(self.max_flow(s, t), max_flow)
+            if target == INF:
+                raise ValueError("unbounded flow: an s -> t path has INF capacity; pass max_flow")
+            self.reset()
+            clamped = [e for e in range(len(self.cap)) if self.cap[e] == INF]
+            for e in clamped:
+                self.cap[e] = target
+            flow = self._scaling_flow(s, t, target)
+            for e in clamped:
+                self.cap[e] = INF           # residual of an INF edge stays INF
+        else:
+            self.reset()
+            flow = self._ssp_flow(s, t, max_flow)
+
+        self.source = s
+        self.sink = t
+        self.flow_value = flow
+        total_cost: float = 0
+        e = 0
+        m = len(self.to)
+        while e < m:
+            total_cost += self.edge_flow(e) * self.cost[e]
+            e += 2
+        return flow, total_cost
+
+    def _ssp_flow(self, s: int, t: int, limit: float) -> float:
+        """Plain successive shortest paths from s to t."""
+        pi = self._initial_potentials()
+        flow: float = 0
+        while flow < limit:
+            dist, parent_edge = self._dijkstra_reduced(s, pi, 0, [t])
+            if dist[t] == INF:
+                break
+            self._update_potentials(pi, dist, dist[t])
+
+            # bottleneck along the path
+            b = limit - flow
+            v = t
+            while v != s:
+                e = parent_edge[v]
+                if self.cap[e] < b:
+                    b = self.cap[e]
+                v = self.to[e ^ 1]
+            if b == INF:
+                raise ValueError("unbounded flow: an s -> t path has INF capacity; pass max_flow")
+            self._push(s, t, parent_edge, b)
+            flow += b
+        return flow
+
+    def _scaling_flow(self, s: int, t: int, target: float) -> float:
+        """Capacity-scaling SSP routing `target` units from s to t."""
+        excess: List[float] = [0] * self.n
+        excess[s] += target
+        excess[t] -= target
+        pi = self._initial_potentials()
+
+        max_cap = 1
+        for c in self.capacity:
+            if c > max_cap and c != INF:
+                max_cap = c
+        delta = 1
+        while delta * 2 <= max_cap:
+            delta *= 2
+
+        while delta >= 1:
+            # restore w_π >= 0 on G_f(Δ): saturate every negative reduced-cost edge
+            u = 0
+            while u < self.n:
+                e = self.head[u]
+                while e != -1:
+                    v = self.to[e]
+                    if self.cap[e] >= delta and self.cost[e] + pi[u] - pi[v] < 0:
+                        r = self.cap[e]
+                        self.cap[e] = 0
+                        self.cap[e ^ 1] += r
+                        excess[u] -= r
+                        excess[v] += r
+                    e = self.nxt[e]
+                u += 1
+
+            # send Δ units from excess nodes to deficit nodes along cheapest paths
+            progress = True
+            while progress:
+                progress = False
+                deficits = [v for v in range(self.n) if excess[v] <= -delta]
+                if len(deficits) == 0:
+                    break
+                k = 0
+                while k < self.n:
+                    if excess[k] >= delta:
+                        dist, parent_edge = self._dijkstra_reduced(k, pi, delta, deficits)
+                        best = -1
+                        for v in deficits:
+                            if dist[v] != INF and (best == -1 or dist[v] < dist[best]):
+                                best = v
+                        if best != -1:
+                            self._update_potentials(pi, dist, dist[best])
+                            self._push(k, best, parent_edge, delta)
+                            excess[k] -= delta
+                            excess[best] += delta
+                            progress = True
+                            break
+                    k += 1
+            delta //= 2
+
+        # units that actually reached t
+        return target + excess[t]
+
+    def _initial_potentials(self) -> List[float]:
+        """
+        π = 0 if no residual edge has negative cost; otherwise Bellman–Ford from a
+        virtual node joined to everything with 0-cost edges (no negative cycles allowed).
+        """
+        pi: List[float] = [0] * self.n
+        negative = False
+        e = 0
+        m = len(self.to)
+        while e < m:
+            if self.cap[e] > 0 and self.cost[e] < 0:
+                negative = True
+                break
+            e += 1
+        if not negative:
+            return pi
+
+        rounds = 0
+        changed = True
+        while changed and rounds < self.n:
+            changed = False
+            u = 0
+            while u < self.n:
+                e = self.head[u]
+                while e != -1:
+                    v = self.to[e]
+                    if self.cap[e] > 0 and pi[u] + self.cost[e] < pi[v]:
+                        pi[v] = pi[u] + self.cost[e]
+                        changed = True
+                    e = self.nxt[e]
+                u += 1
+            rounds += 1
+        if changed:
+            raise ValueError("negative-cost cycle in the network")
+        return pi
+
+    def _dijkstra_reduced(self, src: int, pi: List[float], min_cap: float,
+                          targets: List[int]) -> Tuple[List[float], List[int]]:
+        """
+        Dijkstra (as in greedyDijkstras.py) over residual edges with c_f > 0 and
+        c_f >= min_cap (SSP passes 0, so fractional residuals count), using reduced
+        costs w + π(u) − π(v) >= 0. Stops once any target is settled.
+        Returns dist[] and parent_edge[] (edge id used to reach each node, -1 if none).
+        """
+        dist: List[float] = [INF] * self.n
+        parent_edge: List[int] = [-1] * self.n
+        visited: List[int] = [0] * self.n
+        is_target: List[bool] = [False] * self.n
+        for v in targets:
+            is_target[v] = True
+
+        dist[src] = 0
+        pq: List[Tuple[float, int]] = []
+        heapq.heappush(pq, (0, src))
+        while len(pq) > 0:
+            cur_dist, u = heapq.heappop(pq)
+            if visited[u] == 1:
+                continue
+            visited[u] = 1
+            if is_target[u]:
+                break
+
+            pu = pi[u]
+            e = self.head[u]
+            while e != -1:
+                if self.cap[e] > 0 and self.cap[e] >= min_cap:
+                    v = self.to[e]
+                    alt = cur_dist + self.cost[e] + pu - pi[v]
+                    if alt < dist[v]:
+                        dist[v] = alt
+                        parent_edge[v] = e
+                        heapq.heappush(pq, (alt, v))
+                e = self.nxt[e]
+
+        return dist, parent_edge
+
+    def _update_potentials(self, pi: List[float], dist: List[float], bound: float) -> None:
+        """
+        π(v) += min(d(v), bound), where bound is the distance of the target we stopped at.
+        Capping at bound keeps w_π >= 0 even though Dijkstra stopped early.
+        """
+        v = 0
+        while v < self.n:
+            if dist[v] < bound:
+                pi[v] += dist[v]
+            else:
+                pi[v] += bound
+            v += 1
+
+    def _push(self, src: int, dst: int, parent_edge: List[int], amount: float) -> None:
+        """Augment `amount` along the parent_edge path src -> dst."""
+        v = dst
+        while v != src:
+            e = parent_edge[v]
+            self.cap[e] -= amount
+            self.cap[e ^ 1] += amount
+            v = self.to[e ^ 1]
+
+
+def _tiny_demo():
+    """
+    s=0, a=1, b=2, t=3 (capacity, cost):
+      s->a(2, 1), s->b(1, 2), a->b(1, 1), a->t(1, 3), b->t(2, 1)
+    Max flow is 3. Cheapest way: s->a->b->t (1 unit, cost 3), s->a->t (1 unit, cost 4),
+    s->b->t (1 unit, cost 3)  => total cost 10.
+    """
+    g = CostFlowNetwork(4)
+    g.add_edge(0, 1, 2, 1)
+    g.add_edge(0, 2, 1, 2)
+    g.add_edge(1, 2, 1, 1)
+    g.add_edge(1, 3, 1, 3)
+    g.add_edge(2, 3, 2, 1)
+    print("ssp (flow, cost):", g.min_cost_flow(0, 3))
+    print("scaling (flow, cost):", g.min_cost_flow(0, 3, scaling=True))
+
+
+def _benchmark():
+    """Plain SSP vs capacity scaling on a random graph with large capacities."""
+    import random
+    import time
+    rng = random.Random(3)
+    n, m = 300, 3000
+    g = CostFlowNetwork(n)
+    i = 0
+    while i < m:
+        u = rng.randrange(n)
+        v = rng.randrange(n)
+        if u != v:
+            g.add_edge(u, v, rng.randint(1, 100000), rng.randint(0, 100))
+            i += 1
+
+    t0 = time.perf_counter()
+    plain = g.min_cost_flow(0, n - 1)
+    t_plain = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scaled = g.min_cost_flow(0, n - 1, scaling=True)
+    t_scaled = time.perf_counter() - t0
+
+    print("ssp:     %.3fs  (flow, cost) = %s" % (t_plain, plain))
+    print("scaling: %.3fs  (flow, cost) = %s" % (t_scaled, scaled))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -0,0 +1,224 @@
+"""
+Blocked (cache-line) Bloom Filter, split-block layout
+=====================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+1) BlockedBloomFilter: all k bits of a key live in ONE 64-byte block (one cache
+   line), so a query costs one memory access instead of k random ones.
+2) blocked_fpr(): the false-positive formula of bloomfilter.py corrected for blocking,
+   and sizing from (n, p) with it.
+3) Benchmark: query throughput and measured FPR vs the standard BloomFilter at
+   equal memory.
+
+WHY
+---
+In the classic filter (bloomfilter.py) the k probes land anywhere in the m-bit array.
+Once the filter is much larger than the CPU caches, every probe is a cache miss:
+k ≈ 7 misses per query. Blocking: first hash the key to a block, then set/test all
+k bits inside that block.
+
+SPLIT-BLOCK LAYOUT (as in Parquet / Impala)
+-------------------------------------------
+block = 8 words × 64 bits = 512 bits = 64 bytes, k = 8: exactly ONE bit per word.
+  block index  = multiply-high of h1 with the number of blocks (no modulo)
+  bit in word j = top 6 bits of (h2 · SALT_j) mod 2^64
+So a key is 8 small masks, one per word; add = OR the 8 words, query = AND the 8
+words with the masks and compare. In NumPy: words has shape (blocks, 8), a query
+batch gathers whole rows (B, 8) and tests them with whole-array operations. The
+array is 64-byte aligned so every row is exactly one cache line.
+
+FPR CORRECTED FOR BLOCKING
+--------------------------
+The classic p ≈ (1 − e^(−kn/m))^k assumes the load is spread evenly over all m bits.
+With blocks, the number of keys j in a block is ~ Poisson(λ), λ = n / #blocks, and
+overloaded blocks give many more false positives than underloaded ones save:
+  split block (k words of w = 512/k bits):
+      p = Σ_j Pois(j; λ) · (1 − (1 − 1/w)^j)^k
+  plain blocked (k bits anywhere in a B-bit block):
+      p = Σ_j Pois(j; λ) · (1 − (1 − 1/B)^(k·j))^k
+For the same memory, blocked filters have a somewhat higher FPR (at 10 bits/key:
+split block ≈ 1.05% instead of 0.82%), so sizing for a target p needs a few % more bits.
+"""
+
+import math
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from bloomfilter import MASK64, Item, hash_pair, hash_pair_np, item_key, item_keys, optimal_params
+
+BLOCK_BITS = 512
+WORDS = 8           # words per block = bits set per key (split block)
+# one odd multiplier per word (from the Parquet split-block spec, widened to 64 bits)
+SALTS = [0x47B6137B44974D91, 0x8824AD5BA2B7289D, 0x705495C72DF1424B, 0x9EFC49475C6BFB31,
+         0x44974D9147B6137B, 0xA2B7289D8824AD5B, 0x2DF1424B705495C7, 0x5C6BFB319EFC4947]
+
+
+def blocked_fpr(m: int, n: int, k: int = WORDS, block_bits: int = BLOCK_BITS, split: bool = True) -> float:
+    """False-positive rate of a blocked Bloom filter (m bits, n keys, k bits per key)."""
+    blocks = m // block_bits
+    if blocks == 0:
+        raise ValueError("m must hold at least one block")
+    lam = n / blocks
+    total = 0.0
+    j = 0
+    log_pois = -lam                      # log Pois(0; λ)
+    j_max = int(lam + 12 * math.sqrt(lam) + 30)
+    while j <= j_max:
+        if split:
+            w = block_bits // k
+            fill = 1.0 - (1.0 - 1.0 / w) ** j
+        else:
+            fill = 1.0 - (1.0 - 1.0 / block_bits) ** (k * j)
+        total += math.exp(log_pois) * fill ** k
+        j += 1
+        log_pois += math.log(lam) - math.log(j) if lam > 0 else -math.inf
+    return total
+
+
+def blocked_params(n: int, p: float) -> int:
+    """Number of 512-bit blocks so a split-block filter with n keys has FPR <= p."""
+    m, _ = optimal_params(n, p)
+    blocks = max(1, -(-m // BLOCK_BITS))
+    while blocked_fpr(blocks * BLOCK_BITS, n) > p:
+        blocks = blocks + max(1, blocks // 50)
+    return blocks
+
+
+def _aligned_words(blocks: int) -> np.ndarray:
+    """(blocks, 8) uint64 array whose rows start on 64-byte boundaries."""
+    raw = np.zeros(blocks * WORDS + WORDS, dtype=np.uint64)
+    skip = (-raw.ctypes.data % 64) // 8
+    return raw[skip:skip + blocks * WORDS].reshape(blocks, WORDS)
+
+
+class BlockedBloomFilter:
+    """Split-block Bloom filter: 8 bits per key, one per word of one 64-byte block."""
+
+    def __init__(self, n: int, p: float = 0.01, seed: int = 0):
+        self._init(blocked_params(n, p), seed)
+
+    def _init(self, blocks: int, seed: int) -> None:
+        self.blocks = blocks
+        self.m = blocks * BLOCK_BITS
+        self.k = WORDS
+        self.seed = seed & MASK64
+        self.n = 0
+        self.words = _aligned_words(blocks)
+        self._salts = np.asarray(SALTS, dtype=np.uint64)
+
+    @classmethod
+    def from_blocks(cls, blocks: int, seed: int = 0) -> "BlockedBloomFilter":
+        bf = cls.__new__(cls)
+        bf._init(blocks, seed)
+        return bf
+
+    def _block_and_masks(self, item: Item):
+        h1, h2 = hash_pair(item_key(item), self.seed)
+        block = ((h1 >> 32) * self.blocks) >> 32
+        masks: List[int] = [1 << (((h2 * s) & MASK64) >> 58) for s in SALTS]
+        return block, masks
+
+    def _block_and_masks_np(self, keys: np.ndarray):
+        h1, h2 = hash_pair_np(keys, self.seed)
+        block = ((h1 >> np.uint64(32)) * np.uint64(self.blocks)) >> np.uint64(32)
+        bits = (h2[:, None] * self._salts[None, :]) >> np.uint64(58)
+        return block.astype(np.intp), np.left_shift(np.uint64(1), bits)
+
+    def add(self, item: Item) -> None:
+        block, masks = self._block_and_masks(item)
+        row = self.words[block]
+        j = 0
+        while j < WORDS:
+            row[j] |= np.uint64(masks[j])
+            j += 1
+        self.n += 1
+
+    def __contains__(self, item: Item) -> bool:
+        block, masks = self._block_and_masks(item)
+        row = self.words[block].tolist()
+        j = 0
+        while j < WORDS:
+            if row[j] & masks[j] == 0:
+                return False
+            j += 1
+        return True
+
+    def add_many(self, items: Union[np.ndarray, Iterable[Item]]) -> None:
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return
+        block, masks = self._block_and_masks_np(keys)
+        flat = self.words.reshape(-1)
+        np.bitwise_or.at(flat, (block[:, None] * WORDS + np.arange(WORDS)).ravel(), masks.ravel())
+        self.n += len(keys)
+
+    def contains_many(self, items: Union[np.ndarray, Iterable[Item]]) -> np.ndarray:
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return np.zeros(0, dtype=bool)
+        block, masks = self._block_and_masks_np(keys)
+        rows = self.words[block]              # one 64-byte row per key
+        return ((rows & masks) == masks).all(axis=1)
+
+    def expected_fpr(self) -> float:
+        return blocked_fpr(self.m, self.n)
+
+
+def _tiny_demo():
+    """Sizing with and without the blocking correction, and a quick FPR check."""
+    from bloomfilter import false_positive_rate
+    n = 100000
+    for bits_per_key in (8, 10, 16):
+        m = n * bits_per_key
+        k = max(1, round(bits_per_key * math.log(2)))
+        print("%2d bits/key: classic p=%.4f  split-block p=%.4f  plain-blocked(k=%d) p=%.4f" % (
+            bits_per_key, false_positive_rate(m, k, n), blocked_fpr(m, n),
+            k, blocked_fpr(m, n, k=k, split=False)))
+    bf = BlockedBloomFilter(n, 0.01)
+    bf.add_many(np.arange(n))
+    fp = bf.contains_many(np.arange(n, 11 * n)).mean()
+    print("n=%d, p=1%%: %d blocks (%.2f bits/key), measured FPR %.4f, predicted %.4f, no false negatives: %s" % (
+        n, bf.blocks, bf.m / n, fp, bf.expected_fpr(), bool(bf.contains_many(np.arange(n)).all())))
+
+
+def _benchmark():
+    """Standard vs split-block layout at equal memory (n = 10M keys)."""
+    import time
+    from bloomfilter import BloomFilter, false_positive_rate
+    rng = np.random.default_rng(0)
+    n = 10000000
+    present = rng.integers(0, 2 ** 62, size=n)
+    absent = rng.integers(2 ** 62, 2 ** 63, size=2000000)
+    probe = present[rng.integers(0, n, size=2000000)]
+
+    blocked = BlockedBloomFilter(n, 0.01)
+    k_std = max(1, round(blocked.m / n * math.log(2)))
+    standard = BloomFilter.from_params(blocked.m, k_std)
+    print("n=%d, m=%d bits (%.1f MB, %.2f bits/key), standard k=%d, blocked k=%d" % (
+        n, blocked.m, blocked.m / 8 / (1 << 20), blocked.m / n, k_std, WORDS))
+
+    for label, bf, predicted in (("standard", standard, false_positive_rate(standard.m, k_std, n)),
+                                 ("split-block", blocked, blocked_fpr(blocked.m, n))):
+        t0 = time.perf_counter()
+        bf.add_many(present)
+        t_add = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        hits = bf.contains_many(probe)
+        t_hit = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        fp = bf.contains_many(absent)
+        t_miss = time.perf_counter() - t0
+        print("%-12s add %5.2f M/s | query present %5.2f M/s (%.0f ns/key), absent %5.2f M/s | "
+              "FPR %.4f (predicted %.4f) | false negatives %d" % (
+                  label, n / t_add / 1e6, len(probe) / t_hit / 1e6, t_hit / len(probe) * 1e9,
+                  len(absent) / t_miss / 1e6, fp.mean(), predicted, len(probe) - int(hits.sum())))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -142,4 +142,274 @@ Deletes                 | No                      | Yes                    | Yes
 Space per key (typical) | Very low                | Higher (counters)      | Low–moderate
 Ops cost                | k probes/hashes         | k probes + counters    | 1–2 table lookups
 
-"""
\ No newline at end of file
+"""
+
+"""
+IMPLEMENTATION: BloomFilter
+------------------------------------------------------------
+- Sized from (n, p) with the formulas in section 2: m = ⌈−n ln p / (ln 2)²⌉, k = round((m/n) ln 2).
+- Bits packed in a NumPy uint64 array: bit i lives in word i >> 6, bit i & 63.
+- Hashing: every item becomes ONE 64-bit key (ints: the value mod 2^64; bytes/str:
+  an 8-byte blake2b digest). Two values are derived from it with the murmur3
+  64-bit finalizer (fmix64):
+      h1 = fmix64(key ^ seed),   h2 = fmix64(h1 + 0x9E3779B97F4A7C15) | 1   (odd)
+  and Kirsch–Mitzenmacher double hashing gives the k positions:
+      position_i = (h1 + i·h2 mod 2^64) mod m,   i = 0..k−1
+- add_many / contains_many do all of that for a whole batch with array operations:
+  a (B, k) matrix of positions, one scatter (bitwise_or.at) or one gather. An int
+  NumPy array is hashed without any per-item Python work; lists of bytes/str pay one
+  blake2b call per item and the rest is vectorized. add/contains (one item) use the
+  same arithmetic on Python ints, so single and batch calls always agree.
+- to_bytes()/from_bytes(): b"BLM1" | m u64 | k u32 | seed u64 | n u64 | words (little endian).
+  The header is 32 bytes (HEADER_SIZE; pack_header / unpack_header), so the words
+  stay 8-byte aligned when the blob is a file that gets memory-mapped (mmapbloom.py).
+- union_update(other): in-place OR; filters built separately with the same
+  (m, k, seed), e.g. over shards of the data, merge into the filter of the union.
+"""
+
+import math
+import struct
+from hashlib import blake2b
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+Item = Union[bytes, str, int]
+MAGIC = b"BLM1"
+_HEADER = struct.Struct("<4sQIQQ")     # magic, m, k, seed, n
+HEADER_SIZE = _HEADER.size
+MASK64 = (1 << 64) - 1
+_C1 = 0xFF51AFD7ED558CCD
+_C2 = 0xC4CEB9FE1A85EC53
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def optimal_params(n: int, p: float) -> Tuple[int, int]:
+    """(m bits, k hashes) for n items at false-positive rate p."""
+    if n <= 0 or not 0 < p < 1:
+        raise ValueError("need n > 0 and 0 < p < 1")
+    m = max(64, math.ceil(-n * math.log(p) / (math.log(2) ** 2)))
+    k = max(1, round(m / n * math.log(2)))
+    return m, k
+
+
+def false_positive_rate(m: int, k: int, n: int) -> float:
+    """Classic estimate p ≈ (1 − e^(−kn/m))^k."""
+    return (1.0 - math.exp(-k * n / m)) ** k
+
+
+def item_key(item: Item) -> int:
+    """The 64-bit key of one item."""
+    if isinstance(item, (int, np.integer)):
+        return int(item) & MASK64
+    if isinstance(item, str):
+        item = item.encode("utf-8")
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return int.from_bytes(blake2b(item, digest_size=8).digest(), "little")
+    raise TypeError("BloomFilter items must be bytes, str or int")
+
+
+def item_keys(items: Union[np.ndarray, Iterable[Item]]) -> np.ndarray:
+    """64-bit keys of a batch (vectorized for integer arrays)."""
+    if isinstance(items, np.ndarray) and items.dtype.kind in "iu":
+        return items.astype(np.uint64, copy=False).ravel()
+    return np.fromiter((item_key(x) for x in items), dtype=np.uint64)
+
+
+def fmix64(x: int) -> int:
+    """murmur3 64-bit finalizer: a bijective mixer of a 64-bit int."""
+    x ^= x >> 33
+    x = (x * _C1) & MASK64
+    x ^= x >> 33
+    x = (x * _C2) & MASK64
+    x ^= x >> 33
+    return x
+
+
+def fmix64_np(x: np.ndarray) -> np.ndarray:
+    """fmix64() for a uint64 array."""
+    x = x ^ (x >> np.uint64(33))
+    x *= np.uint64(_C1)
+    x ^= x >> np.uint64(33)
+    x *= np.uint64(_C2)
+    x ^= x >> np.uint64(33)
+    return x
+
+
+def hash_pair(key: int, seed: int) -> Tuple[int, int]:
+    """(h1, h2) for double hashing; h2 is odd."""
+    h1 = fmix64(key ^ seed)
+    h2 = fmix64((h1 + _GOLDEN) & MASK64) | 1
+    return h1, h2
+
+
+def hash_pair_np(keys: np.ndarray, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """hash_pair() for a uint64 array of keys."""
+    h1 = fmix64_np(keys ^ np.uint64(seed))
+    h2 = fmix64_np(h1 + np.uint64(_GOLDEN)) | np.uint64(1)
+    return h1, h2
+
+
+def pack_header(bf: "BloomFilter") -> bytes:
+    """The HEADER_SIZE-byte header of bf's serialized form (magic, m, k, seed, n)."""
+    return _HEADER.pack(MAGIC, bf.m, bf.k, bf.seed, bf.n)
+
+
+def unpack_header(buf) -> Tuple[bytes, int, int, int, int]:
+    """(magic, m, k, seed, n) from the first HEADER_SIZE bytes of buf."""
+    return _HEADER.unpack_from(buf)
+
+
+class BloomFilter:
+    """Classic Bloom filter: m bits in uint64 words, k probes by double hashing."""
+
+    def __init__(self, n: int, p: float = 0.01, seed: int = 0):
+        m, k = optimal_params(n, p)
+        self._init(m, k, seed)
+
+    def _init(self, m: int, k: int, seed: int) -> None:
+        self.m = m
+        self.k = k
+        self.seed = seed & MASK64
+        self.n = 0                      # number of add() calls (items, counting repeats)
+        self.words = np.zeros((m + 63) >> 6, dtype=np.uint64)
+
+    @classmethod
+    def from_params(cls, m: int, k: int, seed: int = 0) -> "BloomFilter":
+        bf = cls.__new__(cls)
+        bf._init(m, k, seed)
+        return bf
+
+    def _positions(self, item: Item):
+        h1, h2 = hash_pair(item_key(item), self.seed)
+        m = self.m
+        i = 0
+        while i < self.k:
+            yield ((h1 + i * h2) & MASK64) % m
+            i += 1
+
+    def _positions_np(self, keys: np.ndarray) -> np.ndarray:
+        """(B, k) matrix of bit positions."""
+        h1, h2 = hash_pair_np(keys, self.seed)
+        i = np.arange(self.k, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.m)
+
+    def add(self, item: Item) -> None:
+        words = self.words
+        for b in self._positions(item):
+            words[b >> 6] |= np.uint64(1 << (b & 63))
+        self.n += 1
+
+    def __contains__(self, item: Item) -> bool:
+        words = self.words
+        for b in self._positions(item):
+            if not (int(words[b >> 6]) >> (b & 63)) & 1:
+                return False
+        return True
+
+    def add_many(self, items: Union[np.ndarray, Iterable[Item]]) -> None:
+        """Add a whole batch (NumPy int array, or any iterable of items)."""
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return
+        pos = self._positions_np(keys).ravel()
+        np.bitwise_or.at(self.words, pos >> np.uint64(6),
+                         np.left_shift(np.uint64(1), pos & np.uint64(63)))
+        self.n += len(keys)
+
+    def contains_many(self, items: Union[np.ndarray, Iterable[Item]]) -> np.ndarray:
+        """Bool array: membership answer for every item of the batch."""
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return np.zeros(0, dtype=bool)
+        pos = self._positions_np(keys)
+        bits = (self.words[pos >> np.uint64(6)] >> (pos & np.uint64(63))) & np.uint64(1)
+        return bits.all(axis=1)
+
+    def union_update(self, other: "BloomFilter") -> None:
+        """OR other's bits into this filter (section 6); both need the same m, k and seed."""
+        if (self.m, self.k, self.seed) != (other.m, other.k, other.seed):
+            raise ValueError("can only merge Bloom filters with the same m, k and seed")
+        np.bitwise_or(self.words, other.words, out=self.words)
+        self.n += other.n
+
+    def fill_ratio(self) -> float:
+        """Fraction of bits set."""
+        return float(np.unpackbits(self.words.view(np.uint8)).sum()) / self.m
+
+    def expected_fpr(self) -> float:
+        """False-positive rate predicted from m, k and the number of adds."""
+        return false_positive_rate(self.m, self.k, self.n)
+
+    def to_bytes(self) -> bytes:
+        return pack_header(self) + self.words.astype("<u8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "BloomFilter":
+        magic, m, k, seed, n = unpack_header(blob)
+        if magic != MAGIC:
+            raise ValueError("not a Bloom filter blob")
+        bf = cls.from_params(m, k, seed)
+        words = np.frombuffer(blob, dtype="<u8", offset=HEADER_SIZE)
+        if len(words) != len(bf.words):
+            raise ValueError("Bloom filter blob has the wrong length")
+        bf.words[:] = words
+        bf.n = n
+        return bf
+
+
+def _tiny_demo():
+    """n = 1000, p = 1%: sizes from the formulas, no false negatives, measured FPR."""
+    bf = BloomFilter(1000, 0.01)
+    bf.add_many(np.arange(1000))
+    bf.add("hello")
+    print("m = %d bits, k = %d" % (bf.m, bf.k))
+    print("all added found:", bool(bf.contains_many(np.arange(1000)).all()), " 'hello' in bf:", "hello" in bf)
+    fpr = bf.contains_many(np.arange(10 ** 6, 2 * 10 ** 6)).mean()
+    print("measured FPR %.4f, expected %.4f" % (fpr, bf.expected_fpr()))
+
+
+def _benchmark():
+    """Batch vs one-call-per-item throughput, n = 1M, p = 1%."""
+    import time
+    rng = np.random.default_rng(0)
+    n = 1000000
+    present = rng.integers(0, 2 ** 62, size=n)
+    absent = rng.integers(2 ** 62, 2 ** 63, size=n)
+    bf = BloomFilter(n, 0.01)
+
+    t0 = time.perf_counter()
+    bf.add_many(present)
+    t_add = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    hit = bf.contains_many(present)
+    t_hit = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fp = bf.contains_many(absent)
+    t_miss = time.perf_counter() - t0
+
+    few = present[:50000].tolist()
+    scalar = BloomFilter(n, 0.01)
+    t0 = time.perf_counter()
+    for x in few:
+        scalar.add(x)
+    t_sadd = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for x in few:
+        x in scalar
+    t_sq = time.perf_counter() - t0
+
+    print("m = %d bits (%.1f MB), k = %d" % (bf.m, bf.m / 8 / (1 << 20), bf.k))
+    print("add_many:       %5.2f M items/s" % (n / t_add / 1e6))
+    print("contains_many:  %5.2f M queries/s (present), %5.2f M/s (absent)" % (n / t_hit / 1e6, n / t_miss / 1e6))
+    print("add (1 item):   %5.2f M items/s" % (len(few) / t_sadd / 1e6))
+    print("in  (1 item):   %5.2f M queries/s" % (len(few) / t_sq / 1e6))
+    print("false negatives: %d, measured FPR %.4f (expected %.4f)" % (n - int(hit.sum()), fp.mean(), bf.expected_fpr()))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
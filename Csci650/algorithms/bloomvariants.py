@@ -0,0 +1,304 @@
+"""
+Bloom Filter Variants: Scalable and Counting
+============================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+The two variants from section 5 of bloomfilter.py, built on its hashing:
+1) ScalableBloomFilter: no planned n needed; grows by adding larger slices while the
+   compound false-positive rate stays below the target p.
+2) CountingBloomFilter: 4-bit counters instead of bits, so items can be removed.
+Both report memory and FPR as they grow (see the demo).
+
+SCALABLE BLOOM FILTER (Almeida, Baquero, Preguiça, Hutchison)
+-------------------------------------------------------------
+Slices 0, 1, 2, ... are ordinary Bloom filters:
+  slice i: capacity n0 · s^i,   error p_i = p0 · r^i,   p0 = p · (1 − r)
+  (s = growth factor, e.g. 2; r = tightening ratio, 0.8–0.9 suggested for s = 2)
+New items go into the newest slice; when it has taken its capacity, a new slice is
+added. A query checks every slice, so
+  compound FPR = 1 − Π (1 − p_i)  ≤  Σ p_i  =  p0 · (1 + r + r² + ...)  =  p.
+Geometric capacities keep the number of slices O(log n), and the tightening
+ratio is what keeps the SUM of the slice error rates bounded.
+Bits per item → m_i/n_i = 1.44·log2(1/p_i), growing slowly (linearly in i) as
+slices get tighter; that is the price for not knowing n.
+
+COUNTING BLOOM FILTER
+---------------------
+Each of the m positions holds a 4-bit counter (two per byte, packed in a NumPy
+uint8 array). add: +1 on the k counters; remove: −1; query: all k counters > 0.
+- 4 bits are enough in practice: with optimal k the chance that any counter
+  reaches 16 is ≈ 1.37e−15 · m (Fan et al.). A counter that does reach 15 sticks
+  there (never decremented), so a later remove can never cause a false negative.
+- remove(x) of an item that was never added can cause false negatives for others,
+  so remove only decrements if x currently tests present.
+- Memory: 4× a plain Bloom filter for the same (n, p).
+Batch updates: positions that repeat inside one batch are merged with np.unique
+first; even and odd counters are written in separate passes so two counters in
+the same byte never overwrite each other.
+Batch removes give the same result as removing the entries one at a time: a key
+repeated c times in the batch loses min(c, what its counters can give) copies, and
+the batch only subtracts at once where the total demand on every counter fits in
+its value. Keys that compete for a counter (possible only when some of them were
+never added) fall back to one-at-a-time removal in input order.
+"""
+
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from bloomfilter import BloomFilter, Item, false_positive_rate, hash_pair_np, item_keys, optimal_params
+
+Items = Union[np.ndarray, Iterable[Item]]
+
+
+class ScalableBloomFilter:
+    """Bloom filter for an unknown number of items, compound FPR <= p."""
+
+    def __init__(self, p: float = 0.01, initial_capacity: int = 1024, growth: int = 2,
+                 ratio: float = 0.85, seed: int = 0):
+        if not 0 < p < 1 or not 0 < ratio < 1 or growth < 1 or initial_capacity < 1:
+            raise ValueError("need 0 < p < 1, 0 < ratio < 1, growth >= 1, initial_capacity >= 1")
+        self.p = p
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.ratio = ratio
+        self.seed = seed
+        self.slices: List[BloomFilter] = []
+        self.capacities: List[int] = []
+        self._add_slice()
+
+    def _add_slice(self) -> None:
+        i = len(self.slices)
+        capacity = self.initial_capacity * self.growth ** i
+        error = self.p * (1 - self.ratio) * self.ratio ** i
+        # a different seed per slice keeps the slices' false positives independent
+        self.slices.append(BloomFilter(capacity, error, seed=self.seed + i))
+        self.capacities.append(capacity)
+
+    def __len__(self) -> int:
+        return sum(s.n for s in self.slices)
+
+    def add(self, item: Item) -> None:
+        self.add_many([item])
+
+    def add_many(self, items: Items) -> None:
+        keys = item_keys(items)
+        start = 0
+        while start < len(keys):
+            last = self.slices[-1]
+            room = self.capacities[-1] - last.n
+            if room <= 0:
+                self._add_slice()
+                continue
+            last.add_many(keys[start:start + room])
+            start += room
+
+    def __contains__(self, item: Item) -> bool:
+        return bool(self.contains_many([item])[0])
+
+    def contains_many(self, items: Items) -> np.ndarray:
+        keys = item_keys(items)
+        hit = np.zeros(len(keys), dtype=bool)
+        for s in self.slices:
+            rest = ~hit
+            if not rest.any():
+                break
+            hit[rest] = s.contains_many(keys[rest])
+        return hit
+
+    def expected_fpr(self) -> float:
+        """Compound FPR from the current fill of every slice: 1 − Π(1 − p_i)."""
+        miss = 1.0
+        for s in self.slices:
+            miss *= 1.0 - s.expected_fpr()
+        return 1.0 - miss
+
+    def memory_bytes(self) -> int:
+        return sum(s.words.nbytes for s in self.slices)
+
+
+class CountingBloomFilter:
+    """Bloom filter with 4-bit saturating counters (two per byte); supports remove."""
+
+    MAX_COUNT = 15
+
+    def __init__(self, n: int, p: float = 0.01, seed: int = 0):
+        self.m, self.k = optimal_params(n, p)
+        self.seed = seed
+        self.n = 0                               # items currently added
+        self.counters = np.zeros((self.m + 1) >> 1, dtype=np.uint8)
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        """(B, k) counter positions, the same double hashing as BloomFilter."""
+        h1, h2 = hash_pair_np(keys, self.seed)
+        i = np.arange(self.k, dtype=np.uint64)
+        return ((h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.m)).astype(np.int64)
+
+    def _get(self, pos: np.ndarray) -> np.ndarray:
+        return (self.counters[pos >> 1] >> ((pos & 1) << 2).astype(np.uint8)) & np.uint8(15)
+
+    def _update(self, pos: np.ndarray, delta: int) -> None:
+        """Add delta (+1 / −1) once per occurrence in pos, saturating at 0 and 15."""
+        uniq, times = np.unique(pos, return_counts=True)
+        for parity in (0, 1):
+            sel = (uniq & 1) == parity
+            p = uniq[sel]
+            if len(p) == 0:
+                continue
+            shift = np.uint8(parity * 4)
+            old = (self.counters[p >> 1] >> shift) & np.uint8(15)
+            if delta > 0:
+                new = np.minimum(old.astype(np.int64) + times[sel], self.MAX_COUNT)
+            else:
+                # saturated counters are sticky: their true value is unknown
+                new = np.where(old == self.MAX_COUNT, self.MAX_COUNT,
+                               np.maximum(old.astype(np.int64) - times[sel], 0))
+            keep = self.counters[p >> 1] & np.uint8(0xF0 if parity == 0 else 0x0F)
+            self.counters[p >> 1] = keep | (new.astype(np.uint8) << shift)
+
+    def add(self, item: Item) -> None:
+        self.add_many([item])
+
+    def add_many(self, items: Items) -> None:
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return
+        self._update(self._positions(keys).ravel(), +1)
+        self.n += len(keys)
+
+    def __contains__(self, item: Item) -> bool:
+        return bool(self.contains_many([item])[0])
+
+    def contains_many(self, items: Items) -> np.ndarray:
+        keys = item_keys(items)
+        if len(keys) == 0:
+            return np.zeros(0, dtype=bool)
+        return (self._get(self._positions(keys)) > 0).all(axis=1)
+
+    def remove(self, item: Item) -> bool:
+        """Remove one occurrence of item. Returns False (and changes nothing) if absent."""
+        return bool(self.remove_many([item])[0])
+
+    def _removable(self, pos: np.ndarray) -> np.ndarray:
+        """Copies each row of positions could lose: min over its counters of value // uses."""
+        val = self._get(pos).astype(np.int64)
+        uses = (pos[:, :, None] == pos[:, None, :]).sum(axis=2)    # repeats within a row
+        return np.where(val == self.MAX_COUNT, np.iinfo(np.int64).max, val // uses).min(axis=1)
+
+    def remove_many(self, items: Items) -> np.ndarray:
+        """
+        Remove one occurrence per entry, where present; returns which entries were
+        removed. Same result as calling remove() on each entry in turn.
+        """
+        keys = item_keys(items)
+        out = np.zeros(len(keys), dtype=bool)
+        if len(keys) == 0:
+            return out
+        uniq, inv, times = np.unique(keys, return_inverse=True, return_counts=True)
+        inv = inv.ravel()
+        pos = self._positions(uniq)
+        take = np.minimum(times, self._removable(pos))
+
+        # counters whose total demand exceeds their value (and are not saturated)
+        cells, cell_inv = np.unique(pos.ravel(), return_inverse=True)
+        demand = np.bincount(cell_inv.ravel(), weights=np.repeat(take, self.k), minlength=len(cells))
+        value = self._get(cells)
+        short = (demand > value) & (value < self.MAX_COUNT)
+        conflict = short[cell_inv.ravel()].reshape(pos.shape).any(axis=1)
+
+        safe = ~conflict & (take > 0)
+        self._update(np.repeat(pos[safe], take[safe], axis=0).ravel(), -1)
+        # the first take[u] entries of each safe key are the removed ones
+        order = np.argsort(inv, kind="stable")
+        sorted_inv = inv[order]
+        occurrence = np.arange(len(keys)) - np.searchsorted(sorted_inv, sorted_inv)
+        out[order] = safe[sorted_inv] & (occurrence < take[sorted_inv])
+
+        for i in np.flatnonzero(conflict[inv]).tolist():
+            row = pos[inv[i]:inv[i] + 1]
+            if self._removable(row)[0] > 0:
+                self._update(row.ravel(), -1)
+                out[i] = True
+        self.n -= int(out.sum())
+        return out
+
+    def expected_fpr(self) -> float:
+        return false_positive_rate(self.m, self.k, self.n)
+
+    def saturated(self) -> int:
+        """Number of counters stuck at 15."""
+        lo = self.counters & np.uint8(15)
+        hi = self.counters >> np.uint8(4)
+        return int((lo == self.MAX_COUNT).sum() + (hi == self.MAX_COUNT).sum())
+
+    def memory_bytes(self) -> int:
+        return self.counters.nbytes
+
+
+def _tiny_demo():
+    """A scalable filter growing past its first slice, and add/remove on a counting filter."""
+    sbf = ScalableBloomFilter(p=0.01, initial_capacity=1000)
+    sbf.add_many(np.arange(20000))
+    fp = sbf.contains_many(np.arange(10 ** 6, 2 * 10 ** 6)).mean()
+    print("scalable: %d items, %d slices, %.1f KB, FPR measured %.4f, bound %.4f" % (
+        len(sbf), len(sbf.slices), sbf.memory_bytes() / 1024, fp, sbf.expected_fpr()))
+
+    cbf = CountingBloomFilter(1000, 0.01)
+    cbf.add_many(["apple", "pear", "plum"])
+    cbf.remove("pear")
+    print("counting: apple %s, pear %s, remove kiwi -> %s" % ("apple" in cbf, "pear" in cbf, cbf.remove("kiwi")))
+    cbf = CountingBloomFilter(1000, 0.01)
+    cbf.add_many(np.arange(50))
+    removed = cbf.remove_many(np.array([7, 7]))
+    print("counting: remove_many([7, 7]) -> %s, n = %d, %d of 49 others still present" % (
+        removed.tolist(), cbf.n, int(cbf.contains_many(np.delete(np.arange(50), 7)).sum())))
+
+
+def _grow_scalable(rng: np.random.Generator, probe: np.ndarray, ratio: float) -> None:
+    import time
+    print("scalable (p=1%%, n0=10k, s=2, r=%.2f):" % ratio)
+    sbf = ScalableBloomFilter(p=0.01, initial_capacity=10000, ratio=ratio)
+    total = 0
+    t0 = time.perf_counter()
+    for size in (10000, 100000, 1000000, 4000000):
+        sbf.add_many(rng.integers(0, 2 ** 62, size=size - total))
+        total = size
+        fp = sbf.contains_many(probe).mean()
+        print("  n=%8d  slices=%2d  %7.2f MB  %5.2f bits/item  FPR %.4f (bound %.4f)" % (
+            total, len(sbf.slices), sbf.memory_bytes() / (1 << 20), sbf.memory_bytes() * 8 / total,
+            fp, sbf.expected_fpr()))
+    print("  total %.2fs" % (time.perf_counter() - t0))
+
+
+def _benchmark():
+    """Memory and FPR while the sets grow (and, for counting, shrink again)."""
+    import time
+    rng = np.random.default_rng(0)
+    probe = rng.integers(2 ** 62, 2 ** 63, size=500000)
+
+    for ratio in (0.5, 0.85):
+        _grow_scalable(rng, probe, ratio)
+
+    print("counting (n=1M, p=1%):")
+    cbf = CountingBloomFilter(1000000, 0.01)
+    items = rng.integers(0, 2 ** 62, size=1000000)
+    t0 = time.perf_counter()
+    cbf.add_many(items)
+    t_add = time.perf_counter() - t0
+    print("  add 1M: %.2fs, %.2f MB, FPR %.4f (expected %.4f), saturated counters %d" % (
+        t_add, cbf.memory_bytes() / (1 << 20), cbf.contains_many(probe).mean(), cbf.expected_fpr(), cbf.saturated()))
+    t0 = time.perf_counter()
+    removed = cbf.remove_many(items[:500000])
+    t_rm = time.perf_counter() - t0
+    still = cbf.contains_many(items[500000:]).all()
+    print("  remove 500k: %.2fs (%d removed), remaining all present: %s, FPR %.4f (expected %.4f)" % (
+        t_rm, int(removed.sum()), bool(still), cbf.contains_many(probe).mean(), cbf.expected_fpr()))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -0,0 +1,426 @@
+"""
+Concurrent Skip List (lock-free readers, per-node writer locks)
+===============================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+ConcurrentSkipList: an ordered map shared by many threads (see "Concurrency notes"
+in skiplist.py). It is the "lazy" skip list of Herlihy, Lev, Luchangco and Shavit:
+  - get / contains / items never take a lock (wait-free reads)
+  - insert / delete lock only the few predecessor nodes they modify
+Plus a stress benchmark: read throughput as the number of reader threads grows,
+with one writer running the whole time.
+
+WHY READERS NEED NO LOCKS
+-------------------------
+Every change a reader can observe is ONE reference store into a forward-pointer
+slot (pred.next[ℓ] = node), which is atomic in CPython with or without the GIL.
+Writers order their stores so every intermediate state is a valid skip list:
+  insert: fill node.next[] completely, THEN link it bottom-up, THEN set fully_linked
+  delete: set marked (logical delete), THEN unlink it top-down
+A reader that lands on a half-inserted or half-deleted node still follows valid
+pointers; it only consults the two flags to decide whether the key "is there":
+  present ⇔ node found and fully_linked and not marked.
+Unlinked nodes keep their next[] pointers, so a reader standing on one can walk on
+(Python's GC is the memory reclamation; no hazard pointers needed).
+
+WRITERS (fine-grained locking)
+------------------------------
+1) Search without locks: preds[ℓ], succs[ℓ] on every level.
+2) Lock the distinct preds bottom-up (and, for delete, the victim first).
+   Preds on higher levels never have larger keys, so every thread takes locks in
+   decreasing key order ⇒ no deadlock.
+3) Validate: pred not marked, succ not marked, pred.next[ℓ] is still succ.
+   If anything changed in between, unlock and retry from 1).
+4) Do the reference stores, unlock.
+Writers on disjoint parts of the list never touch the same locks.
+
+FREE-THREADED CPYTHON
+---------------------
+On a GIL build, threads only interleave: total work is capped at one core, and
+what the benchmark shows is that readers are never blocked by the writer (reads/s
+beat the global-lock baseline at every thread count). On a free-threaded build
+(python3.13t+) readers run truly in parallel and reads/s grow with the thread count.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+from skiplist import Cursor
+
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "top", "lock", "marked", "fully_linked")
+
+    def __init__(self, key: Any, value: Any, height: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * height
+        self.top = height - 1
+        self.lock = threading.Lock()
+        self.marked = False
+        self.fully_linked = False
+
+
+class ConcurrentSkipList:
+    """Thread-safe ordered map: lock-free get/contains/items, per-node locks for writers."""
+
+    def __init__(self, p: float = 0.5, max_level: int = MAX_LEVEL, seed: Optional[int] = None):
+        if not 0 < p < 1:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.max_level = max_level
+        self.head = _Node(None, None, max_level)
+        self.head.fully_linked = True
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._size_lock = threading.Lock()
+        self._level = 1         # levels in use; only grows, lets readers skip empty head levels
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_height(self) -> int:
+        h = 1
+        while h < self.max_level and self._rng.random() < self.p:
+            h += 1
+        return h
+
+    def _find(self, key: Any, preds: List[_Node], succs: List[Optional[_Node]]) -> int:
+        """Fill preds/succs on every level; return the highest level where key was seen, or -1."""
+        found = -1
+        pred = self.head
+        lvl = self.max_level - 1
+        while lvl >= 0:
+            curr = pred.next[lvl]
+            while curr is not None and curr.key < key:
+                pred = curr
+                curr = pred.next[lvl]
+            if found == -1 and curr is not None and curr.key == key:
+                found = lvl
+            preds[lvl] = pred
+            succs[lvl] = curr
+            lvl -= 1
+        return found
+
+    def _lookup(self, key: Any) -> Optional[_Node]:
+        """Lock-free search for the node holding key (present or not)."""
+        pred = self.head
+        lvl = self._level - 1
+        curr = None
+        while lvl >= 0:
+            curr = pred.next[lvl]
+            while curr is not None and curr.key < key:
+                pred = curr
+                curr = pred.next[lvl]
+            if curr is not None and curr.key == key:
+                return curr
+            lvl -= 1
+        return None
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Wait-free read."""
+        node = self._lookup(key)
+        if node is not None and node.fully_linked and not node.marked:
+            return node.value
+        return default
+
+    def __contains__(self, key: Any) -> bool:
+        node = self._lookup(key)
+        return node is not None and node.fully_linked and not node.marked
+
+    @staticmethod
+    def _unlock(locked: List[_Node]) -> None:
+        for node in locked:
+            node.lock.release()
+
+    def insert(self, key: Any, value: Any = None) -> bool:
+        """Insert or overwrite key. Returns True if the key is new."""
+        top = self._random_height() - 1
+        preds: List[_Node] = [self.head] * self.max_level
+        succs: List[Optional[_Node]] = [None] * self.max_level
+        while True:
+            found = self._find(key, preds, succs)
+            if found != -1:
+                node = succs[found]
+                if not node.marked:
+                    # someone else is inserting it: wait until it is complete, then overwrite
+                    while not node.fully_linked:
+                        time.sleep(0)
+                    node.value = value
+                    return False
+                continue            # being deleted: retry until it is unlinked
+
+            locked: List[_Node] = []
+            valid = True
+            lvl = 0
+            while valid and lvl <= top:
+                pred = preds[lvl]
+                succ = succs[lvl]
+                if len(locked) == 0 or locked[-1] is not pred:
+                    pred.lock.acquire()
+                    locked.append(pred)
+                valid = (not pred.marked and (succ is None or not succ.marked)
+                         and pred.next[lvl] is succ)
+                lvl += 1
+            if not valid:
+                self._unlock(locked)
+                continue
+
+            node = _Node(key, value, top + 1)
+            lvl = 0
+            while lvl <= top:
+                node.next[lvl] = succs[lvl]
+                lvl += 1
+            lvl = 0
+            while lvl <= top:
+                preds[lvl].next[lvl] = node        # the linearizing stores
+                lvl += 1
+            node.fully_linked = True
+            self._unlock(locked)
+            with self._size_lock:
+                self._size += 1
+                if top + 1 > self._level:
+                    self._level = top + 1
+            return True
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.insert(key, value)
+
+    def delete(self, key: Any) -> bool:
+        """Remove key. Returns False if it was not present."""
+        preds: List[_Node] = [self.head] * self.max_level
+        succs: List[Optional[_Node]] = [None] * self.max_level
+        victim: Optional[_Node] = None
+        is_marked = False
+        top = -1
+        while True:
+            found = self._find(key, preds, succs)
+            if not is_marked:
+                if found == -1:
+                    return False
+                victim = succs[found]
+                # only delete a complete node, found at its own top level
+                if not (victim.fully_linked and victim.top == found and not victim.marked):
+                    return False
+                top = victim.top
+                victim.lock.acquire()
+                if victim.marked:
+                    victim.lock.release()
+                    return False
+                victim.marked = True           # logical delete: readers stop seeing it
+                is_marked = True
+
+            locked: List[_Node] = []
+            valid = True
+            lvl = 0
+            while valid and lvl <= top:
+                pred = preds[lvl]
+                if len(locked) == 0 or locked[-1] is not pred:
+                    pred.lock.acquire()
+                    locked.append(pred)
+                valid = not pred.marked and pred.next[lvl] is victim
+                lvl += 1
+            if not valid:
+                self._unlock(locked)
+                continue
+
+            lvl = top
+            while lvl >= 0:
+                preds[lvl].next[lvl] = victim.next[lvl]
+                lvl -= 1
+            victim.lock.release()
+            self._unlock(locked)
+            with self._size_lock:
+                self._size -= 1
+            return True
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        Lock-free, weakly consistent scan in key order: every key present for the
+        whole scan is reported, keys inserted or deleted meanwhile may or may not be.
+        """
+        node = self.head.next[0]
+        while node is not None:
+            if node.fully_linked and not node.marked:
+                yield node.key, node.value
+            node = node.next[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        for k, _ in self.items():
+            yield k
+
+    def cursor(self) -> "ConcurrentCursor":
+        return ConcurrentCursor(self)
+
+    def range(self, a: Any, b: Any) -> Iterator[Tuple[Any, Any]]:
+        """Lazy, lock-free (weakly consistent) scan of a <= key <= b."""
+        c = ConcurrentCursor(self)
+        c.seek(a)
+        while c.valid() and not b < c.key():
+            yield c.key(), c.value()
+            c.next()
+
+
+class ConcurrentCursor(Cursor):
+    """
+    Lock-free cursor: holds one node reference. Safe while writers run; it steps over
+    marked / half-inserted nodes, and a node deleted under it still links onward.
+    """
+    __slots__ = ("sl", "node")
+
+    def __init__(self, sl: ConcurrentSkipList):
+        self.sl = sl
+        self.node: Optional[_Node] = None
+        self.seek_first()
+
+    def _settle(self, node: Optional[_Node]) -> None:
+        while node is not None and (node.marked or not node.fully_linked):
+            node = node.next[0]
+        self.node = node
+
+    def seek(self, key: Any) -> None:
+        pred = self.sl.head
+        lvl = self.sl._level - 1
+        while lvl >= 0:
+            curr = pred.next[lvl]
+            while curr is not None and curr.key < key:
+                pred = curr
+                curr = pred.next[lvl]
+            lvl -= 1
+        self._settle(pred.next[0])
+
+    def seek_first(self) -> None:
+        self._settle(self.sl.head.next[0])
+
+    def valid(self) -> bool:
+        return self.node is not None
+
+    def key(self) -> Any:
+        return self.node.key
+
+    def value(self) -> Any:
+        return self.node.value
+
+    def next(self) -> None:
+        self._settle(self.node.next[0])
+
+
+def _tiny_demo():
+    """Four writers insert disjoint keys while two readers scan; then check the result."""
+    s = ConcurrentSkipList(seed=1)
+    stop = threading.Event()
+    scans: List[int] = []
+
+    def writer(w: int):
+        for k in range(w, 4000, 4):
+            s.insert(k, -k)
+        for k in range(w, 4000, 8):
+            s.delete(k)
+
+    def reader():
+        while not stop.is_set():
+            keys = list(s)
+            assert keys == sorted(keys)
+            scans.append(len(keys))
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    expected = [k for k in range(4000) if k % 8 >= 4]
+    print("size:", len(s), " contents ok:", list(s) == expected, " reader scans:", len(scans))
+    print("get(5) =", s.get(5), " get(4) =", s.get(4))
+
+
+def _benchmark():
+    """Reads/second with 1..8 reader threads and one busy writer, vs one global lock."""
+    import sys
+    from skiplist import SkipList
+
+    n = 100000
+    duration = 1.0
+    keys = list(range(0, 2 * n, 2))
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("GIL enabled:", gil)
+
+    cs = ConcurrentSkipList(seed=0)
+    for k in keys:
+        cs.insert(k, k)
+    locked = SkipList(((k, k) for k in keys), seed=0)
+    big_lock = threading.Lock()
+
+    def lockfree_get(k):
+        return cs.get(k)
+
+    def lockfree_put(k):
+        cs.insert(k, k)
+        cs.delete(k)
+
+    def locked_get(k):
+        with big_lock:
+            return locked.get(k)
+
+    def locked_put(k):
+        with big_lock:
+            locked.insert(k, k)
+        with big_lock:
+            locked.delete(k)
+
+    def run(get, put, readers: int) -> Tuple[float, float]:
+        stop = threading.Event()
+        counts = [0] * (readers + 1)
+
+        def reader(i: int):
+            r = random.Random(i)
+            c = 0
+            while not stop.is_set():
+                j = 0
+                while j < 100:
+                    get(r.randrange(2 * n))
+                    j += 1
+                c += 100
+            counts[i] = c
+
+        def writer():
+            r = random.Random(99)
+            c = 0
+            while not stop.is_set():
+                put(2 * r.randrange(n) + 1)
+                c += 1
+            counts[readers] = c
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+        return sum(counts[:readers]) / duration, counts[readers] / duration
+
+    print("%8s %22s %22s" % ("readers", "lock-free reads/s", "global-lock reads/s"))
+    for readers in (1, 2, 4, 8):
+        lf, lf_w = run(lockfree_get, lockfree_put, readers)
+        gl, gl_w = run(locked_get, locked_put, readers)
+        print("%8d %14.0f (w %5.0f) %14.0f (w %5.0f)" % (readers, lf, lf_w, gl, gl_w))
+    print("contents intact after the runs:", list(cs) == keys and list(locked) == keys)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
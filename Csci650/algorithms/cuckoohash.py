@@ -0,0 +1,401 @@
+"""
+Cuckoo Hash Map for int64 keys (bucketized, d hash functions)
+=============================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+CuckooHashMap: an int64 → int64 dictionary stored in two parallel NumPy arrays
+(keys, values) instead of Python objects, using cuckoo hashing
+(randomizedalgorithms.py, section 5 (C)): exact answers, worst-case O(1) lookups,
+randomized (Las Vegas) insert time with rebuild-on-failure.
+- get_many / put_many / delete_many: whole batches with array operations
+- stats: kicks, rehashes (new hash functions) and grows (bigger table)
+Plus a benchmark against a Python dict: memory per entry and throughput.
+
+LAYOUT
+------
+keys, values: int64 arrays of shape (M buckets, b slots), b = 4 by default.
+Empty slot: key == EMPTY (the smallest int64). That one key value is kept
+outside the table. Occupied slots of a bucket are at the FRONT of the row.
+Memory: 16 bytes per slot, 16 / load bytes per entry (≈ 17–18 at 90% load).
+A Python dict of ints needs ≈ 100 bytes per entry (hash table entry + two int objects).
+
+HASH FUNCTIONS (universal family)
+---------------------------------
+d ≥ 2 functions, multiply-add-shift (Dietzfelbinger):
+  h_i(x) = ⌊ ((a_i · x + c_i) mod 2^64) / 2^32 ⌋       a_i random odd, c_i random
+  bucket_i(x) = ⌊ h_i(x) · M / 2^32 ⌋                  (multiply-high, no modulo)
+Random (a_i, c_i) make the buckets of distinct keys behave like independent choices;
+drawing new ones is the "fresh randomness" of a Las Vegas restart.
+
+OPERATIONS
+----------
+lookup(x): look at the b slots of each of the d buckets of x → at most d·b
+  comparisons, ALWAYS (no probe sequences, no chains): worst-case O(1).
+insert(x): an existing key is updated in place. A new key goes into any free slot of
+  its d buckets; if all are full, evict a random slot of one of them and move the
+  victim to another of ITS buckets, repeating up to max_kicks times.
+  A chain that does not end means a bad hash function (or a full table):
+  REHASH = draw new hash functions and reinsert everything; after 3 failed
+  rehashes at one size, the table doubles. Load is kept ≤ max_load by growing
+  before a batch that would exceed it.
+Load limits (random keys): d = 2, b = 4 → ≈ 93–95%; d = 3, b = 4 → ≈ 98%.
+
+BATCHES
+-------
+put_many: duplicate keys inside a batch: last value wins (np.unique on the reversed
+batch, only if a plain sort shows duplicates). Existing keys are updated with one
+gather + scatter. New keys try bucket 1, then 2, ..., d, all keys at once: the rank
+of a key among the keys aiming at the same bucket decides who gets the free slots.
+Ranks come from ONE np.sort of (bucket << 32 | index) packed in a uint64, ~5x
+faster than argsort. The remaining keys become kick chains advanced together, one
+eviction per bucket per round.
+get_many: gather the d rows of every key (B, b), compare, pick the values.
+delete_many: the last occupied slot moves into the hole; at most one deletion per
+bucket per round, so moves never collide.
+"""
+
+import math
+from typing import Dict, Tuple
+
+import numpy as np
+
+EMPTY = np.iinfo(np.int64).min
+MASK64 = (1 << 64) - 1
+
+
+class CuckooHashMap:
+    """int64 -> int64 map: parallel NumPy arrays, d-ary bucketized cuckoo hashing."""
+
+    def __init__(self, capacity: int = 1024, num_hashes: int = 2, bucket_size: int = 4,
+                 max_load: float = 0.9, max_kicks: int = 500, seed: int = 0):
+        if num_hashes < 2 or bucket_size < 1 or not 0 < max_load <= 1 or capacity < 0:
+            raise ValueError("need num_hashes >= 2, bucket_size >= 1, 0 < max_load <= 1, capacity >= 0")
+        self.d = num_hashes
+        self.b = bucket_size
+        self.max_load = max_load
+        self.max_kicks = max_kicks
+        self._rng = np.random.default_rng(seed)
+        self.n = 0                                 # entries in the table
+        self._has_empty = False                    # the key EMPTY lives outside the table
+        self._empty_value = 0
+        self.stats: Dict[str, int] = {"kicks": 0, "rehashes": 0, "grows": 0}
+        self._new_table(max(1, math.ceil(capacity / (bucket_size * max_load))))
+
+    def _new_table(self, buckets: int) -> None:
+        if buckets >= 1 << 32:
+            raise ValueError("too many buckets for 32-bit bucket hashing")
+        self.buckets = buckets
+        self.keys = np.full((buckets, self.b), EMPTY, dtype=np.int64)
+        self.values = np.zeros((buckets, self.b), dtype=np.int64)
+        self.n = 0
+        self._a = self._rng.integers(0, 2 ** 64, size=self.d, dtype=np.uint64) | np.uint64(1)
+        self._c = self._rng.integers(0, 2 ** 64, size=self.d, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return self.n + self._has_empty
+
+    def capacity(self) -> int:
+        return self.buckets * self.b
+
+    def load_factor(self) -> float:
+        return self.n / self.capacity()
+
+    def memory_bytes(self) -> int:
+        return self.keys.nbytes + self.values.nbytes
+
+    def _bucket(self, i: int, key: int) -> int:
+        h = ((int(self._a[i]) * (key & MASK64) + int(self._c[i])) & MASK64) >> 32
+        return (h * self.buckets) >> 32
+
+    def _bucket_np(self, i: int, keys: np.ndarray) -> np.ndarray:
+        h = (self._a[i] * keys.astype(np.uint64) + self._c[i]) >> np.uint64(32)
+        return ((h * np.uint64(self.buckets)) >> np.uint64(32)).astype(np.int64)
+
+    def _locate(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(bucket, slot, found) of every key; bucket/slot are meaningless where not found."""
+        bucket = np.zeros(len(keys), dtype=np.int64)
+        slot = np.zeros(len(keys), dtype=np.int64)
+        found = np.zeros(len(keys), dtype=bool)
+        # EMPTY would match every empty slot; it is never in the table
+        real = keys != EMPTY
+        i = 0
+        while i < self.d:
+            rows = self._bucket_np(i, keys)
+            eq = self.keys[rows] == keys[:, None]
+            hit = eq.any(axis=1) & real & ~found
+            bucket[hit] = rows[hit]
+            slot[hit] = eq[hit].argmax(axis=1)
+            found |= hit
+            i += 1
+        return bucket, slot, found
+
+    def get_many(self, keys: np.ndarray, default: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, found) for a batch of keys; values[j] = default where not found."""
+        keys = np.asarray(keys, dtype=np.int64).ravel()
+        bucket, slot, found = self._locate(keys)
+        out = np.full(len(keys), default, dtype=np.int64)
+        out[found] = self.values[bucket[found], slot[found]]
+        if self._has_empty:
+            special = keys == EMPTY
+            out[special] = self._empty_value
+            found |= special
+        return out, found
+
+    def contains_many(self, keys: np.ndarray) -> np.ndarray:
+        return self.get_many(keys)[1]
+
+    def get(self, key: int, default=None):
+        key = int(key)
+        if key == EMPTY:
+            return self._empty_value if self._has_empty else default
+        i = 0
+        while i < self.d:
+            bkt = self._bucket(i, key)
+            row = self.keys[bkt].tolist()
+            if key in row:
+                return int(self.values[bkt, row.index(key)])
+            i += 1
+        return default
+
+    def __getitem__(self, key: int) -> int:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def __setitem__(self, key: int, value: int) -> None:
+        self.put_many(np.array([key], dtype=np.int64), np.array([value], dtype=np.int64))
+
+    def __delitem__(self, key: int) -> None:
+        if self.delete_many(np.array([key], dtype=np.int64)) == 0:
+            raise KeyError(key)
+
+    def _place(self, keys: np.ndarray, values: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """Write (keys[j], values[j]) into a free slot of bucket target[j] where there is room."""
+        # sort (bucket, index) pairs packed in one uint64: np.sort is much faster than argsort
+        packed = np.sort((target.astype(np.uint64) << np.uint64(32)) | np.arange(len(target), dtype=np.uint64))
+        order = (packed & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        sb = (packed >> np.uint64(32)).astype(np.int64)
+        pos = np.arange(len(sb))
+        first = np.ones(len(sb), dtype=bool)
+        first[1:] = sb[1:] != sb[:-1]
+        rank = pos - np.maximum.accumulate(np.where(first, pos, 0))
+        used = np.count_nonzero(self.keys[sb] != EMPTY, axis=1)
+        put = rank < self.b - used
+        rows = sb[put]
+        slots = used[put] + rank[put]
+        self.keys[rows, slots] = keys[order[put]]
+        self.values[rows, slots] = values[order[put]]
+        placed = np.zeros(len(keys), dtype=bool)
+        placed[order[put]] = True
+        self.n += len(rows)
+        return placed
+
+    def _insert_new(self, keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Insert keys that are not in the table. Returns the (keys, values) left homeless."""
+        i = 0
+        while i < self.d and len(keys) > 0:
+            placed = self._place(keys, values, self._bucket_np(i, keys))
+            keys = keys[~placed]
+            values = values[~placed]
+            i += 1
+        if len(keys) == 0:
+            return keys, values
+
+        # kick chains: (key, value) looking for a home in bucket target
+        rng = self._rng
+        choice = rng.integers(0, self.d, size=len(keys))
+        target = np.choose(choice, [self._bucket_np(j, keys) for j in range(self.d)])
+        kicks = np.zeros(len(keys), dtype=np.int64)
+        homeless_k = []
+        homeless_v = []
+        while len(keys) > 0:
+            placed = self._place(keys, values, target)
+            keys, values, target, kicks = keys[~placed], values[~placed], target[~placed], kicks[~placed]
+            if len(keys) == 0:
+                break
+            _, now = np.unique(target, return_index=True)
+            rows = target[now]
+            slots = rng.integers(0, self.b, size=len(now))
+            vk = self.keys[rows, slots]
+            vv = self.values[rows, slots]
+            self.keys[rows, slots] = keys[now]
+            self.values[rows, slots] = values[now]
+            keys[now] = vk
+            values[now] = vv
+            # the victim moves to one of its OTHER buckets
+            options = np.stack([self._bucket_np(j, vk) for j in range(self.d)])
+            j = rng.integers(0, self.d, size=len(now))
+            nxt = options[j, np.arange(len(now))]
+            same = nxt == rows
+            nxt[same] = options[(j[same] + 1) % self.d, np.flatnonzero(same)]
+            target[now] = nxt
+            kicks[now] += 1
+            self.stats["kicks"] += len(now)
+            give_up = kicks >= self.max_kicks
+            homeless_k.append(keys[give_up])
+            homeless_v.append(values[give_up])
+            keys, values, target, kicks = keys[~give_up], values[~give_up], target[~give_up], kicks[~give_up]
+        return np.concatenate(homeless_k), np.concatenate(homeless_v)
+
+    def _rebuild(self, buckets: int, keys: np.ndarray, values: np.ndarray) -> None:
+        """New hash functions (and size); reinsert the table plus (keys, values). Las Vegas loop."""
+        occupied = self.keys != EMPTY
+        keys = np.concatenate([self.keys[occupied], keys])
+        values = np.concatenate([self.values[occupied], values])
+        failures = 0
+        while True:
+            self._new_table(buckets)
+            hk, _ = self._insert_new(keys, values)
+            if len(hk) == 0:
+                return
+            failures += 1
+            self.stats["rehashes"] += 1
+            if failures % 3 == 0:
+                buckets *= 2
+                self.stats["grows"] += 1
+
+    def put_many(self, keys: np.ndarray, values) -> None:
+        """Insert or update a batch (values: array or one scalar). Duplicate keys: last wins."""
+        keys = np.asarray(keys, dtype=np.int64).ravel()
+        values = np.broadcast_to(np.asarray(values, dtype=np.int64), keys.shape)
+        special = keys == EMPTY
+        if special.any():
+            self._has_empty = True
+            self._empty_value = int(values[np.flatnonzero(special)[-1]])
+            keys = keys[~special]
+            values = values[~special]
+        # last occurrence of every key (checking with a plain sort first: batches are usually distinct)
+        s = np.sort(keys)
+        if (s[1:] == s[:-1]).any():
+            keys, last = np.unique(keys[::-1], return_index=True)
+            values = values[::-1][last]
+
+        if self.n > 0:
+            bucket, slot, found = self._locate(keys)
+            self.values[bucket[found], slot[found]] = values[found]
+            keys = keys[~found]
+            values = values[~found]
+        if len(keys) == 0:
+            return
+
+        need = self.n + len(keys)
+        if need > self.max_load * self.capacity():
+            self.stats["grows"] += 1
+            self._rebuild(max(2 * self.buckets, math.ceil(need / (self.b * self.max_load))), keys, values)
+            return
+        hk, hv = self._insert_new(keys, values)
+        if len(hk) > 0:
+            self.stats["rehashes"] += 1
+            self._rebuild(self.buckets, hk, hv)
+
+    def delete_many(self, keys: np.ndarray) -> int:
+        """Delete a batch of keys; returns how many were present."""
+        keys = np.unique(np.asarray(keys, dtype=np.int64).ravel())
+        removed = 0
+        if self._has_empty and (keys == EMPTY).any():
+            self._has_empty = False
+            removed += 1
+        keys = keys[keys != EMPTY]
+        while len(keys) > 0:
+            bucket, slot, found = self._locate(keys)
+            keys = keys[found]
+            bucket = bucket[found]
+            slot = slot[found]
+            if len(keys) == 0:
+                break
+            # one deletion per bucket in this round
+            _, now = np.unique(bucket, return_index=True)
+            rows = bucket[now]
+            last = np.count_nonzero(self.keys[rows] != EMPTY, axis=1) - 1
+            self.keys[rows, slot[now]] = self.keys[rows, last]
+            self.values[rows, slot[now]] = self.values[rows, last]
+            self.keys[rows, last] = EMPTY
+            self.n -= len(now)
+            removed += len(now)
+            rest = np.ones(len(keys), dtype=bool)
+            rest[now] = False
+            keys = keys[rest]
+        return removed
+
+    def items(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(keys, values) of all entries, in table order."""
+        occupied = self.keys != EMPTY
+        keys = self.keys[occupied]
+        values = self.values[occupied]
+        if self._has_empty:
+            keys = np.append(keys, EMPTY)
+            values = np.append(values, self._empty_value)
+        return keys, values
+
+
+def _tiny_demo():
+    """A few scalar operations, then a batch that forces growing and kicks."""
+    m = CuckooHashMap(capacity=8)
+    m[10] = 100
+    m[-3] = 7
+    m[10] = 101
+    print("m[10] = %d, m[-3] = %d, 5 in m: %s, len %d" % (m[10], m[-3], 5 in m, len(m)))
+    keys = np.arange(0, 200000, 7)
+    m.put_many(keys, keys * 2)
+    vals, found = m.get_many(np.array([0, 7, 8, 10]), default=-1)
+    print("get_many([0, 7, 8, 10]) ->", vals, found)
+    del m[7]
+    print("after del m[7]: %s; len %d, %d buckets, load %.2f, stats %s" % (
+        m.get(7), len(m), m.buckets, m.load_factor(), m.stats))
+
+
+def _benchmark():
+    """10M random int64 keys: CuckooHashMap vs dict (memory per entry, throughput)."""
+    import time
+    import tracemalloc
+    rng = np.random.default_rng(0)
+    n = 10000000
+    keys = rng.integers(-2 ** 62, 2 ** 62, size=n)
+    values = rng.integers(0, 2 ** 40, size=n)
+    misses = rng.integers(2 ** 62, 2 ** 63 - 1, size=n)
+
+    for d in (2, 3):
+        m = CuckooHashMap(capacity=n, num_hashes=d, max_load=0.9 if d == 2 else 0.97)
+        t0 = time.perf_counter()
+        m.put_many(keys, values)
+        t_put = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got, found = m.get_many(keys)
+        t_hit = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        _, found_miss = m.get_many(misses)
+        t_miss = time.perf_counter() - t0
+        ok = bool(found.all() and np.array_equal(got, values) and not found_miss.any())
+        print("cuckoo d=%d b=4: load %.3f, %.1f bytes/entry | put_many %.2f M/s | get_many hit %.2f M/s, "
+              "miss %.2f M/s | correct: %s | stats %s" % (
+                  d, m.load_factor(), m.memory_bytes() / n, n / t_put / 1e6, n / t_hit / 1e6,
+                  n / t_miss / 1e6, ok, m.stats))
+
+    # fresh Python ints, as a program that built the dict itself would have them
+    kl = keys.tolist()
+    vl = values.tolist()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    d = dict(zip(kl, vl))
+    t_put = time.perf_counter() - t0
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for k in kl:
+        d[k]
+    t_hit = time.perf_counter() - t0
+    print("dict: %.1f bytes/entry for the table (+ %d bytes per int key/value object) | build %.2f M/s | "
+          "lookup loop %.2f M/s" % (dict_bytes / n, kl[0].__sizeof__(), n / t_put / 1e6, n / t_hit / 1e6))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
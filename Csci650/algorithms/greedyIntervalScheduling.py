@@ -0,0 +1,325 @@
+"""
+Interval Scheduling (Greedy: earliest finish time) with an Interval Index
+========================================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+IntervalIndex: a store of half-open intervals [start, end) that supports
+  - bulk_load(intervals): sort once, build everything
+  - insert(start, end): online insertion, no re-sort of the whole set
+  - overlaps(a, b): every stored interval that overlaps [a, b)
+  - schedule(): a maximum set of pairwise compatible intervals, kept up to date
+    on every insert
+
+GREEDY RULE (see greedy.py)
+---------------------------
+Repeatedly take the compatible interval that finishes first. Equivalently, with
+  next(t) = the interval with the earliest end among those with start ≥ t,
+the schedule is the chain  c1 = next(−∞), c2 = next(end(c1)), c3 = next(end(c2)), ...
+Stay-ahead: after i picks, greedy's last end is ≤ that of any other i compatible picks.
+Ties are broken by (end, start, id) everywhere so the chain is well defined.
+
+INCREMENTAL UPDATE ON INSERT
+----------------------------
+Let t_0 = −∞, t_i = end(c_i). Inserting x changes next(t_i) only for the chain state
+t_i = last chain end ≤ start(x), and only if x finishes before c_{i+1}.
+- If not, the schedule is unchanged (O(log n) check).
+- If yes, x replaces c_{i+1}: keep c_1..c_i, add x, then follow next() from end(x)
+  until the new chain picks an interval that is already on the old chain; from
+  there on both chains are identical, so the old tail is reused.
+
+OVERLAP QUERIES: O(log n + k)
+-----------------------------
+[s, e) overlaps [a, b)  ⇔  s < b  and  e > a.
+That is a 2-sided range query on points (s, e), which a priority search tree (PST)
+answers in O(log n + k):
+  - node = the interval with the LARGEST end in its subtree (heap on end),
+  - the other intervals are split by the median start into left/right (BST on start).
+Query: prune a subtree as soon as its root has e ≤ a (nothing below ends later);
+only enter a right subtree if its smallest start is < b.
+
+Online inserts (Bentley–Saxe logarithmic method):
+Keep static PSTs in levels; level i holds at most 2^i intervals. Insert = new
+level-0 structure; while the target level is occupied, merge with it (the runs are
+already sorted by start, so the merge is linear) and move up. Each interval is
+rebuilt O(log n) times ⇒ O(log² n) amortized insert; queries visit O(log n) levels
+⇒ O(log² n + k) (O(log n + k) right after bulk_load, when there is one level).
+
+next(t) per level: starts sorted + suffix-min of (end, start, id) ⇒ one bisect.
+"""
+
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Iterable, List, Optional, Tuple
+
+Key = Tuple[float, float, int]     # (end, start, id): greedy order
+
+
+class _PrioritySearchTree:
+    """Static PST over intervals sorted by start, plus the next(t) table."""
+
+    def __init__(self, items: List[Tuple[float, float, int]]):
+        # items: (start, end, id) sorted by start
+        self.items = items
+        self.starts: List[float] = [s for s, _, _ in items]
+
+        # suffix minimum of (end, start, id) for next(t)
+        self.suffix_min: List[Optional[Key]] = [None] * (len(items) + 1)
+        i = len(items) - 1
+        best: Optional[Key] = None
+        while i >= 0:
+            s, e, idx = items[i]
+            if best is None or (e, s, idx) < best:
+                best = (e, s, idx)
+            self.suffix_min[i] = best
+            i -= 1
+
+        # tree nodes in parallel lists
+        self.n_start: List[float] = []
+        self.n_end: List[float] = []
+        self.n_id: List[int] = []
+        self.n_split: List[float] = []   # smallest start in the right subtree
+        self.n_left: List[int] = []
+        self.n_right: List[int] = []
+        self.root = self._build(items)
+
+    def _build(self, items: List[Tuple[float, float, int]]) -> int:
+        if len(items) == 0:
+            return -1
+        top = 0
+        i = 1
+        while i < len(items):
+            if items[i][1] > items[top][1]:
+                top = i
+            i += 1
+        s, e, idx = items[top]
+        rest = items[:top] + items[top + 1:]
+        mid = len(rest) // 2
+
+        node = len(self.n_start)
+        self.n_start.append(s)
+        self.n_end.append(e)
+        self.n_id.append(idx)
+        self.n_split.append(rest[mid][0] if mid < len(rest) else 0)
+        self.n_left.append(-1)
+        self.n_right.append(-1)
+        left = self._build(rest[:mid])
+        right = self._build(rest[mid:])
+        self.n_left[node] = left
+        self.n_right[node] = right
+        return node
+
+    def overlaps(self, a: float, b: float, out: List[int]) -> None:
+        """Append ids of intervals with start < b and end > a."""
+        stack: List[int] = [self.root] if self.root != -1 else []
+        while len(stack) > 0:
+            v = stack.pop()
+            if self.n_end[v] <= a:
+                continue            # heap on end: nothing below ends after a
+            if self.n_start[v] < b:
+                out.append(self.n_id[v])
+            if self.n_left[v] != -1:
+                stack.append(self.n_left[v])
+            if self.n_right[v] != -1 and self.n_split[v] < b:
+                stack.append(self.n_right[v])
+
+    def next_after(self, t: float) -> Optional[Key]:
+        """Earliest-finishing interval (as a Key) with start >= t, or None."""
+        return self.suffix_min[bisect_left(self.starts, t)]
+
+
+class IntervalIndex:
+    """Half-open intervals [start, end) with overlap queries and a maintained greedy schedule."""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float]] = ()):
+        self.start: List[float] = []
+        self.end: List[float] = []
+        self.levels: List[Optional[_PrioritySearchTree]] = []
+        self.chain: List[int] = []          # ids of the greedy schedule, in order
+        self.chain_ends: List[float] = []   # end of each chain interval (increasing)
+        self.chain_keys: List[Key] = []
+        self.bulk_load(intervals)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def interval(self, idx: int) -> Tuple[float, float]:
+        return self.start[idx], self.end[idx]
+
+    def _add(self, s: float, e: float) -> int:
+        if not s < e:
+            raise ValueError("interval needs start < end")
+        self.start.append(s)
+        self.end.append(e)
+        return len(self.start) - 1
+
+    def bulk_load(self, intervals: Iterable[Tuple[float, float]]) -> List[int]:
+        """
+        Add many intervals at once: one sort, one PST, one greedy pass.
+        Returns their ids.
+        """
+        ids = [self._add(s, e) for s, e in intervals]
+        if len(ids) == 0:
+            return ids
+        items = sorted((self.start[i], self.end[i], i) for i in range(len(self.start)))
+        # everything goes into one level (the smallest with room for it)
+        level = max(0, (len(items) - 1).bit_length())
+        self.levels = [None] * (level + 1)
+        self.levels[level] = _PrioritySearchTree(items)
+
+        # greedy: scan by (end, start, id), take whatever starts after the last end
+        self.chain = []
+        self.chain_ends = []
+        self.chain_keys = []
+        last = float("-inf")
+        for e, s, i in sorted((self.end[i], self.start[i], i) for i in range(len(self.start))):
+            if s >= last:
+                self._chain_append((e, s, i))
+                last = e
+        return ids
+
+    def insert(self, s: float, e: float) -> int:
+        """Add one interval; updates the index and the greedy schedule. Returns its id."""
+        idx = self._add(s, e)
+
+        # logarithmic method: merge full levels upward
+        carry = [(s, e, idx)]
+        level = 0
+        while True:
+            if level == len(self.levels):
+                self.levels.append(None)
+            tree = self.levels[level]
+            if tree is not None:
+                carry = list(merge(carry, tree.items))
+                self.levels[level] = None
+            if len(carry) <= (1 << level) and self.levels[level] is None:
+                self.levels[level] = _PrioritySearchTree(carry)
+                break
+            level += 1
+
+        self._update_schedule((e, s, idx))
+        return idx
+
+    def overlaps(self, a: float, b: float) -> List[int]:
+        """Ids of all intervals overlapping [a, b) (start < b and end > a)."""
+        out: List[int] = []
+        for tree in self.levels:
+            if tree is not None:
+                tree.overlaps(a, b, out)
+        return out
+
+    def schedule(self) -> List[int]:
+        """Ids of the greedy (earliest-finish) schedule, in time order."""
+        return list(self.chain)
+
+    def _next(self, t: float) -> Optional[Key]:
+        """next(t) over all levels."""
+        best: Optional[Key] = None
+        for tree in self.levels:
+            if tree is not None:
+                k = tree.next_after(t)
+                if k is not None and (best is None or k < best):
+                    best = k
+        return best
+
+    def _chain_append(self, key: Key) -> None:
+        self.chain.append(key[2])
+        self.chain_ends.append(key[0])
+        self.chain_keys.append(key)
+
+    def _update_schedule(self, x: Key) -> None:
+        e, s, idx = x
+        # i = number of chain intervals ending at or before start(x): state t_i
+        i = bisect_right(self.chain_ends, s)
+        if i < len(self.chain) and not x < self.chain_keys[i]:
+            return                       # x does not beat c_{i+1}: schedule unchanged
+
+        old_pos = {self.chain[j]: j for j in range(i, len(self.chain))}
+        tail_ids = self.chain[i:]
+        tail_ends = self.chain_ends[i:]
+        tail_keys = self.chain_keys[i:]
+        del self.chain[i:]
+        del self.chain_ends[i:]
+        del self.chain_keys[i:]
+
+        self._chain_append(x)
+        t = e
+        while True:
+            k = self._next(t)
+            if k is None:
+                return
+            j = old_pos.get(k[2])
+            if j is not None:
+                # rejoined the old chain: the rest is identical
+                j -= i
+                self.chain.extend(tail_ids[j:])
+                self.chain_ends.extend(tail_ends[j:])
+                self.chain_keys.extend(tail_keys[j:])
+                return
+            self._chain_append(k)
+            t = k[0]
+
+
+def _tiny_demo():
+    """
+    Bookings (half-open hours):
+      0:[9,11) 1:[10,12) 2:[11,13) 3:[12,14) 4:[8,10)
+    Greedy: [8,10), [10,12), [12,14)  -> ids 4, 1, 3
+    Inserting [10,11) replaces [10,12), and then [11,13) finishes first.
+    """
+    idx = IntervalIndex([(9, 11), (10, 12), (11, 13), (12, 14), (8, 10)])
+    print("schedule:", [idx.interval(i) for i in idx.schedule()])
+    print("overlaps [10.5, 11.5):", sorted(idx.interval(i) for i in idx.overlaps(10.5, 11.5)))
+    idx.insert(10, 11)
+    print("after insert [10,11):", [idx.interval(i) for i in idx.schedule()])
+
+
+def _benchmark():
+    """Online inserts with incremental schedule vs re-running greedy after each insert."""
+    import random
+    import time
+    rng = random.Random(0)
+    base = [(s, s + rng.uniform(0.1, 5)) for s in (rng.uniform(0, 10000) for _ in range(100000))]
+    extra = [(s, s + rng.uniform(0.1, 5)) for s in (rng.uniform(0, 10000) for _ in range(2000))]
+
+    t0 = time.perf_counter()
+    idx = IntervalIndex(base)
+    t_bulk = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for s, e in extra:
+        idx.insert(s, e)
+    t_inc = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hits = 0
+    for _ in range(10000):
+        a = rng.uniform(0, 10000)
+        hits += len(idx.overlaps(a, a + 2))
+    t_q = time.perf_counter() - t0
+
+    # baseline: re-sort and re-run greedy after each of the first 50 inserts
+    t0 = time.perf_counter()
+    data = list(base)
+    for s, e in extra[:50]:
+        data.append((s, e))
+        last = float("-inf")
+        count = 0
+        for e2, s2 in sorted((b, a) for a, b in data):
+            if s2 >= last:
+                count += 1
+                last = e2
+    t_naive = (time.perf_counter() - t0) / 50 * len(extra)
+
+    print("bulk load 100k:          %.2fs" % t_bulk)
+    print("2000 online inserts:     %.2fs  (schedule size %d)" % (t_inc, len(idx.schedule())))
+    print("re-sort per insert (est): %.2fs" % t_naive)
+    print("10k overlap queries:     %.2fs  (%d hits)" % (t_q, hits))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -0,0 +1,204 @@
+"""
+Minimum Spanning Tree: Kruskal and Borůvka
+==========================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+1) DisjointSet: array-backed union-find (parent[] and rank[] lists, no node objects)
+   - find(x): path halving (every node on the walk points to its grandparent)
+   - union(a, b): union by rank (attach the shorter tree under the taller one)
+   Both together give ~O(α(V)) amortized per operation.
+
+2) kruskal(): sort the NumPy edge array ONCE with argsort, then scan edges in
+   nondecreasing weight and keep an edge iff it joins two different components.
+
+3) boruvka(): "parallel" MST. Every round, EVERY component picks its cheapest
+   outgoing edge at the same time, and all of those are added together.
+   The components at least halve each round, so there are ≤ log2 V rounds, and
+   each round is a handful of whole-array NumPy passes:
+     - drop edges whose endpoints are already in the same component
+     - group-by-min: cheapest edge per component (np.minimum.at over edge ranks)
+     - hook each component to the component across its cheapest edge and
+       collapse the hooks by pointer jumping (the new component labels)
+
+CORRECTNESS (cut property, see greedy.py)
+-----------------------------------------
+- Kruskal: an accepted edge is the lightest edge across the cut
+  (its component, everything else).
+- Borůvka: a component's cheapest outgoing edge is the lightest edge across the
+  cut (component, everything else), so all picks are safe at the same time.
+  Ties must be broken consistently (by edge rank here), otherwise equal
+  weights can close a cycle.
+
+GRAPH FORMAT
+------------
+- n: number of vertices (0..n-1)
+- edges: NumPy array (or list) with rows (u, v, w), undirected
+- Result: (total weight, indices of the chosen edges into `edges`)
+- Disconnected graph -> minimum spanning forest.
+
+COMPLEXITY
+----------
+- Kruskal: O(E log E) sort + O(E α(V)) union-find (the scan is a Python loop).
+- Borůvka: O(E log V) total, all of it in vectorized passes.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class DisjointSet:
+    """Union-find over 0..n-1 stored in two flat lists."""
+
+    def __init__(self, n: int):
+        self.parent: List[int] = list(range(n))
+        self.rank: List[int] = [0] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]   # path halving
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets of a and b. Returns False if they were already together."""
+        ra = self.find(a)
+        rb = self.find(b)
+        if ra == rb:
+            return False
+        if self.rank[ra] < self.rank[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        if self.rank[ra] == self.rank[rb]:
+            self.rank[ra] += 1
+        return True
+
+
+def _split(edges: Sequence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Edge rows (u, v, w) -> separate u, v (int64) and w (float64) arrays."""
+    e = np.asarray(edges, dtype=np.float64).reshape(-1, 3)
+    return e[:, 0].astype(np.int64), e[:, 1].astype(np.int64), e[:, 2]
+
+
+def kruskal(n: int, edges: Sequence) -> Tuple[float, np.ndarray]:
+    """
+    Kruskal's MST (minimum spanning forest if disconnected).
+    Returns (total weight, indices of the MST edges).
+    """
+    u, v, w = _split(edges)
+    order = np.argsort(w)
+    us = u[order].tolist()
+    vs = v[order].tolist()
+
+    dsu = DisjointSet(n)
+    chosen: List[int] = []
+    i = 0
+    m = len(us)
+    while i < m and len(chosen) < n - 1:
+        if dsu.union(us[i], vs[i]):
+            chosen.append(i)
+        i += 1
+
+    picked = order[np.asarray(chosen, dtype=np.int64)]
+    return float(w[picked].sum()), np.sort(picked)
+
+
+def boruvka(n: int, edges: Sequence) -> Tuple[float, np.ndarray]:
+    """
+    Borůvka's MST with vectorized rounds (minimum spanning forest if disconnected).
+    Returns (total weight, indices of the MST edges).
+    """
+    u, v, w = _split(edges)
+    m = len(w)
+    # strict total order on edges: position in one argsort by weight
+    by_rank = np.argsort(w)
+    rank = np.empty(m, dtype=np.int64)
+    rank[by_rank] = np.arange(m, dtype=np.int64)
+
+    in_mst = np.zeros(m, dtype=bool)
+    ids = np.arange(n, dtype=np.int64)
+    no_edge = np.iinfo(np.int64).max
+    # live edges, carried as (rank, component of u, component of v)
+    r = rank
+    cu = u
+    cv = v
+
+    while True:
+        crossing = cu != cv
+        r = r[crossing]
+        cu = cu[crossing]
+        cv = cv[crossing]
+        if len(r) == 0:
+            break
+
+        # group-by-min: cheapest crossing edge (by rank) for every component
+        best = np.full(n, no_edge, dtype=np.int64)
+        np.minimum.at(best, cu, r)
+        np.minimum.at(best, cv, r)
+        in_mst[by_rank[best[best != no_edge]]] = True
+
+        # hook every component to the one across its cheapest edge
+        hook = ids.copy()
+        sel = r == best[cu]
+        hook[cu[sel]] = cv[sel]
+        sel = r == best[cv]
+        hook[cv[sel]] = cu[sel]
+        # two components that picked the same edge point at each other: smaller one becomes the root
+        roots = (hook[hook] == ids) & (ids < hook)
+        hook[roots] = ids[roots]
+
+        # pointer jumping until every component points at its root
+        while True:
+            nxt = hook[hook]
+            if np.array_equal(nxt, hook):
+                break
+            hook = nxt
+        cu = hook[cu]
+        cv = hook[cv]
+
+    chosen = np.flatnonzero(in_mst)
+    return float(w[chosen].sum()), chosen
+
+
+def _tiny_demo():
+    """
+    The MST example in greedy.py: A-B:1, B-C:2, C-D:3, A-C:4, B-D:5
+    (A=0, B=1, C=2, D=3) -> picks A-B, B-C, C-D, total 6.
+    """
+    edges = [(0, 1, 1.0), (1, 2, 2.0), (2, 3, 3.0), (0, 2, 4.0), (1, 3, 5.0)]
+    print("kruskal:", kruskal(4, edges))
+    print("boruvka:", boruvka(4, edges))
+
+
+def _benchmark():
+    """Kruskal vs vectorized Borůvka on a random graph."""
+    import time
+    rng = np.random.default_rng(0)
+    n = 1000000
+    m = 5000000
+    edges = np.empty((m, 3), dtype=np.float64)
+    edges[:, 0] = rng.integers(0, n, size=m)
+    edges[:, 1] = rng.integers(0, n, size=m)
+    edges[:, 2] = rng.random(m)
+
+    t0 = time.perf_counter()
+    total_k, _ = kruskal(n, edges)
+    t_k = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    total_b, _ = boruvka(n, edges)
+    t_b = time.perf_counter() - t0
+
+    print("n=%d m=%d" % (n, m))
+    print("kruskal: %.2fs  weight=%.6f" % (t_k, total_k))
+    print("boruvka: %.2fs  weight=%.6f" % (t_b, total_b))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
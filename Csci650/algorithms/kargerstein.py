@@ -0,0 +1,286 @@
+"""
+Global Min Cut: Karger–Stein (Monte Carlo)
+==========================================
+
+------------------------------------------------------------
+1) Problem
+------------------------------------------------------------
+Undirected graph G = (V, E) with non-negative edge weights. A global cut splits V into
+two non-empty sides (S, V−S); its value is the total weight of edges crossing it.
+Find a cut of minimum value. (No s and t: an s–t max flow answers a different question,
+and trying every (s, t) pair costs n² max flows.)
+
+------------------------------------------------------------
+2) Karger's contraction
+------------------------------------------------------------
+Repeat until 2 super-vertices remain:
+  pick an edge at random (probability ∝ weight), merge its endpoints, drop self-loops.
+The two remaining super-vertices are the two sides of a cut.
+
+Why it works: a fixed min cut C survives one contraction step from i vertices with
+probability ≥ 1 − 2/i (every vertex has degree ≥ |C|, so E ≥ i·|C|/2).
+Contracting from n down to t vertices keeps C with probability ≥ t(t−1) / (n(n−1)).
+
+Contraction = Kruskal on a random edge order:
+Shuffle the edges once (weighted: sort by Exp(w) keys) and union endpoints with a
+union-find until t components remain. Same distribution, O(E log E) per contraction.
+
+------------------------------------------------------------
+3) Karger–Stein recursion
+------------------------------------------------------------
+Plain contraction to 2 vertices succeeds with probability only ≥ 2/n², which is
+why it must be repeated O(n² log n) times. Failure mostly happens near the end, so:
+
+KS(G):
+  if |V| ≤ 6: brute force
+  t = ⌈1 + |V|/√2⌉
+  G1 = contract(G, t);  G2 = contract(G, t)     (independent)
+  return min(KS(G1), KS(G2))
+
+Each contraction to t keeps C with probability ≥ 1/2, so
+  P(n) ≥ 1 − (1 − P(t)/2)².
+With p_k = success probability k levels above the base case: p_{k+1} ≥ p_k − p_k²/4, p_0 = 1,
+which gives p_k ≥ 1/(k+1). Depth is ≈ 2 log2 n, so one trial succeeds with
+probability Ω(1 / log n) in O(n² log n) time.
+
+------------------------------------------------------------
+4) Amplification (Monte Carlo, see randomizedalgorithms.py)
+------------------------------------------------------------
+Run T independent trials and keep the smallest cut:
+  P(miss the min cut) ≤ (1 − p)^T.
+T = ⌈ln(1/δ) / −ln(1 − p)⌉ trials push the failure probability below δ.
+Trials are independent, so they run in parallel (one seed per worker).
+"""
+
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+Edge = Tuple[int, int, float]
+
+BASE_CASE = 6
+
+
+def recursion_depth(n: int) -> int:
+    """Number of Karger–Stein levels above the brute-force base case for n vertices."""
+    depth = 0
+    while n > BASE_CASE:
+        n = math.ceil(1 + n / math.sqrt(2))
+        depth += 1
+    return depth
+
+
+def trial_success_bound(n: int) -> float:
+    """Lower bound 1/(depth+1) on the chance that one trial finds a min cut."""
+    return 1.0 / (recursion_depth(n) + 1)
+
+
+def success_probability(n: int, trials: int) -> float:
+    """Lower bound on finding a min cut in `trials` independent trials."""
+    p = trial_success_bound(n)
+    return 1.0 - (1.0 - p) ** trials
+
+
+def trials_for(n: int, failure: float) -> int:
+    """Number of trials so that P(miss the min cut) <= failure."""
+    p = trial_success_bound(n)
+    if p >= 1.0:
+        return 1
+    return max(1, math.ceil(math.log(1.0 / failure) / -math.log(1.0 - p)))
+
+
+def _find(parent: List[int], x: int) -> int:
+    """Union-find root with path halving."""
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _contract(n: int, edges: List[Edge], target: int, rng: random.Random) -> Tuple[int, List[Edge], List[int]]:
+    """
+    Contract random edges (probability ∝ weight) until `target` super-vertices remain.
+    Returns (new n, merged edge list without self-loops, label[old vertex] -> new vertex).
+    """
+    keyed = [(rng.expovariate(w) if w > 0 else math.inf, i) for i, (_, _, w) in enumerate(edges)]
+    keyed.sort()
+
+    parent = list(range(n))
+    comps = n
+    for _, i in keyed:
+        if comps <= target:
+            break
+        u, v, _ = edges[i]
+        ru = _find(parent, u)
+        rv = _find(parent, v)
+        if ru != rv:
+            parent[ru] = rv
+            comps -= 1
+
+    label: List[int] = [-1] * n
+    root_id: Dict[int, int] = {}
+    x = 0
+    while x < n:
+        r = _find(parent, x)
+        if r not in root_id:
+            root_id[r] = len(root_id)
+        label[x] = root_id[r]
+        x += 1
+
+    # merge parallel edges so deeper levels stay small
+    merged: Dict[Tuple[int, int], float] = {}
+    for u, v, w in edges:
+        a = label[u]
+        b = label[v]
+        if a == b:
+            continue
+        if a > b:
+            a, b = b, a
+        merged[(a, b)] = merged.get((a, b), 0) + w
+    return comps, [(a, b, w) for (a, b), w in merged.items()], label
+
+
+def _brute_force(n: int, edges: List[Edge]) -> Tuple[float, List[bool]]:
+    """Try every split (vertex n-1 fixed on the far side)."""
+    best = math.inf
+    best_mask = 0
+    mask = 1
+    while mask < (1 << (n - 1)):
+        value = 0
+        for u, v, w in edges:
+            if ((mask >> u) & 1) != ((mask >> v) & 1):
+                value += w
+        if value < best:
+            best = value
+            best_mask = mask
+        mask += 1
+    return best, [((best_mask >> x) & 1) == 1 for x in range(n)]
+
+
+def _karger_stein(n: int, edges: List[Edge], rng: random.Random) -> Tuple[float, List[bool]]:
+    """One Karger–Stein trial. Returns (cut value, side[vertex])."""
+    if n <= BASE_CASE:
+        return _brute_force(n, edges)
+
+    t = math.ceil(1 + n / math.sqrt(2))
+    best = math.inf
+    best_side: List[bool] = []
+    for _ in range(2):
+        m, sub_edges, label = _contract(n, edges, t, rng)
+        value, sub_side = _karger_stein(m, sub_edges, rng)
+        if value < best:
+            best = value
+            best_side = [sub_side[label[x]] for x in range(n)]
+    return best, best_side
+
+
+def _run_trials(args: Tuple[int, List[Edge], int, int]) -> Tuple[float, List[bool]]:
+    """Worker: `count` independent trials with its own seed; returns the best cut."""
+    n, edges, count, seed = args
+    rng = random.Random(seed)
+    best = math.inf
+    best_side: List[bool] = []
+    i = 0
+    while i < count:
+        value, side = _karger_stein(n, edges, rng)
+        if value < best:
+            best = value
+            best_side = side
+        i += 1
+    return best, best_side
+
+
+def _components(n: int, edges: List[Edge]) -> List[int]:
+    """Component label per vertex (edges of weight 0 do not connect)."""
+    parent = list(range(n))
+    for u, v, w in edges:
+        if w > 0:
+            ru = _find(parent, u)
+            rv = _find(parent, v)
+            if ru != rv:
+                parent[ru] = rv
+    return [_find(parent, x) for x in range(n)]
+
+
+def global_min_cut(n: int, edges: List[Edge], trials: Optional[int] = None, workers: int = 1,
+                   seed: Optional[int] = None) -> Tuple[float, List[int], float]:
+    """
+    Karger–Stein global min cut of an undirected weighted graph.
+    - n: number of vertices (0..n-1), n >= 2
+    - edges: list of (u, v, w) with w >= 0
+    - trials: independent trials (default: enough for failure probability <= 1/n)
+    - workers: processes to spread the trials over (1 = run here)
+    - seed: base seed; each worker gets its own seed derived from it
+
+    Returns (cut value, vertices on one side, lower bound on P(value is the min cut)).
+    """
+    if n < 2:
+        raise ValueError("a cut needs at least 2 vertices")
+    if trials is not None and trials < 1:
+        raise ValueError("trials must be at least 1")
+
+    # disconnected graph: a component is a cut of value 0 (exact, no randomness needed)
+    comp = _components(n, edges)
+    if any(c != comp[0] for c in comp):
+        return 0, [x for x in range(n) if comp[x] == comp[0]], 1.0
+
+    if trials is None:
+        trials = trials_for(n, 1.0 / n)
+    workers = max(1, min(workers, trials))
+
+    seeder = random.Random(seed)
+    jobs = []
+    i = 0
+    while i < workers:
+        count = trials // workers + (1 if i < trials % workers else 0)
+        jobs.append((n, edges, count, seeder.getrandbits(64)))
+        i += 1
+
+    if workers == 1:
+        results = [_run_trials(jobs[0])]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_trials, jobs))
+
+    best = math.inf
+    best_side: List[bool] = []
+    for value, side in results:
+        if value < best:
+            best = value
+            best_side = side
+    return best, [x for x in range(n) if best_side[x]], success_probability(n, trials)
+
+
+def _tiny_demo():
+    """
+    Two triangles {0,1,2} and {3,4,5} (weight 3 edges) joined by 2-3 (weight 1)
+    and 0-5 (weight 1). Global min cut = 2, separating the triangles.
+    """
+    edges = [(0, 1, 3.0), (1, 2, 3.0), (0, 2, 3.0),
+             (3, 4, 3.0), (4, 5, 3.0), (3, 5, 3.0),
+             (2, 3, 1.0), (0, 5, 1.0),
+             (6, 0, 5.0), (7, 3, 5.0)]
+    value, side, bound = global_min_cut(8, edges, seed=1)
+    print("min cut:", value, "side:", side, "P(correct) >= %.6f" % bound)
+
+
+def _benchmark():
+    """Same trial budget on 1 vs 4 workers."""
+    import time
+    rng = random.Random(5)
+    n = 150
+    edges = [(u, v, 1.0) for u in range(n) for v in range(u + 1, n) if rng.random() < 0.1]
+    trials = 8
+    for workers in (1, 4):
+        t0 = time.perf_counter()
+        value, _, bound = global_min_cut(n, edges, trials=trials, workers=workers, seed=1)
+        print("workers=%d: %.2fs  cut=%s  P(correct) >= %.4f" % (workers, time.perf_counter() - t0, value, bound))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
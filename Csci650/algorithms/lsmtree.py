@@ -0,0 +1,522 @@
+"""
+LSM Tree: embedded key-value store
+==================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+LSMTree: a write-optimized key -> value store (bytes -> bytes) in one directory,
+built from the pieces in skiplist.py and bloomfilter.py:
+  - memtable: a SkipList holding the newest writes in sorted order
+  - runs: immutable sorted files ("SSTables"), one per memtable flush
+  - a Bloom filter per run, so point lookups skip runs that cannot hold the key
+  - background compaction that merges runs into one
+Plus a benchmark for write throughput and read amplification.
+
+WRITE PATH
+----------
+put/delete go into the memtable only (O(log n) in memory, no disk I/O).
+When it reaches memtable_bytes it is written out, in key order, as a new run:
+one sequential write. A delete is a tombstone entry that hides older values.
+Note: there is no write-ahead log; unflushed writes are lost if the process dies
+without close().
+
+READ PATH
+---------
+get(key): memtable first, then runs from newest to oldest; the first hit wins
+(a tombstone hit means "deleted"). Per run:
+  1) Bloom filter says "definitely not here" -> skip the run, no I/O.
+  2) sparse index (first key of every ~4 KB block, kept in memory) + bisect
+     -> exactly one block to read and scan.
+Read amplification = runs probed and blocks read per get; compaction keeps the
+number of runs small, the Bloom filters keep blocks read ≈ 1 (p·runs extra).
+
+RANGE SCANS
+-----------
+scan(lo, hi): one cursor per source (memtable + every run, newest first) merged by a
+MergeCursor; the first version of each key wins. Streaming: one decoded block per
+run in memory. Runs a scan is reading are pinned; compaction deletes them only
+after the scan finishes.
+
+RUN FILE FORMAT
+---------------
+data blocks  : entries (key len u32, value len u32 | 0xFFFFFFFF = tombstone, key, value)
+index        : per block (first key len u32, offset u64, length u32, first key)
+bloom        : BloomFilter.to_bytes()
+footer       : index offset, index length, bloom offset, bloom length, entry count (u64 each), b"LSM1"
+A run is named run-<lo>-<hi>.sst: the range of flush sequence numbers it covers.
+Higher hi = newer data.
+
+COMPACTION
+----------
+When compact_trigger runs exist, a background thread merges ALL of them (loser-tree
+MergeCursor from mergescan.py, newest version of every key wins). The merge includes the
+oldest data, so tombstones can be dropped. The output covers [min lo, max hi];
+runs flushed meanwhile are newer and stay in front of it. New file first
+(written to .tmp, then renamed), then old files are deleted. A crash in between
+leaves runs whose range lies inside another run's; they are deleted on open.
+"""
+
+import os
+import re
+import struct
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bloomfilter import BloomFilter
+from mergescan import MergeCursor
+from skiplist import END, Cursor, SkipList
+
+MAGIC = b"LSM1"
+BLOCK_SIZE = 4096
+MEMTABLE_BYTES = 4 << 20
+COMPACT_TRIGGER = 4
+BLOOM_P = 0.01
+
+_ENTRY = struct.Struct("<II")
+_INDEX_ENTRY = struct.Struct("<IQI")
+_FOOTER = struct.Struct("<QQQQQ4s")
+_TOMBSTONE_LEN = 0xFFFFFFFF
+_RUN_NAME = re.compile(r"^run-(\d+)-(\d+)\.sst$")
+
+_TOMBSTONE = object()     # memtable value for a deleted key
+_MISSING = object()
+
+Entry = Tuple[bytes, Optional[bytes]]    # value None = tombstone
+
+
+def _run_name(lo: int, hi: int) -> str:
+    return "run-%010d-%010d.sst" % (lo, hi)
+
+
+def _write_run(path: str, entries: Iterator[Entry], n: int,
+               bloom_p: Optional[float], block_size: int) -> int:
+    """Write sorted entries as a run file (via .tmp + rename). Returns bytes written."""
+    bloom = BloomFilter(max(n, 1), bloom_p) if bloom_p else None
+    index: List[Tuple[bytes, int, int]] = []
+    count = 0
+    offset = 0
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        block = bytearray()
+        first = b""
+        for key, value in entries:
+            if len(block) == 0:
+                first = key
+            if value is None:
+                block += _ENTRY.pack(len(key), _TOMBSTONE_LEN)
+                block += key
+            else:
+                block += _ENTRY.pack(len(key), len(value))
+                block += key
+                block += value
+            if bloom is not None:
+                bloom.add(key)
+            count += 1
+            if len(block) >= block_size:
+                f.write(block)
+                index.append((first, offset, len(block)))
+                offset += len(block)
+                block = bytearray()
+        if len(block) > 0:
+            f.write(block)
+            index.append((first, offset, len(block)))
+            offset += len(block)
+
+        idx = bytearray()
+        for key, off, length in index:
+            idx += _INDEX_ENTRY.pack(len(key), off, length)
+            idx += key
+        blob = bloom.to_bytes() if bloom is not None else b""
+        f.write(idx)
+        f.write(blob)
+        f.write(_FOOTER.pack(offset, len(idx), offset + len(idx), len(blob), count, MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def _parse_block(block: bytes) -> Iterator[Entry]:
+    pos = 0
+    end = len(block)
+    while pos < end:
+        klen, vlen = _ENTRY.unpack_from(block, pos)
+        pos += _ENTRY.size
+        key = block[pos:pos + klen]
+        pos += klen
+        if vlen == _TOMBSTONE_LEN:
+            yield key, None
+        else:
+            yield key, block[pos:pos + vlen]
+            pos += vlen
+
+
+class _Run:
+    """One immutable run file: sparse index and Bloom filter in memory, blocks on disk."""
+
+    def __init__(self, path: str, lo: int, hi: int):
+        self.path = path
+        self.lo = lo
+        self.hi = hi
+        self.f = open(path, "rb")
+        self._io = threading.Lock()
+        self.pins = 0              # open scans using this run (guarded by LSMTree._lock)
+        self.retired = False       # compacted away; delete once pins drops to 0
+        self.f.seek(-_FOOTER.size, os.SEEK_END)
+        index_off, index_len, bloom_off, bloom_len, self.count, magic = _FOOTER.unpack(self.f.read(_FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError("not a run file: %s" % path)
+        self.data_end = index_off
+
+        self.first_keys: List[bytes] = []
+        self.offsets: List[int] = []
+        self.lengths: List[int] = []
+        self.f.seek(index_off)
+        idx = self.f.read(index_len)
+        pos = 0
+        while pos < len(idx):
+            klen, off, length = _INDEX_ENTRY.unpack_from(idx, pos)
+            pos += _INDEX_ENTRY.size
+            self.first_keys.append(idx[pos:pos + klen])
+            self.offsets.append(off)
+            self.lengths.append(length)
+            pos += klen
+        self.bloom: Optional[BloomFilter] = None
+        if bloom_len > 0:
+            self.f.seek(bloom_off)
+            self.bloom = BloomFilter.from_bytes(self.f.read(bloom_len))
+
+    def _read_block(self, i: int) -> bytes:
+        with self._io:
+            self.f.seek(self.offsets[i])
+            return self.f.read(self.lengths[i])
+
+    def get(self, key: bytes, stats: Dict[str, int]) -> Tuple[bool, Optional[bytes]]:
+        """(found, value); found with value None = tombstone."""
+        if self.bloom is not None and key not in self.bloom:
+            stats["bloom_skips"] += 1
+            return False, None
+        i = bisect_right(self.first_keys, key) - 1
+        if i < 0:
+            return False, None
+        stats["blocks_read"] += 1
+        for k, v in _parse_block(self._read_block(i)):
+            if k == key:
+                return True, v
+            if k > key:
+                break
+        return False, None
+
+    def cursor(self) -> "_RunCursor":
+        return _RunCursor(self)
+
+    def close(self) -> None:
+        self.f.close()
+
+    def destroy(self) -> None:
+        self.f.close()
+        os.remove(self.path)
+
+
+class _RunCursor(Cursor):
+    """Cursor over a run file: holds one decoded block, reads the next one on demand."""
+    __slots__ = ("run", "block", "entries", "pos")
+
+    def __init__(self, run: _Run):
+        self.run = run
+        self.seek_first()
+
+    def _load(self, i: int) -> None:
+        self.block = i
+        self.entries = list(_parse_block(self.run._read_block(i))) if i < len(self.run.offsets) else []
+        self.pos = 0
+
+    def seek_first(self) -> None:
+        self._load(0)
+
+    def seek(self, key: bytes) -> None:
+        self._load(max(bisect_right(self.run.first_keys, key) - 1, 0))
+        while self.valid() and self.key() < key:
+            self.next()
+
+    def valid(self) -> bool:
+        return self.pos < len(self.entries)
+
+    def key(self) -> bytes:
+        return self.entries[self.pos][0]
+
+    def value(self) -> Optional[bytes]:
+        return self.entries[self.pos][1]
+
+    def next(self) -> None:
+        self.pos += 1
+        if self.pos == len(self.entries) and self.block + 1 < len(self.run.offsets):
+            self._load(self.block + 1)
+
+    def next_key(self) -> Any:
+        self.next()
+        return self.entries[self.pos][0] if self.pos < len(self.entries) else END
+
+
+def _newest_versions(merge: MergeCursor, hi: Optional[bytes], drop_tombstones: bool) -> Iterator[Entry]:
+    """
+    First (= newest, sources are ordered newest first) version of every key from a
+    merged cursor, up to key hi (inclusive, None = no limit).
+    """
+    last = None
+    while merge.valid():
+        key = merge.key()
+        if hi is not None and key > hi:
+            return
+        if key != last:
+            last = key
+            value = merge.value()
+            if value is _TOMBSTONE:
+                value = None
+            if value is not None or not drop_tombstones:
+                yield key, value
+        merge.next()
+
+
+class LSMTree:
+    """Embedded LSM key-value store (bytes -> bytes) kept in `directory`."""
+
+    def __init__(self, directory: str, memtable_bytes: int = MEMTABLE_BYTES,
+                 block_size: int = BLOCK_SIZE, bloom_p: Optional[float] = BLOOM_P,
+                 compact_trigger: int = COMPACT_TRIGGER, background: bool = True):
+        self.directory = directory
+        self.memtable_bytes = memtable_bytes
+        self.block_size = block_size
+        self.bloom_p = bloom_p
+        self.compact_trigger = compact_trigger
+        os.makedirs(directory, exist_ok=True)
+
+        self.runs: List[_Run] = self._open_runs()      # newest first
+        self.next_seq = max((r.hi for r in self.runs), default=0) + 1
+        self.memtable = SkipList()
+        self.mem_size = 0
+        self.stats: Dict[str, int] = {"gets": 0, "runs_probed": 0, "bloom_skips": 0, "blocks_read": 0,
+                                      "flushes": 0, "compactions": 0, "bytes_written": 0}
+
+        self._lock = threading.Lock()          # guards self.runs and reads from run files
+        self._compacting = threading.Lock()    # one compaction at a time
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        if background:
+            self._worker = threading.Thread(target=self._compaction_loop, daemon=True)
+            self._worker.start()
+
+    def _open_runs(self) -> List[_Run]:
+        found: List[Tuple[int, int, str]] = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)                # unfinished write
+                continue
+            m = _RUN_NAME.match(name)
+            if m:
+                found.append((int(m.group(1)), int(m.group(2)), path))
+        runs: List[_Run] = []
+        for lo, hi, path in found:
+            # leftover input of an interrupted compaction: covered by a wider run
+            if any(l2 <= lo and hi <= h2 and (l2, h2) != (lo, hi) for l2, h2, _ in found):
+                os.remove(path)
+            else:
+                runs.append(_Run(path, lo, hi))
+        runs.sort(key=lambda r: -r.hi)
+        return runs
+
+    def put(self, key: bytes, value: bytes) -> None:
+        if not isinstance(key, bytes) or not isinstance(value, bytes):
+            raise TypeError("keys and values must be bytes")
+        self.memtable.insert(key, value)
+        self.mem_size += len(key) + len(value) + 16
+        if self.mem_size >= self.memtable_bytes:
+            self.flush()
+
+    def delete(self, key: bytes) -> None:
+        if not isinstance(key, bytes):
+            raise TypeError("keys must be bytes")
+        self.memtable.insert(key, _TOMBSTONE)
+        self.mem_size += len(key) + 16
+        if self.mem_size >= self.memtable_bytes:
+            self.flush()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Newest value of key, or None if absent or deleted."""
+        self.stats["gets"] += 1
+        v = self.memtable.get(key, _MISSING)
+        if v is not _MISSING:
+            return None if v is _TOMBSTONE else v
+        with self._lock:
+            for run in self.runs:
+                self.stats["runs_probed"] += 1
+                found, value = run.get(key, self.stats)
+                if found:
+                    return value
+        return None
+
+    def scan(self, lo: Optional[bytes] = None, hi: Optional[bytes] = None) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Lazily yield live (key, value) pairs with lo <= key <= hi in key order
+        (None = unbounded): a loser-tree merge of the memtable and every run, newest
+        version wins, tombstones hide older values. Memory: one block per run.
+        Writes made during the scan may or may not be seen.
+        """
+        with self._lock:
+            runs = list(self.runs)
+            for r in runs:
+                r.pins += 1          # compaction must not delete these files under us
+        try:
+            merge = MergeCursor([self.memtable.cursor()] + [r.cursor() for r in runs])
+            if lo is not None:
+                merge.seek(lo)
+            for key, value in _newest_versions(merge, hi, drop_tombstones=True):
+                yield key, value
+        finally:
+            with self._lock:
+                for r in runs:
+                    r.pins -= 1
+                    if r.retired and r.pins == 0:
+                        r.destroy()
+
+    def flush(self) -> None:
+        """Write the memtable out as a new (newest) run."""
+        if len(self.memtable) == 0:
+            return
+        seq = self.next_seq
+        self.next_seq += 1
+        path = os.path.join(self.directory, _run_name(seq, seq))
+        entries = ((k, None if v is _TOMBSTONE else v) for k, v in self.memtable.items())
+        self.stats["bytes_written"] += _write_run(path, entries, len(self.memtable), self.bloom_p, self.block_size)
+        run = _Run(path, seq, seq)
+        with self._lock:
+            self.runs = [run] + self.runs
+        self.memtable = SkipList()
+        self.mem_size = 0
+        self.stats["flushes"] += 1
+        if len(self.runs) >= self.compact_trigger:
+            if self._worker is not None:
+                self._wake.set()
+            else:
+                self.compact()
+
+    def compact(self) -> None:
+        """Merge every current run into one (synchronously)."""
+        with self._compacting:
+            with self._lock:
+                inputs = list(self.runs)
+            if len(inputs) < 2:
+                return
+            lo = min(r.lo for r in inputs)
+            hi = max(r.hi for r in inputs)
+            path = os.path.join(self.directory, _run_name(lo, hi))
+            n = sum(r.count for r in inputs)
+            merge = MergeCursor([r.cursor() for r in inputs])
+            self.stats["bytes_written"] += _write_run(path, _newest_versions(merge, None, drop_tombstones=True),
+                                                      n, self.bloom_p, self.block_size)
+            merged = _Run(path, lo, hi)
+            with self._lock:
+                # runs flushed during the merge are newer: keep them in front
+                self.runs = [r for r in self.runs if r not in inputs] + [merged]
+                for r in inputs:
+                    r.retired = True
+                    if r.pins == 0:
+                        r.destroy()
+            self.stats["compactions"] += 1
+
+    def _compaction_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            if len(self.runs) >= self.compact_trigger:
+                self.compact()
+
+    def close(self) -> None:
+        """Flush the memtable, stop the compaction thread, close the files."""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._worker is not None:
+            self._wake.set()
+            self._worker.join()
+        with self._lock:
+            for r in self.runs:
+                r.close()
+
+    def __enter__(self) -> "LSMTree":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _tiny_demo():
+    """Writes that span several runs, a delete, compaction and a reopen."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        with LSMTree(d, memtable_bytes=200, background=False) as db:
+            for i in range(40):
+                db.put(b"key%03d" % i, b"v%d" % i)
+            db.put(b"key007", b"updated")
+            db.delete(b"key013")
+            print("runs:", len(db.runs), " get key007:", db.get(b"key007"), " get key013:", db.get(b"key013"))
+            print("scan key005..key015:", [k for k, _ in db.scan(b"key005", b"key015")])
+        with LSMTree(d, background=False) as db:
+            print("after reopen: key021 ->", db.get(b"key021"), " runs:", [os.path.basename(r.path) for r in db.runs])
+
+
+def _benchmark():
+    """Write throughput and read amplification, with and without compaction / Bloom filters."""
+    import random
+    import tempfile
+    import time
+    rng = random.Random(0)
+    n = 100000
+    keys = [rng.getrandbits(64).to_bytes(8, "big") * 2 for _ in range(n)]
+    value = bytes(100)
+    hits = rng.sample(keys, 10000)
+    misses = [rng.getrandbits(64).to_bytes(8, "big") * 2 for _ in range(10000)]
+
+    configs = [("compaction + bloom", dict(bloom_p=BLOOM_P)),
+               ("no compaction + bloom", dict(bloom_p=BLOOM_P, compact_trigger=10 ** 9)),
+               ("no compaction, no bloom", dict(bloom_p=None, compact_trigger=10 ** 9))]
+    for label, kw in configs:
+        with tempfile.TemporaryDirectory() as d:
+            db = LSMTree(d, memtable_bytes=1 << 20, **kw)
+            t0 = time.perf_counter()
+            for k in keys:
+                db.put(k, value)
+            db.flush()
+            t_write = time.perf_counter() - t0
+            if len(db.runs) >= db.compact_trigger:
+                db.compact()           # finish any merge the background thread has pending
+            mb = n * (16 + 100) / (1 << 20)
+            print("%s: %d puts in %.2fs (%.0f puts/s, %.1f MB/s), write amplification %.2f, %d runs" % (
+                label, n, t_write, n / t_write, mb / t_write, db.stats["bytes_written"] / (1 << 20) / mb,
+                len(db.runs)))
+            for name, probes in (("present", hits), ("absent", misses)):
+                for key in ("gets", "runs_probed", "bloom_skips", "blocks_read"):
+                    db.stats[key] = 0
+                t0 = time.perf_counter()
+                for k in probes:
+                    db.get(k)
+                t = time.perf_counter() - t0
+                g = db.stats["gets"]
+                print("   get %-7s %6.0f gets/s  runs probed/get %.2f  blocks read/get %.2f" % (
+                    name, g / t, db.stats["runs_probed"] / g, db.stats["blocks_read"] / g))
+            db.close()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -0,0 +1,247 @@
+"""
+Merged Range Scans: k-way merge with a loser tree
+=================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+MergeCursor: merges k sorted cursors (SkipListCursor, ConcurrentCursor, LSM run
+cursors, or other MergeCursors) into ONE cursor in key order, without copying:
+it only holds the k child cursors and a k-slot tournament tree.
+Plus a benchmark: streaming a merged scan over millions of keys vs materializing.
+
+CURSOR PROTOCOL (skiplist.Cursor)
+---------------------------------
+seek(key) -> first key >= key, seek_first(), valid(), key(), value(), next(),
+next_batch(n). A cursor is a position, not a copy, so a scan of k items uses O(1)
+extra memory (per source) no matter how large the range is.
+
+LOSER TREE (tournament tree)
+----------------------------
+k leaves = the current key of each source; every internal node remembers the LOSER
+of the match played there; slot 0 holds the overall winner (the smallest key).
+  build:    play all matches bottom-up, O(k)
+  advance:  the winner's source moves to its next key, then replay only the
+            matches on the path from its leaf to the root: ⌈log2 k⌉ comparisons,
+            each against the stored loser (no sibling lookups, unlike a heap's
+            sift-down which compares against both children at every level).
+Exhausted sources act as +∞.
+
+Ties: keys are compared as (key, source index), so among equal keys the source
+with the smaller index comes out first. Put the newest source first and
+"newest version wins" is simply "keep the first of each run of equal keys"
+(see LSMTree.scan / compaction in lsmtree.py).
+
+COMPLEXITY
+----------
+Merging k sources with N items total: O(k + N log k) comparisons, O(k) memory.
+seek(key): seek every child (O(k log n) for skip lists) and rebuild the tree, O(k).
+In CPython, heapq.merge (C code) is ~2x faster for a plain one-shot merge of
+iterators; MergeCursor is for when the merge must be a cursor itself (seek,
+next_batch, nesting merges, LSM newest-wins).
+"""
+
+from typing import Any, List, Sequence, Tuple
+
+from skiplist import END, Cursor
+
+
+class MergeCursor(Cursor):
+    """k-way merge of sorted cursors (a loser tree). Equal keys: lower source index first."""
+
+    def __init__(self, cursors: Sequence[Cursor]):
+        self.cursors: List[Cursor] = list(cursors)
+        self.k = len(self.cursors)
+        self.tree: List[int] = [0] * max(self.k, 1)     # tree[0] = winner, tree[1..k-1] = losers
+        # current key of every source, cached so matches need no method calls
+        self.keys: List[Any] = [None] * self.k
+        self.done: List[bool] = [True] * self.k
+        self._build()
+
+    def _load(self, i: int) -> None:
+        c = self.cursors[i]
+        if c.valid():
+            self.keys[i] = c.key()
+            self.done[i] = False
+        else:
+            self.keys[i] = None
+            self.done[i] = True
+
+    def _less(self, a: int, b: int) -> bool:
+        """Does source a beat source b? (exhausted sources lose to everything)"""
+        if self.done[a]:
+            return False
+        if self.done[b]:
+            return True
+        ka = self.keys[a]
+        kb = self.keys[b]
+        return ka < kb or (not kb < ka and a < b)
+
+    def _build(self) -> None:
+        k = self.k
+        i = 0
+        while i < k:
+            self._load(i)
+            i += 1
+        if k <= 1:
+            self.tree[0] = 0
+            return
+        # winners of every subtree; leaves are slots k..2k-1
+        win = [0] * (2 * k)
+        i = 0
+        while i < k:
+            win[k + i] = i
+            i += 1
+        p = k - 1
+        while p >= 1:
+            a = win[2 * p]
+            b = win[2 * p + 1]
+            if self._less(b, a):
+                a, b = b, a
+            win[p] = a
+            self.tree[p] = b
+            p -= 1
+        self.tree[0] = win[1]
+
+    def _advance(self) -> None:
+        """Move the winning source forward and replay the matches on its leaf-to-root path."""
+        tree = self.tree
+        keys = self.keys
+        done = self.done
+        w = tree[0]
+        kw = self.cursors[w].next_key()
+        dw = kw is END
+        keys[w] = kw
+        done[w] = dw
+        p = (w + self.k) >> 1
+        while p >= 1:
+            o = tree[p]
+            if not done[o] and (dw or keys[o] < kw or (o < w and not kw < keys[o])):
+                # the stored loser beats w: it moves up, w stays here as the loser
+                tree[p] = w
+                w = o
+                kw = keys[o]
+                dw = False
+            p >>= 1
+        tree[0] = w
+
+    def seek(self, key: Any) -> None:
+        for c in self.cursors:
+            c.seek(key)
+        self._build()
+
+    def seek_first(self) -> None:
+        for c in self.cursors:
+            c.seek_first()
+        self._build()
+
+    def valid(self) -> bool:
+        return self.k > 0 and not self.done[self.tree[0]]
+
+    def source(self) -> int:
+        """Index of the source the current item comes from."""
+        return self.tree[0]
+
+    def key(self) -> Any:
+        return self.keys[self.tree[0]]
+
+    def value(self) -> Any:
+        return self.cursors[self.tree[0]].value()
+
+    def next(self) -> None:
+        self._advance()
+
+    def next_batch(self, n: int) -> List[Tuple[Any, Any]]:
+        out: List[Tuple[Any, Any]] = []
+        if self.k == 0:
+            return out
+        # same as repeated _advance(), with everything in locals
+        tree = self.tree
+        keys = self.keys
+        done = self.done
+        cursors = self.cursors
+        k = self.k
+        while len(out) < n:
+            w = tree[0]
+            if done[w]:
+                break
+            c = cursors[w]
+            out.append((keys[w], c.value()))
+            kw = c.next_key()
+            dw = kw is END
+            keys[w] = kw
+            done[w] = dw
+            p = (w + k) >> 1
+            while p >= 1:
+                o = tree[p]
+                if not done[o] and (dw or keys[o] < kw or (o < w and not kw < keys[o])):
+                    tree[p] = w
+                    w = o
+                    kw = keys[o]
+                    dw = False
+                p >>= 1
+            tree[0] = w
+        return out
+
+
+def _tiny_demo():
+    """Merge three skip lists; key 5 exists in two of them (source 0 wins the tie)."""
+    from skiplist import SkipList
+    a = SkipList((k, "a") for k in [1, 5, 9])
+    b = SkipList((k, "b") for k in [2, 5, 6, 10])
+    c = SkipList((k, "c") for k in [3, 4, 11])
+    m = MergeCursor([a.cursor(), b.cursor(), c.cursor()])
+    print("merged:", list(m))
+    m.seek(5)
+    print("seek(5), next_batch(3):", m.next_batch(3))
+
+
+def _benchmark():
+    """Merged scan over 4 skip lists (2M keys): loser tree vs heapq.merge vs sort-everything."""
+    import heapq
+    import itertools
+    import random
+    import time
+    import tracemalloc
+    from skiplist import SkipList
+
+    rng = random.Random(0)
+    n = 2000000
+    k = 4
+    keys = rng.sample(range(10 * n), n)
+    lists = [SkipList((x, x) for x in sorted(keys[i::k])) for i in range(k)]
+
+    def scan_loser():
+        m = MergeCursor([s.cursor() for s in lists])
+        total = 0
+        while True:
+            batch = m.next_batch(4096)
+            if len(batch) == 0:
+                return total
+            total += len(batch)
+
+    def scan_heapq():
+        return sum(1 for _ in heapq.merge(*(s.items() for s in lists)))
+
+    def scan_sorted():
+        return len(sorted(itertools.chain.from_iterable(s.items() for s in lists)))
+
+    for label, f in (("loser-tree cursor", scan_loser), ("heapq.merge", scan_heapq),
+                     ("materialize + sort", scan_sorted)):
+        t0 = time.perf_counter()
+        count = f()
+        t = time.perf_counter() - t0
+        # second run under tracemalloc (which slows allocation down) just for the peak
+        tracemalloc.start()
+        f()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("%-20s %d keys in %.2fs (%.2f M keys/s), peak extra memory %.1f MB" % (
+            label, count, t, count / t / 1e6, peak / (1 << 20)))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
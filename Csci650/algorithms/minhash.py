@@ -0,0 +1,439 @@
+"""
+MinHash + LSH: near-duplicate detection without comparing all pairs
+===================================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+MinHash: k random hash functions applied to a document's SET of shingles; the
+signature is the k minima. Computed for many documents at once with NumPy.
+LSHIndex: the banding trick over signatures: documents whose signatures agree on
+all rows of at least one band become CANDIDATE pairs; only candidates are checked.
+Plus:
+- shingles(data, k): the distinct k-byte shingles of a buffer, as 64-bit Rabin–Karp
+  fingerprints (rabinkarp.py) computed for all windows at once
+- s_curve / lsh_threshold / optimal_bands: pick (bands, rows) for a target similarity
+- similar_pairs(): candidates → estimated Jaccard → pairs above a threshold
+- save_signatures / create_signatures / open_signatures: signatures in a flat file,
+  memory-mapped, so a corpus is signed once and the index rebuilt from disk
+Plus a benchmark: signing throughput, LSH vs all-pairs, recall of planted duplicates.
+
+WHY THE MINIMUM ESTIMATES JACCARD
+---------------------------------
+J(A, B) = |A ∩ B| / |A ∪ B|. Apply one random permutation h to A ∪ B: the smallest
+element of A ∪ B is equally likely to be any of its |A ∪ B| elements, and
+min h(A) = min h(B) exactly when that element is in A ∩ B. So
+  Pr[min h(A) = min h(B)] = J(A, B)
+With k independent functions, Ĵ = (# equal signature rows) / k is unbiased with
+standard error sqrt(J(1 − J) / k): k = 128 gives ±0.044 at J = 0.5.
+Like the fingerprints of randomizedalgorithms.py, section 5 (E), this is Monte Carlo:
+fixed cost, small chance of a wrong answer.
+
+THE HASH FAMILY (vectorized)
+----------------------------
+True random permutations are too expensive; instead each shingle key x is mixed once
+(fmix64, from bloomfilter.py) and then
+  h_i(x) = hi32(a_i · x + c_i)       a_i odd, c_i random, arithmetic mod 2^64
+(multiply-shift). For a block of C keys this is one (k × C) uint64 outer product,
+updated in place, and np.minimum.reduceat takes the per-document minima along each
+row of the flat key array, so many small documents are signed without a Python loop
+over documents. C = 512 keeps the 512 KiB block in cache (≈ 2× faster than 8192).
+Signatures are uint32: 4 bytes per row, 512 bytes per document at k = 128.
+
+LSH BANDING AND THE S-CURVE
+---------------------------
+Split the k rows into b bands of r rows (b·r ≤ k). Two documents with Jaccard s:
+  Pr[one band agrees]        = s^r
+  Pr[candidate] = P(s)       = 1 − (1 − s^r)^b          (the S-curve)
+The steepest point is near t ≈ (1/b)^(1/r). More rows push the curve right (fewer
+false candidates); more bands push it left (fewer misses).
+optimal_bands() picks (b, r) that minimizes the weighted area
+  fp_weight · ∫_0^t P(s) ds  +  fn_weight · ∫_t^1 (1 − P(s)) ds.
+
+Index: for each band, the r rows are hashed to one 64-bit key; the keys are
+argsorted once; equal keys are runs in the sorted order, and every pair inside a run
+is a candidate. Cost O(b · n log n) plus the number of candidate pairs; a corpus with
+few near-duplicates yields few candidates, instead of n(n − 1)/2 comparisons.
+Candidates are deduplicated across bands as packed (i << 32 | j) integers.
+
+FILE FORMAT (signatures)
+------------------------
+32-byte header "<4s4xQQQ": magic b"MHS1", n documents, k rows, MinHash seed; then
+n × k little-endian uint32, row-major. open_signatures() returns a np.memmap, so a
+signature matrix larger than RAM can be scanned band by band.
+"""
+
+import math
+import os
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from bloomfilter import MASK64, Item, fmix64_np, item_keys
+from rabinkarp import Buffer, RabinKarp
+
+MAGIC = b"MHS1"
+_HEADER = struct.Struct("<4s4xQQQ")         # magic, n, num_perm, seed
+_GOLDEN = 0x9E3779B97F4A7C15
+_EMPTY = np.uint32(0xFFFFFFFF)              # signature row of an empty set
+_BLOCK = 512                                # shingle keys per (k × C) product; stays in cache
+ShingleSet = Union[np.ndarray, Iterable[Item]]
+
+
+def shingles(data: Buffer, k: int = 5, rk: Optional[RabinKarp] = None) -> np.ndarray:
+    """Sorted distinct uint64 fingerprints of the k-byte shingles of data."""
+    if k <= 0:
+        raise ValueError("shingle length must be positive")
+    if rk is None:
+        rk = RabinKarp(seed=0)
+    return np.unique(rk.window_fingerprints(data, k))
+
+
+def s_curve(s, bands: int, rows: int):
+    """Probability that a pair with Jaccard s becomes an LSH candidate."""
+    return 1.0 - (1.0 - np.asarray(s, dtype=np.float64) ** rows) ** bands
+
+
+def lsh_threshold(bands: int, rows: int) -> float:
+    """Approximate similarity where the S-curve is steepest: (1/b)^(1/r)."""
+    return (1.0 / bands) ** (1.0 / rows)
+
+
+def optimal_bands(num_perm: int, threshold: float, fp_weight: float = 0.5,
+                  fn_weight: float = 0.5) -> Tuple[int, int]:
+    """(bands, rows) with bands·rows ≤ num_perm minimizing the weighted FP/FN area."""
+    if num_perm <= 0 or not 0 < threshold < 1:
+        raise ValueError("need num_perm > 0 and 0 < threshold < 1")
+    lo = np.linspace(0.0, threshold, 201)
+    hi = np.linspace(threshold, 1.0, 201)
+    best, best_cost = (1, num_perm), math.inf
+    b = 1
+    while b <= num_perm:
+        r = 1
+        while b * r <= num_perm:
+            fp = np.mean(s_curve(lo, b, r)) * threshold
+            fn = np.mean(1.0 - s_curve(hi, b, r)) * (1.0 - threshold)
+            cost = fp_weight * fp + fn_weight * fn
+            if cost < best_cost:
+                best, best_cost = (b, r), cost
+            r += 1
+        b += 1
+    return best
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Fraction of equal signature rows."""
+    if sig_a.shape != sig_b.shape:
+        raise ValueError("signatures must have the same length")
+    return float(np.mean(sig_a == sig_b))
+
+
+class MinHash:
+    """k multiply-shift hash functions over 64-bit shingle keys."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 0):
+        if num_perm <= 0:
+            raise ValueError("num_perm must be positive")
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.c = rng.integers(0, 2 ** 64, size=num_perm, dtype=np.uint64)
+        self._mix = np.uint64(int(rng.integers(0, 2 ** 63)))
+
+    def _hash(self, keys: np.ndarray) -> np.ndarray:
+        """(k × len(keys)) hash values (< 2^32, still uint64), computed in place."""
+        h = np.multiply.outer(self.a, fmix64_np(keys ^ self._mix))
+        h += self.c[:, None]
+        h >>= np.uint64(32)
+        return h
+
+    def signature(self, keys: ShingleSet) -> np.ndarray:
+        """uint32 signature (length k) of one set of shingle keys."""
+        return self.signatures([keys])[0]
+
+    def signatures(self, sets: Sequence[ShingleSet]) -> np.ndarray:
+        """(len(sets) × k) uint32 signatures; an empty set gets all rows 0xFFFFFFFF."""
+        parts = [item_keys(s) for s in sets]
+        sizes = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        keys = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+        out = np.full((len(parts), self.num_perm), _EMPTY, dtype=np.uint32)
+        lo = 0
+        while lo < len(keys):
+            hi = min(len(keys), lo + _BLOCK)
+            # documents overlapping [lo, hi), and where each one starts inside the block
+            d0 = int(np.searchsorted(offsets, lo, side="right")) - 1
+            d1 = int(np.searchsorted(offsets, hi, side="left"))
+            docs = np.arange(d0, d1)
+            starts = np.maximum(offsets[d0:d1], lo)
+            keep = starts < np.minimum(offsets[d0 + 1:d1 + 1], hi)
+            docs, starts = docs[keep], starts[keep]
+            mins = np.minimum.reduceat(self._hash(keys[lo:hi]), starts - lo, axis=1).T
+            out[docs] = np.minimum(out[docs], mins.astype(np.uint32))
+            lo = hi
+        return out
+
+
+def _band_keys(sigs: np.ndarray, band: int, rows: int) -> np.ndarray:
+    """One 64-bit key per document for rows [band·r, (band + 1)·r)."""
+    h = np.full(len(sigs), (band * _GOLDEN) & MASK64, dtype=np.uint64)
+    j = band * rows
+    while j < (band + 1) * rows:
+        h = fmix64_np(h ^ sigs[:, j].astype(np.uint64)) + np.uint64(_GOLDEN)
+        j += 1
+    return h
+
+
+def _run_pairs(keys: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Packed (i << 32 | j), i < j, for every pair of ids inside a run of equal sorted keys."""
+    n = len(keys)
+    if n < 2:
+        return np.zeros(0, dtype=np.uint64)
+    new = np.empty(n, dtype=bool)
+    new[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=new[1:])
+    starts = np.flatnonzero(new)
+    lens = np.diff(np.append(starts, n))
+    run_len = np.repeat(lens, lens)
+    rank = np.arange(n) - np.repeat(starts, lens)
+    pos = np.flatnonzero(run_len >= 2)
+    out = []
+    d = 1
+    while len(pos):
+        # pairs at distance d inside a run; the positions left shrink as d grows
+        pos = pos[rank[pos] + d < run_len[pos]]
+        a = order[pos].astype(np.uint64)
+        b = order[pos + d].astype(np.uint64)
+        out.append((np.minimum(a, b) << np.uint64(32)) | np.maximum(a, b))
+        d += 1
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.uint64)
+
+
+class LSHIndex:
+    """Banding index over MinHash signatures; ids are 0, 1, ... in insertion order."""
+
+    def __init__(self, bands: int, rows: int):
+        if bands <= 0 or rows <= 0:
+            raise ValueError("bands and rows must be positive")
+        self.bands = bands
+        self.rows = rows
+        self.n = 0
+        self._parts: List[List[np.ndarray]] = [[] for _ in range(bands)]
+        self._sorted: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+
+    @classmethod
+    def for_threshold(cls, num_perm: int, threshold: float, fp_weight: float = 0.5,
+                      fn_weight: float = 0.5) -> "LSHIndex":
+        return cls(*optimal_bands(num_perm, threshold, fp_weight, fn_weight))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def add_many(self, sigs: np.ndarray, block: int = 1 << 16) -> range:
+        """Index a (n × k) signature matrix (array or memmap); returns the new ids."""
+        if sigs.ndim != 2 or sigs.shape[1] < self.bands * self.rows:
+            raise ValueError("signatures need at least bands * rows = %d rows" % (self.bands * self.rows))
+        if self.n + len(sigs) >= 1 << 32:
+            raise ValueError("LSHIndex holds fewer than 2^32 documents")
+        first = self.n
+        lo = 0
+        while lo < len(sigs):
+            part = np.asarray(sigs[lo:lo + block])
+            b = 0
+            while b < self.bands:
+                self._parts[b].append(_band_keys(part, b, self.rows))
+                b += 1
+            lo += block
+        self.n += len(sigs)
+        self._sorted = None
+        return range(first, self.n)
+
+    def _tables(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Per band: (sorted keys, ids in that order); rebuilt after adds."""
+        if self._sorted is None:
+            self._sorted = []
+            b = 0
+            while b < self.bands:
+                keys = np.concatenate(self._parts[b]) if self._parts[b] else np.zeros(0, dtype=np.uint64)
+                self._parts[b] = [keys]
+                order = np.argsort(keys, kind="stable")
+                self._sorted.append((keys[order], order))
+                b += 1
+        return self._sorted
+
+    def query(self, sig: np.ndarray) -> np.ndarray:
+        """Sorted ids that share at least one band with sig."""
+        found = []
+        b = 0
+        for keys, order in self._tables():
+            key = _band_keys(sig.reshape(1, -1), b, self.rows)
+            lo, hi = np.searchsorted(keys, key[0], side="left"), np.searchsorted(keys, key[0], side="right")
+            found.append(order[lo:hi])
+            b += 1
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def candidate_pairs(self) -> np.ndarray:
+        """(m × 2) int64 array of distinct candidate pairs (i, j), i < j, sorted."""
+        packed = [_run_pairs(keys, order) for keys, order in self._tables()]
+        packed = np.unique(np.concatenate(packed)) if packed else np.zeros(0, dtype=np.uint64)
+        out = np.empty((len(packed), 2), dtype=np.int64)
+        out[:, 0] = packed >> np.uint64(32)
+        out[:, 1] = packed & np.uint64(0xFFFFFFFF)
+        return out
+
+
+def similar_pairs(index: LSHIndex, sigs: np.ndarray, threshold: float,
+                  block: int = 1 << 16) -> Tuple[np.ndarray, np.ndarray]:
+    """Candidate pairs whose estimated Jaccard is >= threshold: (pairs, estimates)."""
+    pairs = index.candidate_pairs()
+    est = np.empty(len(pairs), dtype=np.float64)
+    lo = 0
+    while lo < len(pairs):
+        p = pairs[lo:lo + block]
+        est[lo:lo + len(p)] = np.mean(np.asarray(sigs[p[:, 0]]) == np.asarray(sigs[p[:, 1]]), axis=1)
+        lo += block
+    keep = est >= threshold
+    return pairs[keep], est[keep]
+
+
+# ---- memory-mapped signatures ------------------------------------------------
+
+def save_signatures(path: str, sigs: np.ndarray, seed: int) -> None:
+    """Write a signature matrix (via .tmp + rename)."""
+    if sigs.ndim != 2:
+        raise ValueError("signatures must be a 2-D array")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, sigs.shape[0], sigs.shape[1], seed))
+        f.write(np.ascontiguousarray(sigs, dtype="<u4").tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def create_signatures(path: str, n: int, num_perm: int, seed: int) -> np.memmap:
+    """A writable (n × k) memmap to fill in batches; call flush() when done."""
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, n, num_perm, seed))
+        f.truncate(_HEADER.size + 4 * n * num_perm)
+    return np.memmap(path, dtype="<u4", mode="r+", offset=_HEADER.size, shape=(n, num_perm))
+
+
+def open_signatures(path: str, writable: bool = False) -> Tuple[np.memmap, int]:
+    """(memmap of the signatures, MinHash seed) of a saved file."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) < _HEADER.size:
+        raise ValueError("file is too short for a signature header")
+    magic, n, num_perm, seed = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not a MinHash signature file")
+    if size != _HEADER.size + 4 * n * num_perm:
+        raise ValueError("signature file has the wrong length")
+    if n == 0:
+        return np.zeros((0, num_perm), dtype="<u4"), seed
+    sigs = np.memmap(path, dtype="<u4", mode="r+" if writable else "r", offset=_HEADER.size,
+                     shape=(n, num_perm))
+    return sigs, seed
+
+
+def _tiny_demo():
+    """Sign four short texts, index them, print the candidate pairs and their estimates."""
+    docs = [b"the quick brown fox jumps over the lazy dog",
+            b"the quick brown fox jumped over the lazy dog",
+            b"a completely different sentence about hashing",
+            b"the quick brown fox jumps over the lazy cat"]
+    mh = MinHash(num_perm=64, seed=1)
+    sigs = mh.signatures([shingles(d, k=4) for d in docs])
+    b, r = optimal_bands(64, 0.5)
+    print("bands %d, rows %d, threshold ≈ %.2f" % (b, r, lsh_threshold(b, r)))
+    index = LSHIndex(b, r)
+    index.add_many(sigs)
+    for i, j in index.candidate_pairs().tolist():
+        exact = len(np.intersect1d(shingles(docs[i], 4), shingles(docs[j], 4))) / len(
+            np.union1d(shingles(docs[i], 4), shingles(docs[j], 4)))
+        print("candidate (%d, %d): estimated %.2f, exact %.2f" % (i, j, estimate_jaccard(sigs[i], sigs[j]), exact))
+    print("query doc 0 ->", index.query(sigs[0]).tolist())
+
+
+def _benchmark():
+    """20k documents with 1k planted near-duplicates: signing, LSH vs all pairs, recall."""
+    import tempfile
+    import time
+    rng = np.random.default_rng(0)
+    n, dup, length = 20000, 1000, 1000
+    words = [bytes(rng.integers(97, 123, size=rng.integers(2, 10), dtype=np.uint8)) for _ in range(20000)]
+    docs = []
+    for _ in range(n - dup):
+        docs.append(b" ".join(words[i] for i in rng.integers(0, len(words), size=length // 6).tolist()))
+    sources = rng.choice(n - dup, size=dup, replace=False)
+    for src in sources.tolist():
+        # near-duplicate: replace ~10% of the words
+        w = docs[src].split(b" ")
+        for pos in rng.integers(0, len(w), size=len(w) // 10).tolist():
+            w[pos] = words[int(rng.integers(0, len(words)))]
+        docs.append(b" ".join(w))
+    planted = {(int(s), n - dup + i) for i, s in enumerate(sources.tolist())}
+
+    rk = RabinKarp(seed=0)
+    t0 = time.perf_counter()
+    sets = [shingles(d, k=5, rk=rk) for d in docs]
+    t_sh = time.perf_counter() - t0
+    total = sum(len(s) for s in sets)
+    mh = MinHash(num_perm=128, seed=0)
+    t0 = time.perf_counter()
+    sigs = mh.signatures(sets)
+    t_sig = time.perf_counter() - t0
+    print("%d docs, %d shingles: shingling %.2fs, signing %.2fs (%.0f docs/s, %.2f M shingles/s)" % (
+        n, total, t_sh, t_sig, n / t_sig, total / t_sig / 1e6))
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "sigs.mhs")
+        t0 = time.perf_counter()
+        save_signatures(path, sigs, mh.seed)
+        t_save = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        mapped, _ = open_signatures(path)
+        t_open = time.perf_counter() - t0
+        print("signatures: %.1f MB file, save %.3fs, open (mmap) %.4fs, equal: %s" % (
+            os.path.getsize(path) / 1e6, t_save, t_open, bool(np.array_equal(mapped, sigs))))
+
+        exact = {(i, j): len(np.intersect1d(sets[i], sets[j])) / len(np.union1d(sets[i], sets[j]))
+                 for i, j in planted}
+        print("planted pairs: exact Jaccard min %.2f, median %.2f, max %.2f" % (
+            min(exact.values()), float(np.median(list(exact.values()))), max(exact.values())))
+        for threshold, fn_weight in ((0.5, 0.5), (0.7, 0.5), (0.7, 0.9)):
+            b, r = optimal_bands(128, threshold, 1.0 - fn_weight, fn_weight)
+            t0 = time.perf_counter()
+            index = LSHIndex(b, r)
+            index.add_many(mapped)
+            pairs, est = similar_pairs(index, mapped, threshold)
+            t_lsh = time.perf_counter() - t0
+            cands = len(index.candidate_pairs())
+            found = {(int(i), int(j)) for i, j in pairs.tolist()}
+            want = {p for p, J in exact.items() if J >= threshold}
+            print("t=%.1f, fn_weight %.1f: b=%d r=%d (S-curve P(0.3)=%.3f P(t)=%.2f P(0.9)=%.3f) | LSH %.2fs, %d candidates, "
+                  "%d pairs >= t, recall of planted pairs with J >= t: %d/%d" % (
+                      threshold, fn_weight, b, r, s_curve(0.3, b, r), s_curve(threshold, b, r), s_curve(0.9, b, r),
+                      t_lsh, cands, len(pairs), len(want & found), len(want)))
+        del mapped
+
+    sample = 200000
+    i = rng.integers(0, n, size=sample)
+    j = rng.integers(0, n, size=sample)
+    t0 = time.perf_counter()
+    np.mean(sigs[i] == sigs[j], axis=1)
+    t_pairs = time.perf_counter() - t0
+    print("all pairs on signatures (est from %d pairs): %.1fs for %d pairs" % (
+        sample, t_pairs * (n * (n - 1) / 2) / sample, n * (n - 1) // 2))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
@@ -0,0 +1,351 @@
+"""
+FKS Perfect Hashing: static lookup tables built once, mmapped at startup
+========================================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+PerfectHashTable: a read-only key → int64 map for a STATIC key set, built with the
+two-level scheme of Fredman, Komlós and Szemerédi (randomizedalgorithms.py,
+section 5 (B)): expected linear build time, then every lookup is exactly two
+hash evaluations and one key comparison, no collisions, no probing.
+- build(keys, values): keys = ints, or labels (str / bytes) via their 64-bit keys
+- to_bytes() / save(path): one binary blob
+- open(path): mmap the blob read-only; nothing is rebuilt at startup
+- get_many(): batch lookups with NumPy
+Plus a benchmark: build time, bytes per key, startup and lookups vs a dict.
+
+FKS IN TWO LEVELS
+-----------------
+Level 1: one universal hash h sends the n keys to n buckets; bucket i gets b_i keys.
+  E[Σ b_i²] = n + n(n−1)/n < 2n, so by Markov Σ b_i² ≤ 4n with probability ≥ 1/2:
+  retry h until it holds (expected ≤ 2 tries).
+Level 2: bucket i gets its own table of b_i² slots and its own hash g_i. With b_i²
+  slots, a random g_i from a universal family has no collision with probability
+  ≥ 1/2 (≤ C(b_i, 2)/b_i² < 1/2 colliding pairs expected): retry g_i until
+  injective (expected ≤ 2 tries per bucket).
+Total space Σ b_i² ≤ 4n slots (≈ 2n in practice), total expected build time O(n).
+This is the Las Vegas pattern: keep choosing random hash functions until there
+are no collisions; the result is always exact.
+
+HASH FUNCTIONS
+--------------
+multiply-add-shift as in cuckoohash.py, reduced to a range with multiply-high:
+  h(x)   = ⌊ hi32((a · x + c) mod 2^64) · n / 2^32 ⌋
+  g_i(x) = ⌊ hi32((a_i · x + c_i) mod 2^64) · b_i² / 2^32 ⌋
+Level 2 stores only a small integer seed s_i per bucket; (a_i, c_i) are derived from
+it with the murmur3 finalizer, so "retry g_i" is s_i += 1.
+All buckets are built TOGETHER: every round, all still-colliding buckets try their
+next seed, collisions are found with one sort of the global slot numbers.
+
+LAYOUT OF THE BLOB (all little endian, every array 8-byte aligned)
+------------------------------------------------------------------
+  header  b"FKS1" | pad | n u64 | buckets u64 | slots u64 | a u64 | c u64   (48 bytes)
+  offsets u64[buckets + 1]    bucket i owns slots offsets[i] .. offsets[i+1]−1
+  seeds   u32[buckets]        (padded to a multiple of 8 bytes)
+  keys    u64[slots]
+  values  i64[slots]
+Empty slots hold a key of their own bucket that lives in a DIFFERENT slot, so a
+lookup that lands on an empty slot fails the key comparison: no extra bit needed.
+Per key: ≈ 2n slots · 16 bytes + 12 bytes per bucket ≈ 45 bytes (a dict of ints ≈ 100).
+
+Labels (str / bytes) are stored as 64-bit keys (bloomfilter.item_key): two labels
+with the same 64-bit key are rejected at build time; an unknown label matches a
+stored one with probability ≈ n / 2^64.
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from bloomfilter import MASK64, Item, fmix64, fmix64_np, item_key, item_keys
+
+MAGIC = b"FKS1"
+_HEADER = struct.Struct("<4s4xQQQQQ")      # magic, n, buckets, slots, a, c
+_GOLDEN = 0x9E3779B97F4A7C15
+Keys = Union[np.ndarray, Iterable[Item]]
+
+
+def _level2_params(seeds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(a_i, c_i) of the level-2 functions with the given seeds."""
+    a = fmix64_np(seeds.astype(np.uint64) * np.uint64(_GOLDEN) + np.uint64(1)) | np.uint64(1)
+    return a, fmix64_np(a)
+
+
+def _reduce(a, c, x: np.ndarray, size) -> np.ndarray:
+    """⌊hi32(a·x + c) · size / 2^32⌋ for uint64 arrays (size < 2^32)."""
+    h = (a * x + c) >> np.uint64(32)
+    return (h * size) >> np.uint64(32)
+
+
+class PerfectHashTable:
+    """Static FKS two-level perfect hash: key -> int64, O(1) collision-free lookups."""
+
+    def __init__(self, n: int, a: int, c: int, offsets: np.ndarray, seeds: np.ndarray,
+                 keys: np.ndarray, values: np.ndarray):
+        self.n = n
+        self.buckets = len(seeds)
+        self.a = a
+        self.c = c
+        self.offsets = offsets
+        self.seeds = seeds
+        self.keys = keys
+        self.values = values
+        self.stats: Dict[str, int] = {}
+        self._mm: Optional[mmap.mmap] = None
+
+    @classmethod
+    def build(cls, keys: Keys, values: Optional[np.ndarray] = None, seed: int = 0) -> "PerfectHashTable":
+        """
+        Build the table for a static key set. values defaults to 0..n−1 (ids in input
+        order). Raises ValueError on duplicate keys.
+        """
+        k64 = item_keys(keys)
+        n = len(k64)
+        if values is None:
+            values = np.arange(n, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64).ravel()
+        if len(values) != n:
+            raise ValueError("need one value per key")
+        s = np.sort(k64)
+        if (s[1:] == s[:-1]).any():
+            raise ValueError("duplicate keys (or two labels with the same 64-bit key)")
+        buckets = max(1, n)
+        rng = np.random.default_rng(seed)
+        stats = {"level1_tries": 0, "level2_rounds": 0}
+
+        # level 1: retry until Σ b_i² <= 4n
+        while True:
+            stats["level1_tries"] += 1
+            a = rng.integers(0, 2 ** 64, dtype=np.uint64) | np.uint64(1)
+            c = rng.integers(0, 2 ** 64, dtype=np.uint64)
+            bucket = _reduce(a, c, k64, np.uint64(buckets)).astype(np.int64)
+            counts = np.bincount(bucket, minlength=buckets)
+            if int((counts * counts).sum()) <= 4 * max(n, 1):
+                break
+        sizes = counts * counts
+        offsets = np.zeros(buckets + 1, dtype=np.uint64)
+        np.cumsum(sizes, out=offsets[1:])
+        slots = int(offsets[-1])
+
+        # level 2: all buckets at once; colliding buckets move on to their next seed
+        seeds = np.zeros(buckets, dtype=np.uint32)
+        order = np.argsort(bucket, kind="stable")
+        kb = bucket[order]                       # bucket of every key, grouped
+        kk = k64[order]
+        pending = np.flatnonzero(counts[kb] > 1)  # keys of buckets that can still collide
+        while len(pending) > 0:
+            stats["level2_rounds"] += 1
+            b = kb[pending]
+            sa, sc = _level2_params(seeds[b])
+            slot = offsets[b] + _reduce(sa, sc, kk[pending], sizes[b].astype(np.uint64))
+            o = np.argsort(slot, kind="stable")
+            dup = np.zeros(len(pending), dtype=bool)
+            same = slot[o][1:] == slot[o][:-1]
+            dup[o[1:][same]] = True
+            dup[o[:-1][same]] = True
+            bad = np.zeros(buckets, dtype=bool)
+            bad[b[dup]] = True
+            if not bad.any():
+                break
+            seeds[bad] += 1
+            pending = pending[bad[b]]
+        stats["slots"] = slots
+
+        # place every key in its slot
+        sa, sc = _level2_params(seeds[kb])
+        slot = (offsets[kb] + _reduce(sa, sc, kk, sizes[kb].astype(np.uint64))).astype(np.int64)
+        table_keys = np.zeros(slots, dtype=np.uint64)
+        table_values = np.zeros(slots, dtype=np.int64)
+        used = np.zeros(slots, dtype=bool)
+        table_keys[slot] = kk
+        table_values[slot] = values[order]
+        used[slot] = True
+        # empty slot: a key of the same bucket (it lives in another slot, so it never matches)
+        slot_bucket = np.repeat(np.arange(buckets), sizes)
+        first_key = np.zeros(buckets, dtype=np.uint64)
+        starts = np.flatnonzero(np.r_[True, kb[1:] != kb[:-1]]) if n > 0 else np.zeros(0, dtype=np.int64)
+        first_key[kb[starts]] = kk[starts]
+        empty = ~used
+        table_keys[empty] = first_key[slot_bucket[empty]]
+
+        table = cls(n, int(a), int(c), offsets, seeds, table_keys, table_values)
+        table.stats = stats
+        return table
+
+    def __len__(self) -> int:
+        return self.n
+
+    def get_many(self, items: Keys, default: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, found) for a batch; values[j] = default where the key is not in the table."""
+        k64 = item_keys(items)
+        if len(self.keys) == 0:
+            return np.full(len(k64), default, dtype=np.int64), np.zeros(len(k64), dtype=bool)
+        bucket = _reduce(np.uint64(self.a), np.uint64(self.c), k64, np.uint64(self.buckets)).astype(np.int64)
+        start = self.offsets[bucket]
+        size = self.offsets[bucket + 1] - start
+        sa, sc = _level2_params(self.seeds[bucket])
+        slot = (start + _reduce(sa, sc, k64, size)).astype(np.int64)
+        found = size > 0
+        slot[~found] = 0
+        found &= self.keys[slot] == k64
+        out = np.where(found, self.values[slot], default)
+        return out, found
+
+    def get(self, item: Item, default=None):
+        x = item_key(item)
+        bucket = ((((self.a * x + self.c) & MASK64) >> 32) * self.buckets) >> 32
+        start = int(self.offsets[bucket])
+        size = int(self.offsets[bucket + 1]) - start
+        if size == 0:
+            return default
+        a = fmix64((int(self.seeds[bucket]) * _GOLDEN + 1) & MASK64) | 1
+        c = fmix64(a)
+        slot = start + (((((a * x + c) & MASK64) >> 32) * size) >> 32)
+        if int(self.keys[slot]) != x:
+            return default
+        return int(self.values[slot])
+
+    def __getitem__(self, item: Item) -> int:
+        value = self.get(item)
+        if value is None:
+            raise KeyError(item)
+        return value
+
+    def __contains__(self, item: Item) -> bool:
+        return self.get(item) is not None
+
+    def memory_bytes(self) -> int:
+        return self.offsets.nbytes + self.seeds.nbytes + self.keys.nbytes + self.values.nbytes
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(MAGIC, self.n, self.buckets, len(self.keys), self.a, self.c)
+        seeds = self.seeds.astype("<u4").tobytes()
+        seeds += bytes(-len(seeds) % 8)
+        return (header + self.offsets.astype("<u8").tobytes() + seeds
+                + self.keys.astype("<u8").tobytes() + self.values.astype("<i8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, blob) -> "PerfectHashTable":
+        """Views into blob (bytes, or an mmap) without copying the arrays."""
+        if len(blob) < _HEADER.size:
+            raise ValueError("blob is too short for a perfect hash header")
+        magic, n, buckets, slots, a, c = _HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("not a perfect hash blob")
+        seeds_bytes = 4 * buckets + (-(4 * buckets) % 8)
+        if len(blob) != _HEADER.size + 8 * (buckets + 1) + seeds_bytes + 16 * slots:
+            raise ValueError("perfect hash blob has the wrong length")
+        pos = _HEADER.size
+        offsets = np.frombuffer(blob, dtype="<u8", count=buckets + 1, offset=pos)
+        pos += 8 * (buckets + 1)
+        seeds = np.frombuffer(blob, dtype="<u4", count=buckets, offset=pos)
+        pos += seeds_bytes
+        keys = np.frombuffer(blob, dtype="<u8", count=slots, offset=pos)
+        pos += 8 * slots
+        values = np.frombuffer(blob, dtype="<i8", count=slots, offset=pos)
+        return cls(n, a, c, offsets, seeds, keys, values)
+
+    def save(self, path: str) -> None:
+        """Write the blob (via .tmp + rename)."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str) -> "PerfectHashTable":
+        """Map a saved table read-only; the arrays are views into the page cache."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            table = cls.from_bytes(mm)
+        except ValueError:
+            mm.close()
+            raise
+        table._mm = mm
+        return table
+
+    def close(self) -> None:
+        if self._mm is not None:
+            # the arrays point into the mapping; drop them before closing it
+            self.offsets = self.seeds = self.keys = self.values = None
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self) -> "PerfectHashTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _tiny_demo():
+    """Node labels -> ids, saved and mapped back."""
+    import tempfile
+    labels = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+    table = PerfectHashTable.build(labels)
+    print("n = %d, %d buckets, %d slots, stats %s" % (len(table), table.buckets, len(table.keys), table.stats))
+    print("gamma -> %d, theta -> %d, 'omega' in table: %s" % (table["gamma"], table["theta"], "omega" in table))
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "labels.fks")
+        table.save(path)
+        with PerfectHashTable.open(path) as mapped:
+            vals, found = mapped.get_many(["beta", "eta", "nope"], default=-1)
+            print("mmapped get_many(beta, eta, nope) ->", vals, found)
+
+
+def _benchmark():
+    """5M int64 keys and 1M string labels: build, size, startup (mmap vs dict), lookups."""
+    import tempfile
+    import time
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as d:
+        for label, keys in (("5M int64 keys", rng.integers(-2 ** 62, 2 ** 62, size=5000000)),
+                            ("1M str labels", ["node-%d" % i for i in range(1000000)])):
+            n = len(keys)
+            t0 = time.perf_counter()
+            table = PerfectHashTable.build(keys)
+            t_build = time.perf_counter() - t0
+            path = os.path.join(d, "t.fks")
+            table.save(path)
+            print("%s: build %.2fs (%.2f M keys/s), %d slots = %.2f n, %.1f bytes/key, stats %s" % (
+                label, t_build, n / t_build / 1e6, len(table.keys), len(table.keys) / n,
+                os.path.getsize(path) / n, table.stats))
+
+            t0 = time.perf_counter()
+            mapped = PerfectHashTable.open(path)
+            t_open = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            vals, found = mapped.get_many(keys)
+            t_get = time.perf_counter() - t0
+            ok = bool(found.all() and np.array_equal(vals, np.arange(n)))
+            misses = rng.integers(2 ** 62, 2 ** 63 - 1, size=n)
+            t0 = time.perf_counter()
+            _, fmiss = mapped.get_many(misses)
+            t_miss = time.perf_counter() - t0
+
+            key_list = keys.tolist() if isinstance(keys, np.ndarray) else keys
+            t0 = time.perf_counter()
+            dct = dict(zip(key_list, range(n)))
+            t_dict = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for x in key_list:
+                dct[x]
+            t_dloop = time.perf_counter() - t0
+            print("  startup: mmap open %.4fs vs dict rebuild %.2fs | get_many hits %.2f M/s (correct: %s), "
+                  "misses %.2f M/s (false hits %d) | dict lookups %.2f M/s" % (
+                      t_open, t_dict, n / t_get / 1e6, ok, n / t_miss / 1e6, int(fmiss.sum()), n / t_dloop / 1e6))
+            mapped.close()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
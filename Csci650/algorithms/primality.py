@@ -0,0 +1,428 @@
+"""
+Miller–Rabin Primality: deterministic for 64-bit, randomized for big ints, in batches
+=====================================================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+The Monte Carlo example of randomizedalgorithms.py (one-sided error: "composite" is
+always right, "probably prime" can be wrong with a probability we choose), made
+into a tool for code that needs many primes (hash moduli, key generation):
+- is_prime(n): exact for n < 2^64 (fixed witness set), random witnesses above that
+- is_prime_many(candidates): batch test; a small-prime wheel removes ≈ 93% of the
+  candidates before any pow(); uint32 survivors are tested in vectorized NumPy;
+  workers=k spreads the remaining pow() work over a process pool
+- next_prime / primes_in_range: sieve an interval by the small primes, then test
+- random_prime(bits): a uniformly random prime of exactly that many bits
+Plus a benchmark: pre-sieve savings, vectorized 32-bit path, 64-bit and 2048-bit
+throughput, process pool.
+
+THE TEST
+--------
+n − 1 = 2^s · d with d odd. For a witness a: n is a strong probable prime to base a if
+  a^d ≡ 1 (mod n)   or   a^(2^r · d) ≡ −1 (mod n) for some 0 ≤ r < s.
+A prime always passes (Fermat + the only square roots of 1 mod a prime are ±1).
+For an odd composite n at most 1/4 of the bases in [1, n − 1] let it pass (Rabin),
+so k independent random witnesses err with probability ≤ 4^−k (error amplification
+as in randomizedalgorithms.py): rounds_for_error(2^−80) = 40. For RANDOM candidates
+the true error is far lower (Damgård, Landrock, Pomerance) — the 4^−k bound is the
+worst case over adversarial n.
+
+DETERMINISTIC WITNESSES
+-----------------------
+Exhaustive searches found fixed base sets with no composite exception below a bound:
+  n < 4,759,123,141 (> 2^32):   bases {2, 7, 61}                       (Jaeschke)
+  n < 2^64:                     bases {2, 325, 9375, 28178, 450775,
+                                       9780504, 1795265022}           (Sinclair)
+so below 2^64 the answer is EXACT, with no randomness at all.
+Above 2^64 there is no proven small set; random witnesses are used.
+
+THE WHEEL PRE-SIEVE
+-------------------
+Almost every composite has a small factor: only Π_{p < 2048} (1 − 1/p) ≈ 7.4% of
+integers have none. One pow() on a 2048-bit n costs ≈ 2048 modular squarings, so
+checking small factors first is far cheaper:
+- big ints: one gcd(n, P) with P = the product of all primes < 2048 (a 2900-bit
+  "primorial"); gcd > 1 ⇔ n has a small factor.
+- uint64 arrays: the primes are grouped into products < 2^32; per group one
+  vectorized 64-bit n mod product, then the 32-bit residue mod each prime of the
+  group; candidates with a factor are dropped after every group, so the later
+  passes are short (np.gcd per group was 80× slower).
+- intervals [lo, hi): mark multiples of each small prime in a bool array (segmented
+  sieve of Eratosthenes), then test only the unmarked offsets.
+Survivors below 2048² are prime (no factor ≤ √n), so they skip pow() entirely.
+
+VECTORIZED 32-BIT PATH
+----------------------
+For n < 2^32 every product of two residues is < 2^64, so modular exponentiation runs
+on uint64 arrays: square-and-multiply over the 32 exponent bits with np.where, all
+candidates at once, for the 3 bases {2, 7, 61}.
+Above 2^32 the products need 128 bits; those use Python's pow() one by one.
+"""
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from rabinkarp import small_primes
+
+WHEEL_LIMIT = 2048
+SMALL_PRIMES: List[int] = small_primes(WHEEL_LIMIT - 1).tolist()
+_SMALL_SET = frozenset(SMALL_PRIMES)
+_PRIMORIAL = math.prod(SMALL_PRIMES)
+BASES_32 = (2, 7, 61)                                # exact for n < 4,759,123,141
+BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)    # exact for n < 2^64
+Candidates = Union[np.ndarray, Sequence[int]]
+
+
+def _prime_groups() -> List[Tuple[int, List[int]]]:
+    """Consecutive odd small primes grouped as (product < 2^32, primes)."""
+    groups: List[Tuple[int, List[int]]] = []
+    current, members = 1, []
+    for p in SMALL_PRIMES[1:]:
+        if current * p >= 1 << 32:
+            groups.append((current, members))
+            current, members = 1, []
+        current *= p
+        members.append(p)
+    groups.append((current, members))
+    return groups
+
+
+_GROUPS = _prime_groups()
+_SMALL_NP = np.array(SMALL_PRIMES, dtype=np.uint64)
+
+
+def rounds_for_error(error: float) -> int:
+    """Random-witness rounds k with 4^−k <= error."""
+    if not 0 < error < 1:
+        raise ValueError("error must be in (0, 1)")
+    return max(1, math.ceil(math.log(1.0 / error, 4)))
+
+
+def _strong_probable_prime(n: int, a: int, d: int, s: int) -> bool:
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    r = 1
+    while r < s:
+        x = x * x % n
+        if x == n - 1:
+            return True
+        r += 1
+    return False
+
+
+def _miller_rabin(n: int, rounds: int, rng: random.Random) -> bool:
+    """n odd, > WHEEL_LIMIT, no small factor."""
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    if n < 1 << 64:
+        bases = BASES_32 if n < 4759123141 else BASES_64
+        return all(_strong_probable_prime(n, a % n, d, s) for a in bases if a % n)
+    i = 0
+    while i < rounds:
+        if not _strong_probable_prime(n, rng.randrange(2, n - 1), d, s):
+            return False
+        i += 1
+    return True
+
+
+def _presieve(n: int) -> Optional[bool]:
+    """True / False when small primes decide n, None when Miller–Rabin must."""
+    if n < WHEEL_LIMIT:
+        return n in _SMALL_SET
+    if math.gcd(n, _PRIMORIAL) > 1:
+        return False
+    if n < WHEEL_LIMIT * WHEEL_LIMIT:
+        return True
+    return None
+
+
+def is_prime(n: int, rounds: Optional[int] = None, error: float = 2.0 ** -80,
+             rng: Optional[random.Random] = None) -> bool:
+    """Exact below 2^64; above, wrong with probability <= 4^−rounds (default from error)."""
+    n = int(n)
+    small = _presieve(n)
+    if small is not None:
+        return small
+    if rounds is None:
+        rounds = rounds_for_error(error)
+    return _miller_rabin(n, rounds, rng if rng is not None else random.SystemRandom())
+
+
+# ---- batches -----------------------------------------------------------------
+
+def _small_factor_np(c: np.ndarray) -> np.ndarray:
+    """For a uint64 array: has an odd prime factor < WHEEL_LIMIT, or is even."""
+    alive = np.flatnonzero(c & np.uint64(1))
+    for prod, members in _GROUPS:
+        # one 64-bit mod per group, then cheap 32-bit mods; drop hits before the next group
+        r = (c[alive] % np.uint64(prod)).astype(np.uint32)
+        hit = np.zeros(len(alive), dtype=bool)
+        for p in members:
+            hit |= r % np.uint32(p) == 0
+        alive = alive[~hit]
+    out = np.ones(len(c), dtype=bool)
+    out[alive] = False
+    return out
+
+
+def _pow_vec(a: int, d: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """a^d mod n elementwise, n < 2^32 (uint64 products cannot overflow)."""
+    result = np.ones(len(n), dtype=np.uint64)
+    base = np.uint64(a) % n
+    d = d.copy()
+    while d.any():
+        odd = (d & np.uint64(1)) == 1
+        result = np.where(odd, result * base % n, result)
+        base = base * base % n
+        d >>= np.uint64(1)
+    return result
+
+
+def _miller_rabin_u32(n: np.ndarray) -> np.ndarray:
+    """Exact test of odd n in (WHEEL_LIMIT², 2^32), vectorized, bases {2, 7, 61}."""
+    d = n - np.uint64(1)
+    s = np.zeros(len(n), dtype=np.int64)
+    even = (d & np.uint64(1)) == 0
+    while even.any():
+        d[even] >>= np.uint64(1)
+        s += even
+        even = (d & np.uint64(1)) == 0
+    prime = np.ones(len(n), dtype=bool)
+    minus1 = n - np.uint64(1)
+    for a in BASES_32:
+        x = _pow_vec(a, d, n)
+        ok = (x == 1) | (x == minus1)
+        r = 1
+        while r < s.max(initial=0):
+            x = x * x % n
+            ok |= (x == minus1) & (r < s)
+            r += 1
+        prime &= ok
+    return prime
+
+
+def _test_chunk(job: Tuple[List[int], int, Optional[int]]) -> List[bool]:
+    """Miller–Rabin on pre-sieved candidates (runs in a worker process too)."""
+    values, rounds, seed = job
+    rng = random.Random(seed) if seed is not None else random.SystemRandom()
+    return [_miller_rabin(v, rounds, rng) for v in values]
+
+
+def _run_tests(values: List[int], rounds: int, seed: Optional[int], workers: Optional[int]) -> List[bool]:
+    if not values:
+        return []
+    if workers is None or workers <= 1:
+        return _test_chunk((values, rounds, seed))
+    n_chunks = 4 * workers
+    size = -(-len(values) // n_chunks)
+    jobs = []
+    i = 0
+    while i * size < len(values):
+        jobs.append((values[i * size:(i + 1) * size], rounds, None if seed is None else seed + i))
+        i += 1
+    out: List[bool] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_test_chunk, jobs):
+            out.extend(part)
+    return out
+
+
+def is_prime_many(candidates: Candidates, rounds: Optional[int] = None, error: float = 2.0 ** -80,
+                  seed: Optional[int] = None, workers: Optional[int] = None) -> np.ndarray:
+    """
+    Bool array: which candidates are prime. Integer NumPy arrays take the vectorized
+    sieve (and the vectorized 32-bit test); any sequence of Python ints works.
+    seed makes the random witnesses (only used above 2^64) reproducible;
+    workers > 1 runs the pow() tests in a process pool.
+    """
+    if rounds is None:
+        rounds = rounds_for_error(error)
+    if isinstance(candidates, np.ndarray) and candidates.dtype.kind in "iu":
+        c = candidates.ravel()
+        out = np.zeros(len(c), dtype=bool)
+        ok = c > 1 if c.dtype.kind == "i" else np.ones(len(c), dtype=bool)
+        u = c.astype(np.uint64)
+        small = ok & (u < WHEEL_LIMIT)
+        out[small] = np.isin(u[small], _SMALL_NP)
+        rest = np.flatnonzero(ok & ~small)
+        rest = rest[~_small_factor_np(u[rest])]
+        sure = u[rest] < WHEEL_LIMIT * WHEEL_LIMIT
+        out[rest[sure]] = True
+        rest = rest[~sure]
+        u32 = u[rest] < 1 << 32
+        out[rest[u32]] = _miller_rabin_u32(u[rest[u32]])
+        rest = rest[~u32]
+        out[rest] = _run_tests(u[rest].tolist(), rounds, seed, workers)
+        return out
+    values = [int(v) for v in candidates]
+    out = np.zeros(len(values), dtype=bool)
+    pending, where = [], []
+    i = 0
+    while i < len(values):
+        small = _presieve(values[i])
+        if small is None:
+            pending.append(values[i])
+            where.append(i)
+        else:
+            out[i] = small
+        i += 1
+    out[where] = _run_tests(pending, rounds, seed, workers)
+    return out
+
+
+def sieve_interval(lo: int, hi: int) -> np.ndarray:
+    """
+    Offsets o in [0, hi − lo) such that lo + o >= 2 and lo + o is a prime < WHEEL_LIMIT
+    or has no prime factor < WHEEL_LIMIT.
+    """
+    if hi <= lo:
+        return np.zeros(0, dtype=np.int64)
+    alive = np.ones(hi - lo, dtype=bool)
+    alive[:max(0, 2 - lo)] = False                   # 0, 1 and below are not primes
+    for p in SMALL_PRIMES:
+        # first multiple to strike: 2p if p itself is in range (keep the small prime)
+        start = 2 * p - lo if lo <= p else -lo % p
+        alive[start::p] = False
+    return np.flatnonzero(alive)
+
+
+def primes_in_range(lo: int, hi: int, rounds: Optional[int] = None, error: float = 2.0 ** -80,
+                    seed: Optional[int] = None, workers: Optional[int] = None,
+                    segment: int = 1 << 16) -> List[int]:
+    """All primes in [lo, hi): segmented wheel sieve, then Miller–Rabin on survivors."""
+    lo = max(int(lo), 2)
+    hi = int(hi)
+    out: List[int] = []
+    while lo < hi:
+        top = min(hi, lo + segment)
+        values = [lo + int(o) for o in sieve_interval(lo, top)]
+        if lo < WHEEL_LIMIT * WHEEL_LIMIT:
+            out.extend(v for v in values if is_prime(v, rounds, error))
+        else:
+            out.extend(v for v, ok in zip(values, is_prime_many(values, rounds, error, seed, workers)) if ok)
+        lo = top
+    return out
+
+
+def next_prime(n: int, rounds: Optional[int] = None, error: float = 2.0 ** -80) -> int:
+    """The smallest prime > n."""
+    lo = max(int(n) + 1, 2)
+    width = 1024
+    while True:
+        for o in sieve_interval(lo, lo + width).tolist():
+            if is_prime(lo + o, rounds, error):
+                return lo + o
+        lo += width
+        width = min(2 * width, 1 << 20)
+
+
+def random_prime(bits: int, rng: Optional[random.Random] = None, rounds: Optional[int] = None,
+                 error: float = 2.0 ** -80, batch: int = 256) -> int:
+    """A uniformly random prime in [2^(bits−1), 2^bits); rng defaults to SystemRandom."""
+    if bits < 2:
+        raise ValueError("a prime needs at least 2 bits")
+    if rng is None:
+        rng = random.SystemRandom()
+    if bits == 2:
+        return rng.choice((2, 3))
+    if rounds is None:
+        rounds = rounds_for_error(error)
+    while True:
+        # odd candidates with the top bit set; the gcd pre-sieve rejects most of them
+        for c in (rng.getrandbits(bits - 1) | (1 << (bits - 1)) | 1 for _ in range(batch)):
+            small = _presieve(c)
+            if small or (small is None and _miller_rabin(c, rounds, rng)):
+                return c
+
+
+def _tiny_demo():
+    """Classic traps for Fermat-style tests, then a few generated primes."""
+    for n in (561, 2047, 3215031751, 18446744073709551557, 3317044064679887385961981, 2 ** 127 - 1):
+        print("%d: %s" % (n, "prime" if is_prime(n) else "composite"))
+    print("is_prime_many(90..110):", [v for v, ok in zip(range(90, 111), is_prime_many(np.arange(90, 111))) if ok])
+    print("primes in [2^61, 2^61 + 200):", primes_in_range(2 ** 61, 2 ** 61 + 200))
+    print("next_prime(10^12) =", next_prime(10 ** 12))
+    print("random 128-bit prime:", random_prime(128, random.Random(1)))
+
+
+def _benchmark():
+    """Pre-sieve savings, vectorized 32-bit path, 64-bit and 2048-bit tests, process pool."""
+    import os
+    import time
+    rng = np.random.default_rng(0)
+
+    n = 1000000
+    c32 = rng.integers(WHEEL_LIMIT ** 2, 1 << 32, size=n, dtype=np.uint64)
+    t0 = time.perf_counter()
+    fast = is_prime_many(c32)
+    t_vec = time.perf_counter() - t0
+    sample = c32[:100000].tolist()
+    t0 = time.perf_counter()
+    slow = [is_prime(v) for v in sample]
+    t_loop = (time.perf_counter() - t0) * n / len(sample)
+    print("1M uint32: is_prime_many %.2fs (%.1f M/s) vs is_prime loop (est) %.2fs; %d primes, agree: %s" % (
+        t_vec, n / t_vec / 1e6, t_loop, int(fast.sum()), bool(np.array_equal(fast[:100000], slow))))
+
+    c64 = rng.integers(1 << 62, 1 << 63, size=n, dtype=np.uint64) | np.uint64(1)
+    t0 = time.perf_counter()
+    survivors = int((~_small_factor_np(c64)).sum())
+    t_sieve = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    p64 = is_prime_many(c64)
+    t_many = time.perf_counter() - t0
+    sample = c64[:20000].tolist()
+    t0 = time.perf_counter()
+    for v in sample:
+        _miller_rabin(v, 0, random.Random(0))
+    t_nosieve = (time.perf_counter() - t0) * n / len(sample)
+    print("1M odd 63-bit: wheel keeps %.1f%% (%.2fs), is_prime_many %.2fs (%.2f M/s), %d primes; "
+          "Miller-Rabin on every candidate (est) %.2fs" % (
+              100.0 * survivors / n, t_sieve, t_many, n / t_many / 1e6, int(p64.sum()), t_nosieve))
+
+    t0 = time.perf_counter()
+    moduli = primes_in_range(2 ** 61, 2 ** 61 + 50000)
+    t_range = time.perf_counter() - t0
+    print("primes in [2^61, 2^61 + 50000): %d in %.3fs" % (len(moduli), t_range))
+
+    r = random.Random(0)
+    for bits in (512, 2048):
+        t0 = time.perf_counter()
+        count = 3 if bits == 2048 else 20
+        for _ in range(count):
+            random_prime(bits, r)
+        t_gen = (time.perf_counter() - t0) / count
+        cands = [r.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(2000 if bits == 512 else 400)]
+        t0 = time.perf_counter()
+        with_sieve = is_prime_many(cands, seed=1)
+        t_with = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        d = random.Random(1)
+        for v in cands[:100]:
+            _miller_rabin(v, rounds_for_error(2.0 ** -80), d)
+        t_without = (time.perf_counter() - t0) * len(cands) / 100
+        print("%d-bit: random_prime %.3fs each; %d candidates: with wheel %.2fs, without (est) %.2fs, %d prime" % (
+            bits, t_gen, len(cands), t_with, t_without, int(with_sieve.sum())))
+
+    big = [r.getrandbits(1024) | (1 << 1023) | 1 for _ in range(3000)]
+    survivors = [v for v in big if math.gcd(v, _PRIMORIAL) == 1]
+    cpus = os.cpu_count() or 1
+    for workers in sorted({1, 2, cpus}):
+        t0 = time.perf_counter()
+        res = is_prime_many(survivors, seed=2, workers=workers)
+        print("1024-bit, %d survivors of the wheel, workers=%d: %.2fs, %d prime (%d CPUs here)" % (
+            len(survivors), workers, time.perf_counter() - t0, int(res.sum()), cpus))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
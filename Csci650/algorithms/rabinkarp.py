@@ -0,0 +1,478 @@
+"""
+Rabin–Karp Fingerprints: bulk substring search and content-defined chunking
+===========================================================================
+
+WHAT THIS FILE CONTAINS
+-----------------------
+RabinKarp: randomized polynomial fingerprints (randomizedalgorithms.py, section 5 (E))
+computed for ALL windows of a byte buffer at once with NumPy, used for
+1) multi-pattern search: a direct-indexed table drops almost every position, the
+   few left are fingerprinted and looked up among the patterns' fingerprints, and
+   real bytes are compared only on fingerprint hits;
+2) content-defined chunking (CDC): cut where the fingerprint of the last 48 bytes
+   has its low bits all set, so boundaries follow the content, not the offsets,
+   and identical content gives identical chunks even when shifted.
+Everything works on bytes / memoryview / uint8 arrays; files are streamed in large
+blocks with readinto() and never decoded into Python strings.
+
+THE FINGERPRINT
+---------------
+For bytes s_0 .. s_{L−1}:   H(s) = Σ s_j · B^(L−1−j)  mod P
+with P a RANDOM prime in [2^30, 2^31) and B a random base. Two different strings of
+length L collide with probability ≤ (L−1)/P over the choice of B (a nonzero
+polynomial of degree < L has < L roots mod P). Two independent (P, B) pairs are
+used; the fingerprint is both residues packed in one 62-bit integer, so a false
+match needs two independent collisions (≈ L² / 2^61).
+Concatenation: H(xy) = H(x) · B^|y| + H(y), so fingerprints of pieces combine.
+
+ALL WINDOWS AT ONCE (no per-byte Python loop)
+---------------------------------------------
+The classic rolling update h ← (h − s_i·B^(L−1))·B + s_{i+L} is a sequential scan.
+Instead, with B⁻¹ the inverse of B mod P:
+  S[i] = Σ_{j<i} s_j · B^(−j)  mod P                  (one cumsum, then one mod)
+  H(window at i, length L) = (S[i+L] − S[i]) · B^(i+L−1)  mod P
+The cumsum cannot overflow: every term is < P < 2^31, so a block of < 2^32 bytes
+sums to < 2^63. Products of two residues are < 2^62. The power tables B^k and
+B^(−k) are built by doubling (pw[k:2k] = pw[0:k] · B^k) and cached.
+Cost: a handful of int64 array passes per block and per distinct pattern length.
+
+MULTI-PATTERN SEARCH
+--------------------
+Patterns are grouped by W = the largest power of two ≤ their length (W ≤ 32); a
+window of length W is matched against the fingerprints of the patterns' first W
+bytes, so at most 6 groups for any set of patterns. Fingerprinting every window of
+a block (two moduli, four int64 passes each, per group) and np.searchsorted-ing
+them all would run several times slower than a plain bytes.find loop, so there are
+three stages, each on far fewer positions than the one before:
+  1) PREFILTER, one pass per block: the first q = min(W, 4) bytes of every window,
+     read as a little-endian integer and hashed (multiply by 0x9E3779B1, keep the
+     top 20 bits), index a 2^20-entry uint8 table whose bit g is set where a
+     pattern of group g has that q-gram. Only the flagged positions go on (a few
+     percent on text, far fewer on random bytes).
+  2) FINGERPRINT the W bytes at each surviving position: both residues are one
+     (candidates × W) int64 product with the powers B^(W−1) .. B^0 (a sum of
+     W ≤ 32 terms < 2^8 · 2^31 fits in int64) and one mod; np.searchsorted against
+     the group's sorted prefix fingerprints.
+  3) VERIFY the WHOLE pattern on fingerprint hits with a memoryview comparison of
+     the real bytes.
+Verification makes the answer EXACT (Las Vegas); stages 1 and 2 only make it fast.
+Streaming: each block is prefixed with the last (longest pattern − 1) bytes of the
+previous one; a block reports only the matches that end in its new bytes, so every
+match is reported exactly once.
+
+CONTENT-DEFINED CHUNKING
+------------------------
+Cut after position e if  H1(s[e−48 : e]) & (avg − 1) == avg − 1  (avg a power of
+two), with chunk lengths kept in [min_size, max_size]. An insertion or deletion
+only changes the chunks around it; later boundaries re-synchronize, which is what
+makes chunk fingerprints useful for dedup and near-duplicate detection (two files
+sharing most chunk fingerprints share most content).
+Candidate cuts come from the vectorized window fingerprints; only the candidates
+(≈ 1 per avg bytes) go through the sequential min/max rule. Chunk fingerprints are
+combined across block boundaries with H(xy) = H(x)·B^|y| + H(y).
+"""
+
+import random
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Buffer = Union[bytes, bytearray, memoryview, np.ndarray]
+Source = Union[str, BinaryIO]
+_BITS = 31                          # moduli are below 2^31; fingerprints pack two of them
+MAX_WINDOW = 32                     # longest window used by search (longer patterns: prefix)
+_FILTER_BITS = 20                   # search prefilter: 2^20-entry table indexed by a hashed q-gram
+_GOLDEN = np.uint32(0x9E3779B1)
+
+
+def small_primes(limit: int) -> np.ndarray:
+    """Primes <= limit (sieve of Eratosthenes)."""
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    i = 2
+    while i * i <= limit:
+        if sieve[i]:
+            sieve[i * i::i] = False
+        i += 1
+    return np.flatnonzero(sieve)
+
+
+def _random_prime(rng: random.Random, lo: int = 1 << 30, hi: int = 1 << 31) -> int:
+    """A uniformly random prime in [lo, hi) (trial division is enough below 2^31)."""
+    primes = small_primes(int(hi ** 0.5) + 1)
+    while True:
+        p = rng.randrange(lo, hi) | 1
+        if p < hi and not (p % primes == 0).any():
+            return p
+
+
+def _gram_index(s: np.ndarray, q: int, stop: int) -> np.ndarray:
+    """Prefilter table index of the q-byte gram starting at every position < stop."""
+    key = s[:stop].astype(np.uint32)
+    k = 1
+    while k < q:
+        key |= s[k:stop + k].astype(np.uint32) << np.uint32(8 * k)
+        k += 1
+    return (key * _GOLDEN) >> np.uint32(32 - _FILTER_BITS)
+
+
+def _as_array(data: Buffer) -> np.ndarray:
+    """uint8 view of a bytes-like object (no copy)."""
+    if isinstance(data, np.ndarray):
+        return data.view(np.uint8).ravel()
+    return np.frombuffer(memoryview(data), dtype=np.uint8)
+
+
+class RabinKarp:
+    """Randomized polynomial fingerprints (two random primes) over byte buffers, vectorized."""
+
+    def __init__(self, seed: Optional[int] = None):
+        rng = random.Random(seed)            # seed None: fresh randomness from the OS
+        p1 = _random_prime(rng)
+        p2 = _random_prime(rng)
+        while p2 == p1:
+            p2 = _random_prime(rng)
+        self.P = [p1, p2]
+        self.B = [rng.randrange(256, p - 1) for p in self.P]
+        self._pow: List[np.ndarray] = [np.ones(1, dtype=np.int64), np.ones(1, dtype=np.int64)]
+        self._ipow: List[np.ndarray] = [np.ones(1, dtype=np.int64), np.ones(1, dtype=np.int64)]
+
+    def _tables(self, n: int) -> None:
+        """Make sure B^k and B^(−k) are tabulated for k < n (grown by doubling)."""
+        m = 0
+        while m < 2:
+            p = self.P[m]
+            pw = self._pow[m]
+            ipw = self._ipow[m]
+            while len(pw) < n:
+                k = len(pw)
+                pw = np.concatenate([pw, pw * pow(self.B[m], k, p) % p])
+                ipw = np.concatenate([ipw, ipw * pow(self.B[m], -k, p) % p])
+            self._pow[m] = pw
+            self._ipow[m] = ipw
+            m += 1
+
+    def _prefix(self, s: np.ndarray) -> List[np.ndarray]:
+        """S[m][i] = Σ_{j<i} s_j · B_m^(−j) mod P_m, for both moduli (length n + 1)."""
+        n = len(s)
+        self._tables(n + 1)
+        out = []
+        m = 0
+        while m < 2:
+            S = np.zeros(n + 1, dtype=np.int64)
+            terms = s.astype(np.int64) * self._ipow[m][:n] % self.P[m]
+            np.cumsum(terms, out=S[1:])
+            S %= self.P[m]
+            out.append(S)
+            m += 1
+        return out
+
+    def _windows(self, S: np.ndarray, m: int, L: int, first: int, n: int) -> np.ndarray:
+        """H_m of the windows of length L starting at first .. n − L."""
+        p = self.P[m]
+        diff = (S[first + L:n + 1] - S[first:n - L + 1]) % p
+        return diff * self._pow[m][first + L - 1:n] % p
+
+    def _span(self, S: List[np.ndarray], a: int, b: int) -> Tuple[int, int]:
+        """(H1, H2) of s[a:b] from the prefix sums."""
+        if b <= a:
+            return 0, 0
+        return tuple(int((S[m][b] - S[m][a]) % self.P[m] * self._pow[m][b - 1] % self.P[m]) for m in (0, 1))
+
+    def _pack(self, h1, h2):
+        return (h1 << _BITS) | h2
+
+    def _combine(self, left: Tuple[int, int], right: Tuple[int, int], right_len: int) -> Tuple[int, int]:
+        """H(xy) = H(x) · B^|y| + H(y), for both moduli."""
+        return tuple((left[m] * pow(self.B[m], right_len, self.P[m]) + right[m]) % self.P[m] for m in (0, 1))
+
+    def fingerprint(self, data: Union[Source, Buffer], block_size: int = 1 << 22) -> int:
+        """62-bit fingerprint of a whole buffer or file (computed block by block)."""
+        h = (0, 0)
+        for s, _, _ in _blocks(data, block_size, 0):
+            h = self._combine(h, self._span(self._prefix(s), 0, len(s)), len(s))
+        return self._pack(*h)
+
+    def window_fingerprints(self, data: Buffer, L: int) -> np.ndarray:
+        """uint64 fingerprints of all len(data) − L + 1 windows of length L."""
+        s = _as_array(data)
+        if L <= 0:
+            raise ValueError("window length must be positive")
+        if len(s) < L:
+            return np.zeros(0, dtype=np.uint64)
+        S = self._prefix(s)
+        h1 = self._windows(S[0], 0, L, 0, len(s)).astype(np.uint64)
+        h2 = self._windows(S[1], 1, L, 0, len(s)).astype(np.uint64)
+        return self._pack(h1, h2)
+
+    # ---- multi-pattern search -------------------------------------------------
+
+    def _fingerprints_at(self, s: np.ndarray, pos: np.ndarray, W: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(H1, H2) as uint64 of the windows s[i:i + W] for every i in pos (W <= MAX_WINDOW)."""
+        self._tables(W)
+        win = s[pos[:, None] + np.arange(W)].astype(np.int64)
+        return tuple((win @ self._pow[m][W - 1::-1] % self.P[m]).astype(np.uint64) for m in (0, 1))
+
+    def _compile(self, patterns: List[bytes]):
+        """
+        Group patterns by window length W (the largest power of two <= len, at most
+        MAX_WINDOW): ([(W, sorted distinct fingerprints of W-prefixes, pattern indexes
+        per fingerprint, longest pattern)], {q: prefilter table, bit g = group g}).
+        """
+        groups: Dict[int, Dict[int, List[int]]] = {}
+        i = 0
+        while i < len(patterns):
+            p = patterns[i]
+            if len(p) == 0:
+                raise ValueError("patterns must be non-empty")
+            W = min(MAX_WINDOW, 1 << (len(p).bit_length() - 1))
+            groups.setdefault(W, {}).setdefault(self.fingerprint(p[:W]), []).append(i)
+            i += 1
+        out = []
+        filters: Dict[int, np.ndarray] = {}
+        for g, W in enumerate(sorted(groups)):
+            keys = sorted(groups[W])
+            owners = [groups[W][k] for k in keys]
+            out.append((W, np.asarray(keys, dtype=np.uint64), owners,
+                        max(len(patterns[i]) for o in owners for i in o)))
+            q = min(W, 4)
+            table = filters.setdefault(q, np.zeros(1 << _FILTER_BITS, dtype=np.uint8))
+            # first q bytes of every pattern back to back: their grams start at 0, q, 2q, ...
+            grams = np.frombuffer(b"".join(patterns[i][:q] for o in owners for i in o), dtype=np.uint8)
+            table[_gram_index(grams, q, len(grams) - q + 1)[::q]] |= 1 << g
+        return out, filters
+
+    def _search_buffer(self, s: np.ndarray, patterns: List[bytes], compiled, new_from: int,
+                       base: int) -> List[Tuple[int, int]]:
+        """Matches in s that end after index new_from; offsets are base + index."""
+        n = len(s)
+        groups, filters = compiled
+        mv = memoryview(s)
+        out: List[Tuple[int, int]] = []
+        # stage 1: one table lookup per position and gram length; keep the flagged positions
+        flagged = {}
+        for q, table in filters.items():
+            if n >= q:
+                flags = table[_gram_index(s, q, n - q + 1)]
+                where = np.flatnonzero(flags)
+                flagged[q] = (where, flags[where])
+        for g, (W, fps, owners, longest) in enumerate(groups):
+            # a pattern that ends in the new bytes starts at >= new_from − len + 1 >= 0
+            first = max(0, new_from - longest + 1)
+            if n - first < W:
+                continue
+            where, bits = flagged[min(W, 4)]
+            cand = where[((bits & (1 << g)) != 0) & (where >= first) & (where <= n - W)]
+            if len(cand) == 0:
+                continue
+            # stage 2: fingerprints of the survivors only
+            h = self._pack(*self._fingerprints_at(s, cand, W))
+            j = np.searchsorted(fps, h)
+            j[j == len(fps)] = 0
+            hit = fps[j] == h
+            # stage 3: verify the whole pattern on fingerprint hits only
+            for pos, k in zip(cand[hit].tolist(), j[hit].tolist()):
+                for idx in owners[k]:
+                    end = pos + len(patterns[idx])
+                    if new_from < end <= n and mv[pos:end] == patterns[idx]:
+                        out.append((base + pos, idx))
+        out.sort()
+        return out
+
+    def search(self, data: Buffer, patterns: Sequence[bytes]) -> List[Tuple[int, int]]:
+        """All (offset, pattern index) occurrences in data, sorted by offset (exact)."""
+        return sorted(self.search_stream(data, patterns))
+
+    def search_stream(self, source: Union[Source, Buffer], patterns: Sequence[bytes],
+                      block_size: int = 1 << 22) -> Iterator[Tuple[int, int]]:
+        """
+        search() over a file (path or binary file object) or a buffer, block by block
+        (the power tables only ever cover one block). A match is
+        reported with the block its last byte is in, so the order is by offset only
+        within a block (sort the result if it must be global).
+        """
+        patterns = [bytes(p) for p in patterns]
+        compiled = self._compile(patterns)
+        keep = max(len(p) for p in patterns) - 1 if len(patterns) > 0 else 0
+        for s, base, new_from in _blocks(source, block_size, keep):
+            for match in self._search_buffer(s, patterns, compiled, new_from, base):
+                yield match
+
+    # ---- content-defined chunking --------------------------------------------
+
+    def chunk_stream(self, source: Union[Source, Buffer], avg_size: int = 8192, min_size: int = 2048,
+                     max_size: int = 65536, window: int = 48,
+                     block_size: int = 1 << 22) -> Iterator[Tuple[int, int, int]]:
+        """
+        Content-defined chunks of a file or buffer: yields (offset, length, fingerprint).
+        avg_size must be a power of two; boundaries do not depend on block_size.
+        """
+        if avg_size & (avg_size - 1) or not 0 < min_size <= avg_size <= max_size or window < 1:
+            raise ValueError("need avg_size a power of two and 0 < min_size <= avg_size <= max_size")
+        mask = avg_size - 1
+        start = 0                   # offset where the current chunk begins
+        part = (0, 0)               # fingerprint of the current chunk up to the block's new bytes
+        end = 0
+        for s, base, new_from in _blocks(source, block_size, window - 1):
+            n = len(s)
+            S = self._prefix(s)
+            end = base + n
+            # candidate cuts: window ends in the new bytes of this block
+            first = max(0, new_from - window + 1)
+            cuts: List[int] = []
+            if n - first >= window:
+                h = self._windows(S[0], 0, window, first, n)
+                cuts = (np.flatnonzero((h & mask) == mask) + (base + first + window)).tolist()
+            covered = base + new_from        # data before this offset is already in part
+            for e in cuts:
+                while e - start > max_size:
+                    part = self._emit_cut(S, base, covered, start, part, start + max_size)
+                    yield start, max_size, part
+                    start += max_size
+                    part = (0, 0)
+                if e - start >= min_size:
+                    part = self._emit_cut(S, base, covered, start, part, e)
+                    yield start, e - start, part
+                    start = e
+                    part = (0, 0)
+            while end - start > max_size:
+                part = self._emit_cut(S, base, covered, start, part, start + max_size)
+                yield start, max_size, part
+                start += max_size
+                part = (0, 0)
+            # the rest of the block belongs to the chunk still open
+            part = self._emit_cut(S, base, covered, start, part, end, pack=False)
+        if end > start:
+            yield start, end - start, self._pack(*part)
+
+    def _emit_cut(self, S: List[np.ndarray], base: int, covered: int, start: int, part, cut: int,
+                  pack: bool = True):
+        """Fingerprint of [start, cut): part covers [start, covered); the rest is in this block."""
+        a = max(start, covered) - base
+        b = cut - base
+        h = self._combine(part, self._span(S, a, b), max(0, b - a))
+        return self._pack(*h) if pack else h
+
+
+def _blocks(source: Union[Source, Buffer], block_size: int, keep: int) -> Iterator[Tuple[np.ndarray, int, int]]:
+    """
+    Yield (buffer, offset of buffer[0], index where the new bytes start): every block
+    is prefixed with the last `keep` bytes of the previous one. Files are read with
+    readinto() into one reused uint8 buffer; in-memory buffers are sliced (no copy).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, np.ndarray)):
+        s = _as_array(source)
+        pos = 0
+        while pos < len(s) or pos == 0:
+            lo = max(0, pos - keep)
+            hi = min(len(s), pos + block_size)
+            yield s[lo:hi], lo, pos - lo
+            if hi >= len(s):
+                return
+            pos = hi
+        return
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        buf = np.empty(keep + block_size, dtype=np.uint8)
+        view = memoryview(buf)
+        tail = 0
+        base = 0
+        while True:
+            got = f.readinto(view[tail:])
+            if not got:
+                return
+            n = tail + got
+            yield buf[:n], base, tail
+            t = min(keep, n)
+            buf[:t] = buf[n - t:n]
+            base += n - t
+            tail = t
+    finally:
+        if isinstance(source, str):
+            f.close()
+
+
+def _tiny_demo():
+    """Find three patterns, then chunk a text and a slightly edited copy."""
+    rk = RabinKarp(seed=1)
+    text = b"the quick brown fox jumps over the lazy dog; the dog sleeps"
+    print("P =", rk.P, "B =", rk.B)
+    print("search:", rk.search(text, [b"the", b"dog", b"fox jumps"]))
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 256, size=200000, dtype=np.uint8).tobytes()
+    edited = data[:100000] + b"INSERTED" + data[100000:]
+    a = {fp for _, _, fp in rk.chunk_stream(data, avg_size=4096, min_size=1024, max_size=16384)}
+    b = {fp for _, _, fp in rk.chunk_stream(edited, avg_size=4096, min_size=1024, max_size=16384)}
+    print("chunks: %d vs %d, shared %d (Jaccard %.2f)" % (len(a), len(b), len(a & b), len(a & b) / len(a | b)))
+
+
+def _benchmark():
+    """64 MiB of word text: multi-pattern search and CDC, in memory and streamed from a file."""
+    import os
+    import tempfile
+    import time
+    rng = np.random.default_rng(0)
+    words = [bytes(rng.integers(97, 123, size=rng.integers(2, 10), dtype=np.uint8)) for _ in range(5000)]
+    pieces = rng.integers(0, len(words), size=9000000)
+    text = b" ".join(words[i] for i in pieces.tolist())[: 64 << 20]
+    mb = len(text) / (1 << 20)
+    rk = RabinKarp(seed=0)
+
+    starts = rng.integers(0, len(text) - 64, size=100)
+    lengths = rng.integers(8, 65, size=100)
+    patterns = [text[a:a + L] for a, L in zip(starts.tolist(), lengths.tolist())]
+    patterns += [bytes(rng.integers(0, 256, size=16, dtype=np.uint8)) for _ in range(100)]
+
+    t0 = time.perf_counter()
+    found = rk.search(text, patterns)
+    t_rk = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    naive = []
+    for k, p in enumerate(patterns):
+        i = text.find(p)
+        while i >= 0:
+            naive.append((i, k))
+            i = text.find(p, i + 1)
+    t_find = time.perf_counter() - t0
+    print("%.0f MiB, %d patterns (%d window groups): Rabin-Karp %.2fs (%.1f MB/s), %d matches; "
+          "bytes.find loop %.2fs (%.1f MB/s), same matches: %s" % (
+              mb, len(patterns), len(rk._compile(patterns)[0]), t_rk, mb / t_rk, len(found),
+              t_find, mb / t_find, sorted(naive) == found))
+
+    for label, kw in (("avg 8 KiB", dict(avg_size=8192, min_size=2048, max_size=65536)),
+                      ("avg 64 KiB", dict(avg_size=65536, min_size=16384, max_size=262144))):
+        t0 = time.perf_counter()
+        chunks = list(rk.chunk_stream(text, **kw))
+        t_cdc = time.perf_counter() - t0
+        # near-duplicate: 20 small edits spread over the text
+        edited = bytearray(text)
+        for pos in sorted(rng.integers(0, len(text), size=20).tolist(), reverse=True):
+            edited[pos:pos + 10] = b"#EDIT#"
+        before = {fp: ln for _, ln, fp in chunks}
+        after = list(rk.chunk_stream(bytes(edited), **kw))
+        shared = sum(ln for _, ln, fp in after if fp in before)
+        print("CDC %s: %.2fs (%.1f MB/s), %d chunks (mean %.0f bytes); after 20 edits %.2f%% of bytes "
+              "still in shared chunks" % (label, t_cdc, mb / t_cdc, len(chunks), len(text) / len(chunks),
+                                         100.0 * shared / len(edited)))
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "text.bin")
+        with open(path, "wb") as f:
+            f.write(text)
+        for block in (1 << 20, 1 << 22, 1 << 24):
+            t0 = time.perf_counter()
+            streamed = list(rk.search_stream(path, patterns, block_size=block))
+            t_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            c = list(rk.chunk_stream(path, block_size=block))
+            t_c = time.perf_counter() - t0
+            print("streamed, %4d KiB blocks: search %.1f MB/s (same: %s), CDC %.1f MB/s (same: %s)" % (
+                block >> 10, mb / t_s, sorted(streamed) == found, mb / t_c, c == list(rk.chunk_stream(text))))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()
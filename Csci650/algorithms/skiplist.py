@@ -132,3 +132,461 @@ Small design table (rule of thumb):
 
 
 """
+
+"""
+IMPLEMENTATION: array-backed indexable skip list
+------------------------------------------------------------
+- Nodes are integer ids; there are no node objects. Per node: key[], value[], and
+  the tower: height[] and base[] (offset of its first slot in the flat link[]/span[]).
+  link[base[x] + ℓ] = next node at level ℓ (NIL = -1), span[base[x] + ℓ] = how many
+  level-0 steps that link jumps over. Node 0 is the head sentinel with MAX_LEVEL slots.
+- Ranks: the head has rank 0, the elements ranks 1..n, and every missing link ends at
+  a virtual tail with rank n + 1, so spans are defined on every level. Summing spans on
+  a search path gives the rank ⇒ rank(key) and select(i) are O(log n).
+- bulk_load(sorted items) is deterministic and O(n): the element with rank r gets
+  height 1 + (number of times 1/p divides r), i.e. every 2nd element reaches level 1,
+  every 4th level 2, ... (p = 1/2). One left-to-right pass links every level.
+- insert() draws a random geometric height (Pr[height > ℓ] = p^ℓ) as in the notes.
+- Deleted towers are unlinked but their slots are not reused; bulk_load(items())
+  compacts the storage.
+"""
+
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+NIL = -1
+MAX_LEVEL = 32
+END = object()      # Cursor.next_key() past the last item
+
+
+class SkipList:
+    """Ordered map (unique keys) with O(log n) search/insert/delete/rank/select."""
+
+    def __init__(self, items: Iterable[Tuple[Any, Any]] = (), p: float = 0.5,
+                 max_level: int = MAX_LEVEL, seed: Optional[int] = None):
+        if not 0 < p < 1:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.max_level = max_level
+        self._rng = random.Random(seed)
+        self.bulk_load(items)
+
+    def _reset(self) -> None:
+        self.key: List[Any] = [None]
+        self.value: List[Any] = [None]
+        self.height: List[int] = [self.max_level]
+        self.base: List[int] = [0]
+        self.link: List[int] = [NIL] * self.max_level
+        self.span: List[int] = [1] * self.max_level
+        self.level = 1          # number of levels in use
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _new_node(self, key: Any, value: Any, h: int) -> int:
+        x = len(self.key)
+        self.key.append(key)
+        self.value.append(value)
+        self.height.append(h)
+        self.base.append(len(self.link))
+        self.link.extend([NIL] * h)
+        self.span.extend([0] * h)
+        return x
+
+    def bulk_load(self, items: Iterable[Tuple[Any, Any]]) -> None:
+        """
+        Replace the contents with `items`, which must be sorted by strictly increasing key.
+        Deterministic O(n) build (no coin flips).
+        """
+        items = list(items)         # may be this list's own lazy items(): read it before _reset()
+        self._reset()
+        ratio = max(2, int(round(1 / self.p)))
+        last: List[int] = [0] * self.max_level     # last node linked on each level
+        last_rank: List[int] = [0] * self.max_level
+        link = self.link
+        span = self.span
+        r = 0
+        prev = None
+        for k, v in items:
+            if r > 0 and not prev < k:
+                raise ValueError("bulk_load needs keys in strictly increasing order")
+            prev = k
+            r += 1
+            h = 1
+            q = r
+            while h < self.max_level and q % ratio == 0:
+                q //= ratio
+                h += 1
+            x = self._new_node(k, v, h)
+            lvl = 0
+            while lvl < h:
+                u = last[lvl]
+                link[self.base[u] + lvl] = x
+                span[self.base[u] + lvl] = r - last_rank[lvl]
+                last[lvl] = x
+                last_rank[lvl] = r
+                lvl += 1
+            if h > self.level:
+                self.level = h
+        self.size = r
+        # the last node on every level points at the virtual tail (rank n + 1)
+        lvl = 0
+        while lvl < self.max_level:
+            span[self.base[last[lvl]] + lvl] = r + 1 - last_rank[lvl]
+            lvl += 1
+
+    def _random_height(self) -> int:
+        h = 1
+        while h < self.max_level and self._rng.random() < self.p:
+            h += 1
+        return h
+
+    def _search(self, key: Any, update: Optional[List[int]] = None,
+                ranks: Optional[List[int]] = None) -> Tuple[int, int]:
+        """
+        Forward-then-down search for the last node with key < `key`.
+        Returns (that node, its rank); fills update[]/ranks[] per level if given.
+        """
+        keys = self.key
+        link = self.link
+        span = self.span
+        base = self.base
+        x = 0
+        pos = 0
+        lvl = self.level - 1
+        while lvl >= 0:
+            i = base[x] + lvl
+            y = link[i]
+            while y != NIL and keys[y] < key:
+                pos += span[i]
+                x = y
+                i = base[x] + lvl
+                y = link[i]
+            if update is not None:
+                update[lvl] = x
+                ranks[lvl] = pos
+            lvl -= 1
+        return x, pos
+
+    def _find(self, key: Any) -> int:
+        """Node holding `key`, or NIL."""
+        x, _ = self._search(key)
+        y = self.link[self.base[x]]
+        if y != NIL and self.key[y] == key:
+            return y
+        return NIL
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        x = self._find(key)
+        return self.value[x] if x != NIL else default
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(key) != NIL
+
+    def __getitem__(self, key: Any) -> Any:
+        x = self._find(key)
+        if x == NIL:
+            raise KeyError(key)
+        return self.value[x]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.insert(key, value)
+
+    def insert(self, key: Any, value: Any = None) -> bool:
+        """Insert key -> value (overwrites an existing key). Returns True if the key is new."""
+        update = [0] * self.max_level
+        ranks = [0] * self.max_level
+        u, pos = self._search(key, update, ranks)
+        y = self.link[self.base[u]]
+        if y != NIL and self.key[y] == key:
+            self.value[y] = value
+            return False
+
+        h = self._random_height()
+        if h > self.level:
+            # newly used head levels: the head link points at the tail, rank size + 1
+            lvl = self.level
+            while lvl < h:
+                update[lvl] = 0
+                ranks[lvl] = 0
+                self.span[lvl] = self.size + 1
+                lvl += 1
+            self.level = h
+
+        x = self._new_node(key, value, h)
+        link = self.link
+        span = self.span
+        base = self.base
+        r = pos + 1                     # rank of the new node
+        lvl = 0
+        while lvl < self.level:
+            i = base[update[lvl]] + lvl
+            if lvl < h:
+                j = base[x] + lvl
+                link[j] = link[i]
+                span[j] = span[i] - (r - ranks[lvl]) + 1
+                link[i] = x
+                span[i] = r - ranks[lvl]
+            else:
+                span[i] += 1
+            lvl += 1
+        self.size += 1
+        return True
+
+    def delete(self, key: Any) -> bool:
+        """Remove `key`. Returns False if it was not present."""
+        update = [0] * self.max_level
+        ranks = [0] * self.max_level
+        u, _ = self._search(key, update, ranks)
+        x = self.link[self.base[u]]
+        if x == NIL or self.key[x] != key:
+            return False
+
+        link = self.link
+        span = self.span
+        base = self.base
+        h = self.height[x]
+        lvl = 0
+        while lvl < self.level:
+            i = base[update[lvl]] + lvl
+            if lvl < h:
+                j = base[x] + lvl
+                span[i] += span[j] - 1
+                link[i] = link[j]
+            else:
+                span[i] -= 1
+            lvl += 1
+        while self.level > 1 and link[self.level - 1] == NIL:
+            self.level -= 1
+        self.key[x] = None
+        self.value[x] = None
+        self.size -= 1
+        return True
+
+    def __delitem__(self, key: Any) -> None:
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def rank(self, key: Any) -> int:
+        """Number of keys < key (the index `key` has, or would have, in sorted order)."""
+        _, pos = self._search(key)
+        return pos
+
+    def select(self, i: int) -> Tuple[Any, Any]:
+        """(key, value) of the i-th smallest key, 0-based."""
+        if not 0 <= i < self.size:
+            raise IndexError("select index out of range")
+        link = self.link
+        span = self.span
+        base = self.base
+        target = i + 1
+        x = 0
+        pos = 0
+        lvl = self.level - 1
+        while lvl >= 0:
+            j = base[x] + lvl
+            # links to the tail have span > size - pos, so they never pass the test
+            while pos + span[j] <= target:
+                pos += span[j]
+                x = link[j]
+                j = base[x] + lvl
+            lvl -= 1
+        return self.key[x], self.value[x]
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """All (key, value) pairs in key order (level-0 walk)."""
+        link = self.link
+        base = self.base
+        x = link[0]
+        while x != NIL:
+            yield self.key[x], self.value[x]
+            x = link[base[x]]
+
+    def __iter__(self) -> Iterator[Any]:
+        for k, _ in self.items():
+            yield k
+
+    def cursor(self) -> "SkipListCursor":
+        """A cursor positioned at the smallest key."""
+        return SkipListCursor(self)
+
+    def range(self, a: Any, b: Any) -> Iterator[Tuple[Any, Any]]:
+        """Lazily yield (key, value) with a <= key <= b: O(log n) to start, O(1) per item."""
+        c = SkipListCursor(self)
+        c.seek(a)
+        while c.valid() and not b < c.key():
+            yield c.key(), c.value()
+            c.next()
+
+
+class Cursor(ABC):
+    """
+    Position in a sorted sequence of (key, value) pairs.
+    Subclasses provide seek/seek_first/valid/key/value/next (abstract, so a missing
+    one fails at instantiation); next_batch and iteration come for free.
+    Iterating yields the remaining items and advances.
+    """
+    __slots__ = ()
+
+    @abstractmethod
+    def seek(self, key: Any) -> None:
+        """Move to the first key >= key."""
+
+    @abstractmethod
+    def seek_first(self) -> None:
+        """Move to the smallest key."""
+
+    @abstractmethod
+    def valid(self) -> bool:
+        """True while the cursor is on an item."""
+
+    @abstractmethod
+    def key(self) -> Any:
+        """Key of the current item."""
+
+    @abstractmethod
+    def value(self) -> Any:
+        """Value of the current item."""
+
+    @abstractmethod
+    def next(self) -> None:
+        """Move to the next item."""
+
+    def next_key(self) -> Any:
+        """Advance; return the new key, or END if the cursor ran off the end."""
+        self.next()
+        return self.key() if self.valid() else END
+
+    def next_batch(self, n: int) -> List[Tuple[Any, Any]]:
+        """Up to n items from the current position; the cursor moves past them."""
+        out: List[Tuple[Any, Any]] = []
+        while len(out) < n and self.valid():
+            out.append((self.key(), self.value()))
+            self.next()
+        return out
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        while self.valid():
+            yield self.key(), self.value()
+            self.next()
+
+
+class SkipListCursor(Cursor):
+    """
+    Cursor over a SkipList: just a node id, so O(1) memory.
+    Do not insert/delete while a cursor is in use (deleted towers keep their links,
+    but their key is cleared).
+    """
+    __slots__ = ("sl", "x")
+
+    def __init__(self, sl: SkipList):
+        self.sl = sl
+        self.x = sl.link[0]
+
+    def seek(self, key: Any) -> None:
+        u, _ = self.sl._search(key)
+        self.x = self.sl.link[self.sl.base[u]]
+
+    def seek_first(self) -> None:
+        self.x = self.sl.link[0]
+
+    def valid(self) -> bool:
+        return self.x != NIL
+
+    def key(self) -> Any:
+        return self.sl.key[self.x]
+
+    def value(self) -> Any:
+        return self.sl.value[self.x]
+
+    def next(self) -> None:
+        self.x = self.sl.link[self.sl.base[self.x]]
+
+    def next_key(self) -> Any:
+        x = self.x = self.sl.link[self.sl.base[self.x]]
+        return self.sl.key[x] if x != NIL else END
+
+    def next_batch(self, n: int) -> List[Tuple[Any, Any]]:
+        keys = self.sl.key
+        values = self.sl.value
+        link = self.sl.link
+        base = self.sl.base
+        out: List[Tuple[Any, Any]] = []
+        x = self.x
+        while x != NIL and len(out) < n:
+            out.append((keys[x], values[x]))
+            x = link[base[x]]
+        self.x = x
+        return out
+
+
+def _tiny_demo():
+    """Bulk load, insert, delete, rank and select on a few keys."""
+    s = SkipList((k, k * k) for k in [3, 6, 7, 9, 12, 17, 19, 21, 25, 26])
+    print("heights:", [s.height[x] for x in range(1, len(s.key))])
+    s.insert(10, 100)
+    s.delete(17)
+    print("keys:", list(s))
+    print("rank(12) =", s.rank(12), " select(4) =", s.select(4))
+    print("range [7, 20]:", list(s.range(7, 20)))
+
+
+def _benchmark():
+    """SkipList vs bisect on a sorted list vs dict (n = 1M)."""
+    import bisect
+    import time
+    rng = random.Random(0)
+    n = 1000000
+    keys = sorted(rng.sample(range(10 * n), n))
+    probes = [rng.randrange(10 * n) for _ in range(100000)]
+    fresh = [rng.randrange(10 * n) * 2 + 1 for _ in range(20000)]
+
+    def clock(f):
+        t0 = time.perf_counter()
+        f()
+        return time.perf_counter() - t0
+
+    s = SkipList()
+    lst: List[int] = []
+    d = {}
+    print("%-22s %10s %10s %10s" % ("", "skiplist", "bisect", "dict"))
+    print("%-22s %10.3f %10.3f %10.3f" % (
+        "build (sorted, %dk)" % (n // 1000),
+        clock(lambda: s.bulk_load((k, k) for k in keys)),
+        clock(lambda: lst.extend(keys)),
+        clock(lambda: d.update((k, k) for k in keys))))
+    print("%-22s %10.3f %10.3f %10.3f" % (
+        "100k lookups",
+        clock(lambda: [s.get(k) for k in probes]),
+        clock(lambda: [bisect.bisect_left(lst, k) for k in probes]),
+        clock(lambda: [d.get(k) for k in probes])))
+    print("%-22s %10.3f %10.3f %10s" % (
+        "100k rank()",
+        clock(lambda: [s.rank(k) for k in probes]),
+        clock(lambda: [bisect.bisect_left(lst, k) for k in probes]),
+        "n/a (sort)"))
+    print("%-22s %10.3f %10.3f %10s" % (
+        "100k select()",
+        clock(lambda: [s.select(k % n) for k in probes]),
+        clock(lambda: [lst[k % n] for k in probes]),
+        "n/a (sort)"))
+    print("%-22s %10.3f %10.3f %10.3f" % (
+        "20k random inserts",
+        clock(lambda: [s.insert(k, k) for k in fresh]),
+        clock(lambda: [bisect.insort(lst, k) for k in fresh]),
+        clock(lambda: [d.__setitem__(k, k) for k in fresh])))
+    print("%-22s %10.3f %10.3f %10.3f" % (
+        "20k deletes",
+        clock(lambda: [s.delete(k) for k in fresh]),
+        clock(lambda: [lst.pop(bisect.bisect_left(lst, k)) for k in fresh if lst[bisect.bisect_left(lst, k)] == k]),
+        clock(lambda: [d.pop(k, None) for k in fresh])))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        _benchmark()
+    else:
+        _tiny_demo()